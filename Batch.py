@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+import datetime
+import numpy as np
+from RefractiveIndex import RefractiveIndex
+from PMC import PMC
+from JSI import JSI
+from ResultCache import setdiskdir
+from Filters import Filters
+from Settings import Settings
+
+
+# headless counterpart of the GUI calculations (no Qt or matplotlib), for scripts and batch jobs.
+# the parameters are read from the settings (config.yaml) the same way the GUI initializes its
+# spinboxes, and every calculation returns its results as {name: array}, see save. Example:
+#   batch = Batch()
+#   batch.config.set('Crystal Temperature single', 30)
+#   batch.save(batch.HOM_vis(), 'hom.npz')
+# (after changing config, call getProperties again)
+class Batch:
+    commands = ['pmc_wl_vs_T', 'pmc_wl_vs_PP', 'purity_vs_tau', 'purity_vs_L', 'jsi', 'HOM_vis', 'HOM_vis_temp',
+                'FWHM_vs_tau', 'Tcp_vs_PP', 'Tcp_vs_lp', 'Tcp_map']
+
+    def __init__(self, config=None, path='config.yaml'):
+        if config is None:
+            config = Settings()
+            config.standardSettings()
+            config.loadSettings(path)
+        self.config = config
+        self.getProperties()
+
+    def getProperties(self):
+        self.config.getProperties(self)
+        setdiskdir(self.ResultCacheDir)
+
+    def refidxfunc(self):
+        nxfunc = RefractiveIndex().getSingleIDX(self.CrystalMaterial, "X", self.CrystalNX)
+        nyfunc = RefractiveIndex().getSingleIDX(self.CrystalMaterial, "Y", self.CrystalNY)
+        nzfunc = RefractiveIndex().getSingleIDX(self.CrystalMaterial, "Z", self.CrystalNZ)
+        return [nxfunc, nyfunc, nzfunc]
+
+    def spectralfilters(self):
+        ffi = Filters().getFilterFunction(self.SIfilterIdlerType, self.SIfilterIdlerCenterWL, self.SIfilterIdlerFWHM)
+        ffs = Filters().getFilterFunction(self.SIfilterSignalType, self.SIfilterSignalCenterWL, self.SIfilterSignalFWHM)
+        return [ffs, ffi]
+
+    def focusing(self):
+        return [self.Focusing_enable, self.Fibrecoupling_enable, self.Focallength_pump, self.Focallength_signal,
+                self.Focallength_idler, self.Beamdiameter_pump, self.Beamdiameter_signal, self.Beamdiameter_idler]
+
+    # signal and idler ranges of wlrange and pts points, centred on the phase matched wavelengths at
+    # the single temperature
+    def siranges(self, refidxfunc, wlrange, pts):
+        Tvec = np.arange(self.CrystalTempSingle, self.CrystalTempSingle + 1, 2)
+        [ls, li] = PMC().getSI_wl(self.PumpWlSingle, self.CrystalPolingPeriodSingle, Tvec, refidxfunc, self.QPMOrder)
+        signalrange = np.linspace(ls - wlrange / 2, ls + wlrange / 2, pts)
+        idlerrange = np.linspace(li - wlrange / 2, li + wlrange / 2, pts)
+        return signalrange, idlerrange
+
+    def pmc_wl_vs_T(self):
+        plotrange = np.arange(self.CrystalTempFrom, self.CrystalTempTo, (self.CrystalTempTo - self.CrystalTempFrom) / 250)
+        [siwl, idwl, Tcp] = PMC().getSI_wl_varT(self.PumpWlSingle, self.CrystalPolingPeriodSingle, plotrange,
+                                                 self.refidxfunc(), self.QPMOrder)
+        return {'temperature': plotrange, 'signal': siwl, 'idler': idwl, 'Tcp': Tcp}
+
+    def pmc_wl_vs_PP(self):
+        plotrange = np.arange(self.CrystalPolingPeriodFrom, self.CrystalPolingPeriodTo,
+                              (self.CrystalPolingPeriodTo - self.CrystalPolingPeriodFrom) / 250)
+        [siwl, idwl, PPcp] = PMC().getSI_wl_varPP(self.PumpWlSingle, plotrange, self.CrystalTempSingle,
+                                                  self.refidxfunc(), self.QPMOrder)
+        return {'polingperiod': plotrange, 'signal': siwl, 'idler': idwl, 'PPcp': PPcp}
+
+    def purity_vs_tau(self):
+        refidxfunc = self.refidxfunc()
+        taurange = np.arange(self.PulsewidthFrom, self.PulsewidthTo,
+                             (self.PulsewidthTo - self.PulsewidthFrom) / self.PurityTauresolution)
+        signalrange, idlerrange = self.siranges(refidxfunc, self.PurityWLrange, self.PurityWLresolution)
+        [purity, max, maxtau] = JSI().getpurity_vsTau(self.PumpWlSingle, signalrange, idlerrange, taurange,
+                                                      self.CrystalTempSingle, self.CrystalPolingPeriodSingle,
+                                                      self.CrystalLengthSingle, refidxfunc, self.QPMOrder,
+                                                      self.spectralfilters(), self.PumpShape)
+        return {'tau': taurange, 'purity': np.asarray(purity), 'maxpurity': max, 'maxtau': maxtau}
+
+    def purity_vs_L(self):
+        refidxfunc = self.refidxfunc()
+        Lrange = np.arange(self.CrystalLengthFrom, self.CrystalLengthTo,
+                           (self.CrystalLengthTo - self.CrystalLengthFrom) / self.PurityTauresolution)
+        signalrange, idlerrange = self.siranges(refidxfunc, self.PurityWLrange, self.PurityWLresolution)
+        [purity, max, maxL] = JSI().getpurity_vsL(self.PumpWlSingle, signalrange, idlerrange, self.PulsewidthSingle,
+                                                  self.CrystalTempSingle, self.CrystalPolingPeriodSingle, Lrange,
+                                                  refidxfunc, self.QPMOrder, self.spectralfilters(), self.PumpShape,
+                                                  self.PumpCWbwSingle)
+        return {'length': Lrange, 'purity': np.asarray(purity), 'maxpurity': max, 'maxlength': maxL}
+
+    def jsi(self, plotJSI=False):
+        refidxfunc = self.refidxfunc()
+        signalrange, idlerrange = self.siranges(refidxfunc, self.JSIwlRange, self.JSIresolution)
+        [PE, PM, JS] = JSI().getplots(self.PumpWlSingle, signalrange, idlerrange, self.PulsewidthSingle,
+                                      self.CrystalTempSingle, self.CrystalPolingPeriodSingle, self.CrystalLengthSingle,
+                                      refidxfunc, self.QPMOrder, self.spectralfilters(), plotJSI, self.PumpShape,
+                                      self.PumpCWbwSingle, *self.focusing())
+        return {'signal': np.ravel(signalrange), 'idler': np.ravel(idlerrange), 'PE': PE, 'PM': PM, 'JS': JS}
+
+    def HOM_vis(self):
+        refidxfunc = self.refidxfunc()
+        delayrange = np.linspace(-self.HOMdelayrange / 2, self.HOMdelayrange / 2, self.HOMresolution)
+        signalrange, idlerrange = self.siranges(refidxfunc, self.JSIwlRange, self.JSIresolution)
+        [CoincProb, vis, fwhm] = JSI().getHOMinterference(self.PumpWlSingle, self.CrystalTempSingle,
+                                                          self.CrystalPolingPeriodSingle, self.QPMOrder,
+                                                          self.PulsewidthSingle, self.CrystalLengthSingle, signalrange,
+                                                          idlerrange, self.JSIresolution, self.PumpShape, delayrange,
+                                                          self.HOMphase, refidxfunc, self.spectralfilters(),
+                                                          self.PumpCWbwSingle, *self.focusing())
+        return {'delay': delayrange, 'coincidence': CoincProb, 'visibility': vis, 'fwhm': fwhm}
+
+    def HOM_vis_temp(self):
+        refidxfunc = self.refidxfunc()
+        plotrange = np.arange(self.CrystalTempFrom, self.CrystalTempTo, (self.CrystalTempTo - self.CrystalTempFrom) / 250)
+        [siwl, idwl, Tcp] = PMC().getSI_wl_varT(self.PumpWlSingle, self.CrystalPolingPeriodSingle, plotrange,
+                                                 refidxfunc, self.QPMOrder)
+        temprange = np.linspace(Tcp - self.HOMtemprange / 2, Tcp + self.HOMtemprange / 2, self.HOMresolution)
+        signalrange, idlerrange = self.siranges(refidxfunc, self.JSIwlRange, self.JSIresolution)
+        [CoincProb, vis, fwhm] = JSI().getHOMinterferenceT(self.PumpWlSingle, self.CrystalPolingPeriodSingle,
+                                                           self.QPMOrder, self.PulsewidthSingle,
+                                                           self.CrystalLengthSingle, signalrange, idlerrange,
+                                                           self.JSIresolution, self.PumpShape, temprange, self.HOMphase,
+                                                           refidxfunc, self.spectralfilters(), self.PumpCWbwSingle,
+                                                           *self.focusing())
+        return {'temperature': temprange, 'coincidence': CoincProb, 'visibility': vis, 'fwhm': fwhm}
+
+    def FWHM_vs_tau(self):
+        refidxfunc = self.refidxfunc()
+        signalrange, idlerrange = self.siranges(refidxfunc, self.JSIwlRange, self.JSIresolution)
+        taurange = np.linspace(self.PulsewidthFrom, self.PulsewidthTo, self.fwhmres)
+        [sigfwhm, idfwhm] = JSI().getFWHMvstau(self.PumpWlSingle, signalrange, idlerrange, self.CrystalTempSingle,
+                                               self.CrystalPolingPeriodSingle, self.QPMOrder, self.CrystalLengthSingle,
+                                               taurange, refidxfunc, self.spectralfilters(), self.JSIresolution,
+                                               self.PumpShape, self.fwhmprecision,
+                                               self.PumpShapeApplyDeconvolutionFactor)
+        return {'tau': taurange, 'signalfwhm': np.asarray(sigfwhm), 'idlerfwhm': np.asarray(idfwhm)}
+
+    def Tcp_vs_PP(self):
+        PPrange = np.linspace(self.CrystalPolingPeriodFrom, self.CrystalPolingPeriodTo, 100)
+        Tcp = JSI().getTcpVsPP(PPrange, self.CrystalTempSingle, self.PumpWlSingle, self.refidxfunc(), self.QPMOrder)
+        return {'polingperiod': PPrange, 'Tcp': np.asarray(Tcp)}
+
+    def Tcp_vs_lp(self):
+        pwlrange = np.linspace(self.PumpWlFrom, self.PumpWlTo, 100)
+        Tcp = JSI().getTcpVslp(pwlrange, self.CrystalTempSingle, self.CrystalPolingPeriodSingle, self.refidxfunc(),
+                               self.QPMOrder)
+        return {'pumpwavelength': pwlrange, 'Tcp': np.asarray(Tcp)}
+
+    def Tcp_map(self):
+        PPrange = np.linspace(self.CrystalPolingPeriodFrom, self.CrystalPolingPeriodTo, 200)
+        pwlrange = np.linspace(self.PumpWlFrom, self.PumpWlTo, 200)
+        Tcp = JSI().getTcpMap(PPrange, pwlrange, self.CrystalTempSingle, self.refidxfunc(), self.QPMOrder)
+        return {'polingperiod': PPrange, 'pumpwavelength': pwlrange, 'Tcp': Tcp}
+
+    def run(self, command):
+        if command not in self.commands:
+            raise ValueError('Unknown command ' + str(command))
+        return getattr(self, command)()
+
+    # write results to a .npz file (default: <command>_<date>_<time>.npz, like the GUI's HOM files)
+    def save(self, results, path=None, command='results'):
+        if path is None:
+            datestr = datetime.datetime.strftime(datetime.datetime.now(), format='%Y%m%d_%H%M%S')
+            path = '{0:s}_{1:s}.npz'.format(command, datestr)
+        np.savez(path, **results)
+        return path
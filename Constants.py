@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import dataclasses
 import numpy as np
 
 class Constants:
@@ -25,3 +26,37 @@ class Constants:
         else:
             self.taucfgauss = 1
             self.taucfsech = 1
+
+    # immutable snapshot of the constants together with the pump shape factors derived from them
+    def resolved(self):
+        return ResolvedConstants(
+            pi=float(self.pi),
+            c=float(self.c),
+            taucfgauss=float(self.taucfgauss),
+            taucfsech=float(self.taucfsech),
+            tbwpgauss=float(self.tbwpgauss),
+            tbwpsech=float(self.tbwpsech),
+            tbwpsinc=float(self.tbwpsinc),
+            sigmagauss=float(2 * self.pi * self.tbwpgauss / (2 * np.sqrt(2 * np.log(2)))),
+            Bsech=float(2 * np.arccosh(np.sqrt(2)) / (2 * self.pi * self.tbwpsech)),
+            Bsinc=float(3.79099 / (2 * self.pi * self.tbwpsinc)))
+
+
+# resolved constants (see Constants.resolved). Pump envelope parameters for a pulse duration tau:
+# gaussian standard deviation (angular frequency) sigmagauss / tau, sech^2 and sinc widths Bsech * tau and Bsinc * tau
+@dataclasses.dataclass(frozen=True)
+class ResolvedConstants:
+    pi: float
+    c: float
+    taucfgauss: float
+    taucfsech: float
+    tbwpgauss: float
+    tbwpsech: float
+    tbwpsinc: float
+    sigmagauss: float
+    Bsech: float
+    Bsinc: float
+
+    # plain float tuple, e.g. to pass into numba kernels
+    def astuple(self):
+        return dataclasses.astuple(self)
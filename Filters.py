@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 
 
+import functools
 import numpy as np
 
+# the ...onlywl filter functions are partials of bound methods (not closures), so that they can be
+# pickled along with a JSI for the process sweep executor
 class Filters:
     def __init__(self):
         self.FilterList = ['None','Rectangular','Gaussian']
@@ -20,9 +23,7 @@ class Filters:
         return 1
 
     def nofilteronlywl(self, cwl, fwhm):
-        def func(wl):
-            return self.nofilter(wl, cwl, fwhm)
-        return func
+        return functools.partial(self.nofilter, cwl=cwl, fwhm=fwhm)
 
     def rectangularfilter(self, wl, cwl, fwhm):
         if (np.absolute(cwl-wl)>fwhm/2):
@@ -31,15 +32,11 @@ class Filters:
             return 1
 
     def rectangularfilteronlywl(self, cwl, fwhm):
-        def func(wl):
-            return self.rectangularfilter(wl, cwl, fwhm)
-        return func
+        return functools.partial(self.rectangularfilter, cwl=cwl, fwhm=fwhm)
 
     def gaussianfilter(self,wl,cwl,fwhm):
         s=fwhm/2*np.sqrt(2*np.log(2))
         return np.exp(-((wl-cwl)**2)/(2*(s**2)))
 
     def gaussianfilteronlywl(self, cwl, fwhm):
-        def func(wl):
-            return self.gaussianfilter(wl, cwl, fwhm)
-        return func
+        return functools.partial(self.gaussianfilter, cwl=cwl, fwhm=fwhm)
@@ -1,39 +1,60 @@
 #!/usr/bin/env python3
 
-import cProfile
-import pstats
-PROFILE=True
-
 try:
     from PyQt6.QtWidgets import (QApplication, QWidget, QToolTip, QPushButton, QSpinBox, QLabel,
                                 QDoubleSpinBox, QGroupBox, QComboBox, QCheckBox, QMainWindow,
-                                QRadioButton, QGridLayout, QVBoxLayout, QScrollArea, QMessageBox)
+                                QRadioButton, QGridLayout, QVBoxLayout, QScrollArea, QMessageBox, QProgressBar)
     from PyQt6.QtGui import (QFont, QMouseEvent)
-    from matplotlib.backends.backend_qtagg import (FigureCanvasQTAgg as FigureCanvas,
-                                                    NavigationToolbar2QT as NavigationToolbar)
+    from PyQt6.QtCore import QThreadPool
+    QTBACKEND = 'matplotlib.backends.backend_qtagg'
 except ModuleNotFoundError:
     from PyQt5.QtWidgets import (QApplication, QWidget, QToolTip, QPushButton, QSpinBox, QLabel,
                                  QDoubleSpinBox, QGroupBox, QComboBox, QCheckBox, QMainWindow,
-                                 QRadioButton, QGridLayout, QVBoxLayout, QScrollArea, QMessageBox)
+                                 QRadioButton, QGridLayout, QVBoxLayout, QScrollArea, QMessageBox, QProgressBar)
     from PyQt5.QtGui import (QFont, QMouseEvent)
-    from matplotlib.backends.backend_qt5agg import (FigureCanvasQTAgg as FigureCanvas,
-                                                    NavigationToolbar2QT as NavigationToolbar)
+    from PyQt5.QtCore import QThreadPool
+    QTBACKEND = 'matplotlib.backends.backend_qt5agg'
 
 from RefractiveIndex import RefractiveIndex
 from PMC import PMC
 from JSI import JSI
+from ResultCache import setdiskdir
 from Filters import Filters
 from Constants import Constants
 from QTreimps import QHoverPushButton
+from QTjobs import Job
 import numpy as np
 import scipy
 # from pylab import *
-import matplotlib.pyplot as plt
-import matplotlib
 import datetime
+import importlib
+import threading
 
 from colorsys import hls_to_rgb
-matplotlib.use('Qt5Agg')
+
+# matplotlib is imported with the first plot (importplotting), numba and the scipy submodules are
+# loaded in the background once the window is up (preloadmodules), so that the GUI starts quickly.
+# with the 'JIT warm-up' setting, the refractive index kernels of the selected models are compiled
+# (or loaded from numba's cache) there as well
+plt = matplotlib = FigureCanvas = NavigationToolbar = None
+
+def importplotting():
+    global plt, matplotlib, FigureCanvas, NavigationToolbar
+    if plt is None:
+        import matplotlib
+        matplotlib.use('Qt5Agg')
+        backend = importlib.import_module(QTBACKEND)
+        FigureCanvas, NavigationToolbar = backend.FigureCanvasQTAgg, backend.NavigationToolbar2QT
+        import matplotlib.pyplot as plt
+
+def preloadmodules(idxfuncs=()):
+    for module in ['numba', 'scipy.optimize', 'scipy.interpolate', 'scipy.integrate', 'matplotlib']:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    RefractiveIndex.warmup(idxfuncs)
+
 # noinspection PyAttributeOutsideInit
 class GUI(QMainWindow):
     def __init__(self, config, parent=None):
@@ -42,12 +63,23 @@ class GUI(QMainWindow):
         self.plotwindowcount = 0
         self.pltwindowlist = []
 
+        # calculations run as background jobs (see startjob), one after another: the calculations
+        # are parallelized internally. jobs: queued and running jobs
+        self.jobpool = QThreadPool()
+        self.jobpool.setMaxThreadCount(1)
+        self.jobs = []
+
         self.mainWidget = QWidget(self)
         self.setCentralWidget(self.mainWidget)
 
         self.config = config
 
         self.initUI()
+        warmupfuncs = []
+        if self.JITwarmup:
+            warmupfuncs = [RefractiveIndex().getSingleIDX(self.CrystalMaterial, pol, paper)
+                           for pol, paper in [("X", self.CrystalNX), ("Y", self.CrystalNY), ("Z", self.CrystalNZ)]]
+        threading.Thread(target=preloadmodules, args=(warmupfuncs,), daemon=True).start()
 
         self.HighlightedSpinBox = "QSpinBox { background-color: alternate-background-color; }"
         self.HighlightedDoubleSpinBox = "QDoubleSpinBox { background-color: alternate-background-color; }"
@@ -105,6 +137,16 @@ class GUI(QMainWindow):
 
         self.centralWidget().setLayout(self.ui_layout)
 
+        # status bar: progress of the running job, cancel button for all jobs
+        self.ui_JobLabel = QLabel('')
+        self.ui_JobProgressBar = QProgressBar()
+        self.ui_JobProgressBar.setMaximumWidth(300)
+        self.ui_JobCancelBtn = QPushButton('Cancel')
+        self.ui_JobCancelBtn.setEnabled(False)
+        self.statusBar().addWidget(self.ui_JobLabel)
+        self.statusBar().addPermanentWidget(self.ui_JobProgressBar)
+        self.statusBar().addPermanentWidget(self.ui_JobCancelBtn)
+
         self.setProperties()
 
         self.initConnections()
@@ -729,7 +771,12 @@ class GUI(QMainWindow):
         self.ui_Tcp_vslp_Btn.setObjectName('Plot Tcp vs pump wavelength')
 
         self.ui_layoutTcpGroupBox.addWidget(self.ui_Tcp_vsPP_Btn, 1, 1)
+        self.ui_Tcp_map_Btn = QHoverPushButton()
+        self.ui_Tcp_map_Btn.setText('Plot map PP/λp')
+        self.ui_Tcp_map_Btn.setObjectName('Plot Tcp map')
+
         self.ui_layoutTcpGroupBox.addWidget(self.ui_Tcp_vslp_Btn, 2, 1)
+        self.ui_layoutTcpGroupBox.addWidget(self.ui_Tcp_map_Btn, 3, 1)
 
         self.ui_TcpGroupBox.setLayout(self.ui_layoutTcpGroupBox)
         self.ui_layoutTcp.addWidget(self.ui_TcpGroupBox)
@@ -737,88 +784,13 @@ class GUI(QMainWindow):
         return self.ui_layoutTcp
 
     def getProperties(self):
+        self.config.getProperties(self)
+        setdiskdir(self.ResultCacheDir)
         self.CrystalMaterials = RefractiveIndex().materialList
-        self.CrystalMaterial = self.CrystalMaterials[0]  # fallback
-
-        lastMaterial = self.config.get('Crystal Material')
-        if lastMaterial in self.CrystalMaterials:
-            self.CrystalMaterial == lastMaterial
         self.CurrentAvailableRefractiveIndices = RefractiveIndex().getAvailableRefractiveIndices(self.CrystalMaterial)
-
-        self.CrystalPolingPeriodFrom = self.config.get("Crystal Poling Period From")
-        self.CrystalPolingPeriodSingle = self.config.get("Crystal Poling Period Single")
-        self.CrystalPolingPeriodTo = self.config.get("Crystal Poling Period To")
-
-        lastNX = self.config.get("Crystal Refractive Index X")
-        if lastNX in self.CurrentAvailableRefractiveIndices[0]:
-            self.CrystalNX = lastNX
-        else:
-            self.CrystalNX = self.CurrentAvailableRefractiveIndices[0]
-        lastNY = self.config.get("Crystal Refractive Index Y")
-        if lastNY in self.CurrentAvailableRefractiveIndices[1]:
-            self.CrystalNY = lastNY
-        else:
-            self.CrystalNY = self.CurrentAvailableRefractiveIndices[1]
-        lastNZ = self.config.get("Crystal Refractive Index Z")
-        if lastNZ in self.CurrentAvailableRefractiveIndices[2]:
-            self.CrystalNZ = lastNZ
-        else:
-            self.CrystalNZ = self.CurrentAvailableRefractiveIndices[2]
-
         self.lastRefractiveIndex = [self.CrystalNX, self.CrystalNY, self.CrystalNZ]
-        self.PumpWlFrom = self.config.get("Pump wavelength from")
-        self.PumpWlSingle = self.config.get("Pump wavelength single")
-        self.PumpWlTo = self.config.get("Pump wavelength to")
-        self.SIWlFrom = self.config.get("SI wavelength from")
-        self.SIWlSingle = self.config.get("SI wavelength single")
-        self.SIWlTo = self.config.get("SI wavelength to")
-        self.PulsewidthFrom = self.config.get("Pump pulsewidth from")
-        self.PulsewidthSingle = self.config.get("Pump pulsewidth single")
-        self.PulsewidthTo = self.config.get("Pump pulsewidth to")
-        self.PumpCWbwFrom = self.config.get("Pump cw bandwidth from", 0)
-        self.PumpCWbwSingle = self.config.get("Pump cw bandwidth single", 0)
-        self.PumpCWbwTo = self.config.get("Pump cw bandwidth to", 0)
-        self.PumpShape = self.config.get("Pump pulse shape")
-        self.PumpShapeApplyDeconvolutionFactor = self.config.get("Pump pulsewidth apply deconvolution factor")
-        self.CrystalTempFrom = self.config.get("Crystal Temperature from")
-        self.CrystalTempSingle = self.config.get("Crystal Temperature single")
-        self.CrystalTempTo = self.config.get("Crystal Temperature to")
-        self.CrystalLengthFrom = self.config.get("Crystal Length from")
-        self.CrystalLengthSingle = self.config.get("Crystal Length single")
-        self.CrystalLengthTo = self.config.get("Crystal Length to")
-        self.QPMOrder = self.config.get("QPM Order")
-        self.JSIwlRange = self.config.get("JSI wavelength range")
-        self.JSIresolution = self.config.get("JSI resolution")
-
-        self.PurityWLresolution = self.config.get("Purity wavelength resolution")
-        self.PurityTauresolution = self.config.get("Purity tau resolution")
-        self.PurityWLrange = self.config.get("Purity wavelength range")
-
-        self.Focusing_enable = self.config.get("Enable Focusing")
-        self.Fibrecoupling_enable = self.config.get("Enable Fibre Coupling")
-        self.Focallength_pump = self.config.get("Focallength Pump")
-        self.Focallength_signal  = self.config.get("Focallength Signal")
-        self.Focallength_idler  = self.config.get("Focallength Idler")
-        self.Beamdiameter_pump  = self.config.get("Beamdiameter Pump")
-        self.Beamdiameter_signal  = self.config.get("Beamdiameter Signal")
-        self.Beamdiameter_idler  = self.config.get("Beamdiameter Idler")
-
-        self.SIfilterIdlerType = self.config.get("SI filter Idler Type")
-        self.SIfilterSignalType = self.config.get("SI filter Signal Type")
-        self.SIfilterIdlerCenterWL = self.config.get("SI filter Idler center wavelength")
-        self.SIfilterSignalCenterWL = self.config.get("SI filter Signal center wavelength")
-        self.SIfilterIdlerFWHM = self.config.get("SI filter Idler FWHM")
-        self.SIfilterSignalFWHM = self.config.get("SI filter Signal FWHM")
         self.SIfilterTypes = Filters().FilterList
 
-        self.HOMresolution = self.config.get('HOM interference plot resolution')
-        self.HOMdelayrange = self.config.get('HOM interference plot range')
-        self.HOMtemprange = self.config.get('HOM interference plot temperature range')
-        self.HOMphase = self.config.get('HOM interference plot phase')
-        
-        self.fwhmres = self.config.get('FWHM plot resolution')
-        self.fwhmprecision = self.config.get('FWHM decimal precision')
-        
     def setProperties(self):
         self.ui_CrystalPolingPeriodsingleSB.setValue(self.CrystalPolingPeriodSingle * 10 ** 6)
         self.ui_CrystalPolingPeriodfromSB.setValue(self.CrystalPolingPeriodFrom * 10 ** 6)
@@ -881,20 +853,21 @@ class GUI(QMainWindow):
     def initConnections(self):
         self.ui_PlotRefractiveIndex_Btn_Plot_T.pressed.connect(self.plot_RefIdx_vs_T)
         self.ui_PlotRefractiveIndex_Btn_Plot_wl.pressed.connect(self.plot_RefIdx_vs_wl)
-        self.ui_PlotPMCvsT_Btn.pressed.connect(self.plot_pmc_wl_vs_T)
-        self.ui_PlotPMCvsPP_Btn.pressed.connect(self.plot_pmc_wl_vs_PP)
-        self.ui_Purity_plotvsTau_Btn.pressed.connect(self.plot_purity_vs_tau)
+        self.ui_PlotPMCvsT_Btn.pressed.connect(self.startjob(self.plot_pmc_wl_vs_T))
+        self.ui_PlotPMCvsPP_Btn.pressed.connect(self.startjob(self.plot_pmc_wl_vs_PP))
+        self.ui_Purity_plotvsTau_Btn.pressed.connect(self.startjob(self.plot_purity_vs_tau))
         self.ui_Purity_plotvspwl_Btn.pressed.connect(self.plot_purity_vs_pwl)
-        self.ui_PlotJSI_plotBtn.pressed.connect(self.plot_jsi)
-        self.ui_PlotJSI_filterlossBtn.pressed.connect(self.estimate_filter_losses)
-        self.ui_Purity_plotvsTauandL_Btn.pressed.connect(self.plot_purity_vs_Tau_and_L)
-        self.ui_Purity_plotvsL_Btn.pressed.connect(self.plot_purity_vs_L)
+        self.ui_PlotJSI_plotBtn.pressed.connect(self.startjob(self.plot_jsi))
+        self.ui_PlotJSI_filterlossBtn.pressed.connect(self.startjob(self.estimate_filter_losses))
+        self.ui_Purity_plotvsTauandL_Btn.pressed.connect(self.startjob(self.plot_purity_vs_Tau_and_L))
+        self.ui_Purity_plotvsL_Btn.pressed.connect(self.startjob(self.plot_purity_vs_L))
         self.ui_GetEffPP_Btn.pressed.connect(self.GetEffectivePolingPeriod)
-        self.ui_Tcp_vslp_Btn.pressed.connect(self.plot_Tcp_vs_lp)
-        self.ui_Tcp_vsPP_Btn.pressed.connect(self.plot_Tcp_vs_PP)
-        self.ui_HOM_PlotVis_Btn.pressed.connect(self.plot_HOM_vis)
-        self.ui_HOM_PlotVisT_Btn.pressed.connect(self.plot_HOM_vis_temp)
-        self.ui_PlotFWHMvstau_Btn.pressed.connect(self.plot_FWHM_vs_tau)
+        self.ui_Tcp_vslp_Btn.pressed.connect(self.startjob(self.plot_Tcp_vs_lp))
+        self.ui_Tcp_map_Btn.pressed.connect(self.startjob(self.plot_Tcp_map))
+        self.ui_Tcp_vsPP_Btn.pressed.connect(self.startjob(self.plot_Tcp_vs_PP))
+        self.ui_HOM_PlotVis_Btn.pressed.connect(self.startjob(self.plot_HOM_vis))
+        self.ui_HOM_PlotVisT_Btn.pressed.connect(self.startjob(self.plot_HOM_vis_temp))
+        self.ui_PlotFWHMvstau_Btn.pressed.connect(self.startjob(self.plot_FWHM_vs_tau))
         self.ui_pumpShapeCorrectionFactorCheckBox.stateChanged.connect(self.getVarsFromGUI)
         
         self.ui_CrystalPolingPeriodsingleSB.valueChanged.connect(self.getVarsFromGUI)
@@ -949,6 +922,7 @@ class GUI(QMainWindow):
         self.ui_HOM_Vis_Resolution_SB.valueChanged.connect(self.getVarsFromGUI)
         self.ui_PlotFWHMresolution_SB.valueChanged.connect(self.getVarsFromGUI)
         self.ui_PlotFWHMprecision_SB.valueChanged.connect(self.getVarsFromGUI)
+        self.ui_JobCancelBtn.pressed.connect(self.canceljobs)
 
         self.ui_PlotPMCvsT_Btn.mouseentersignal.connect(self.MouseHoverEnter)
         self.ui_PlotRefractiveIndex_Btn_Plot_T.mouseentersignal.connect(self.MouseHoverEnter)
@@ -961,6 +935,7 @@ class GUI(QMainWindow):
         self.ui_Purity_plotvsL_Btn.mouseentersignal.connect(self.MouseHoverEnter)
         self.ui_Purity_plotvsTauandL_Btn.mouseentersignal.connect(self.MouseHoverEnter)
         self.ui_Tcp_vslp_Btn.mouseentersignal.connect(self.MouseHoverEnter)
+        self.ui_Tcp_map_Btn.mouseentersignal.connect(self.MouseHoverEnter)
         self.ui_Tcp_vsPP_Btn.mouseentersignal.connect(self.MouseHoverEnter)
         self.ui_HOM_PlotVis_Btn.mouseentersignal.connect(self.MouseHoverEnter)
         self.ui_PlotFWHMvstau_Btn.mouseentersignal.connect(self.MouseHoverEnter)
@@ -977,6 +952,7 @@ class GUI(QMainWindow):
         self.ui_Purity_plotvsL_Btn.mouseleavesignal.connect(self.MouseHoverLeave)
         self.ui_Purity_plotvsTauandL_Btn.mouseleavesignal.connect(self.MouseHoverLeave)
         self.ui_Tcp_vslp_Btn.mouseleavesignal.connect(self.MouseHoverLeave)
+        self.ui_Tcp_map_Btn.mouseleavesignal.connect(self.MouseHoverLeave)
         self.ui_Tcp_vsPP_Btn.mouseleavesignal.connect(self.MouseHoverLeave)
         self.ui_HOM_PlotVis_Btn.mouseleavesignal.connect(self.MouseHoverLeave)
         self.ui_PlotFWHMvstau_Btn.mouseleavesignal.connect(self.MouseHoverLeave)
@@ -1068,12 +1044,7 @@ class GUI(QMainWindow):
 
         # prepare plotting
         plotrange = np.arange(Tmin, Tmax, (Tmax - Tmin) / 250)
-        if PROFILE:
-            profile = cProfile.Profile()
-            profile.runcall(PMC().getSI_wl_varT, lp, PP, plotrange, refidxfunc, m)
-            ps = pstats.Stats(profile)
-            ps.strip_dirs().sort_stats('tottime').print_stats(10)
-        [siwl, idwl, Tcp] = PMC().getSI_wl_varT(lp, PP, plotrange, refidxfunc, m)
+        [siwl, idwl, Tcp] = yield lambda jsi: PMC().getSI_wl_varT(lp, PP, plotrange, refidxfunc, m)
         # plot
         # init plot window
         pltwndidx = self.plotwindowcount
@@ -1106,7 +1077,7 @@ class GUI(QMainWindow):
         # prepare plotting
         plotrange = np.arange(PPmin, PPmax, (PPmax - PPmin) / 250)
 
-        [siwl, idwl, PPcp] = PMC().getSI_wl_varPP(lp, plotrange, T, refidxfunc, m)
+        [siwl, idwl, PPcp] = yield lambda jsi: PMC().getSI_wl_varPP(lp, plotrange, T, refidxfunc, m)
 
         # plot
         # init plot window
@@ -1160,12 +1131,12 @@ class GUI(QMainWindow):
 
         Tvec = np.arange(T, T + 1, 2)
 
-        [ls, li, unused] = PMC().getSI_wl_varT(pwl, PP, Tvec, refidxfunc, m)
+        [ls, li] = PMC().getSI_wl(pwl, PP, Tvec, refidxfunc, m)
 
         signalrange = np.linspace(ls - wlrange / 2, ls + wlrange / 2, wlpts)
         idlerrange = np.linspace(li - wlrange / 2, li + wlrange / 2, wlpts)
 
-        [purity, max, maxtau] = JSI().getpurity_vsTau(pwl, signalrange, idlerrange, taurange, T,
+        [purity, max, maxtau] = yield lambda jsi: jsi.getpurity_vsTau(pwl, signalrange, idlerrange, taurange, T,
                                                       PP, L, refidxfunc, m, spectralfilters, pumpshape)
 
         AnnotateString = ''
@@ -1240,12 +1211,12 @@ class GUI(QMainWindow):
 
         Tvec = np.arange(T, T + 1, 2)
 
-        [ls, li, unused] = PMC().getSI_wl_varT(pwl, PP, Tvec, refidxfunc, m)
+        [ls, li] = PMC().getSI_wl(pwl, PP, Tvec, refidxfunc, m)
 
         signalrange = np.linspace(ls - wlrange / 2, ls + wlrange / 2, wlpts)
         idlerrange = np.linspace(li - wlrange / 2, li + wlrange / 2, wlpts)
 
-        [purity, max, maxL] = JSI().getpurity_vsL(pwl, signalrange, idlerrange, tau, T,
+        [purity, max, maxL] = yield lambda jsi: jsi.getpurity_vsL(pwl, signalrange, idlerrange, tau, T,
                                                   PP, Lrange, refidxfunc, m, spectralfilters, pumpshape,pumpcwbw)
 
         AnnotateString = ''
@@ -1318,12 +1289,12 @@ class GUI(QMainWindow):
 
         Tvec = np.arange(T, T + 1, 2)
 
-        [ls, li, unused] = PMC().getSI_wl_varT(pwl, PP, Tvec, refidxfunc, m)
+        [ls, li] = PMC().getSI_wl(pwl, PP, Tvec, refidxfunc, m)
 
         signalrange = np.linspace(ls - wlrange / 2, ls + wlrange / 2, wlpts)
         idlerrange = np.linspace(li - wlrange / 2, li + wlrange / 2, wlpts)
 
-        purity = JSI().getpurity_vsLandTau(pwl, signalrange, idlerrange, Taurange, T,
+        purity = yield lambda jsi: jsi.getpurity_vsLandTau(pwl, signalrange, idlerrange, Taurange, T,
                                            PP, Lrange, refidxfunc, m, spectralfilters, pumpshape)
 
         AnnotateString = ''
@@ -1339,6 +1310,7 @@ class GUI(QMainWindow):
         AnnotateString = AnnotateString + FilterString
 
         # plot
+        importplotting()
         colormap = matplotlib.cm.jet
         xmin = np.min(Taurange) * 10 ** 12  # *taucfsech
         xmax = np.max(Taurange) * 10 ** 12  # *taucfsech
@@ -1420,18 +1392,12 @@ class GUI(QMainWindow):
 
         Tvec=np.arange(T,T+1,2)
 
-        [ls, li, unused] = PMC().getSI_wl_varT(pwl, PP, Tvec, refidxfunc, m)
+        [ls, li] = PMC().getSI_wl(pwl, PP, Tvec, refidxfunc, m)
 
         signalrange = np.linspace(ls - wlrange/2, ls + wlrange/2, numpts)
         idlerrange = np.linspace(li - wlrange/2, li + wlrange/2, numpts)
 
-        if PROFILE:
-            profile = cProfile.Profile()
-            profile.runcall(JSI().getplots, pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
-                                      m, spectralfilters, plotJSI, pumpshape, pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler)
-            ps = pstats.Stats(profile)
-            ps.strip_dirs().sort_stats('tottime').print_stats(10)
-        [PE, PM, JS] = JSI().getplots(pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
+        [PE, PM, JS] = yield lambda jsi: jsi.getplots(pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
                                       m, spectralfilters, plotJSI, pumpshape, pumpcwbw, focusing_enable,fibre_coupling_enable,focallength_pump,focallength_signal,focallength_idler,beamdiameter_pump,beamdiameter_signal,beamdiameter_idler)
 
         #
@@ -1570,7 +1536,7 @@ class GUI(QMainWindow):
 
         Tvec=np.arange(T,T+1,2)
 
-        [ls, li, unused] = PMC().getSI_wl_varT(pwl, PP, Tvec, refidxfunc, m)
+        [ls, li] = PMC().getSI_wl(pwl, PP, Tvec, refidxfunc, m)
         print('***debug***: ls: ', ls)
         print('***debug***: li: ', li)
 
@@ -1581,13 +1547,13 @@ class GUI(QMainWindow):
         print('***debug***: min(idlerrange):  ', np.min(idlerrange))
         print('***debug***: max(idlerrange):  ', np.max(idlerrange))
 
-        [PE, PM, JS] = JSI().getplots(pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
+        [PE, PM, JS] = yield lambda jsi: jsi.getplots(pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
                                       m, spectralfilters, plotJSI, pumpshape,pumpcwbw)
-        [PEwoSL, PMwoSL, JSwoSL] = JSI().getplots(pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
+        [PEwoSL, PMwoSL, JSwoSL] = yield lambda jsi: jsi.getplots(pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
                                       m, spectralfilters, plotJSI, pumpshape,pumpcwbw)
-        [PEref,PMref,JSref] = JSI().getplots(pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
+        [PEref,PMref,JSref] = yield lambda jsi: jsi.getplots(pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
                                       m, spectralfiltersref, plotJSI, pumpshape,pumpcwbw)
-        [PEwoSLref,PMwoSLref,JSwoSLref] = JSI().getplots(pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
+        [PEwoSLref,PMwoSLref,JSwoSLref] = yield lambda jsi: jsi.getplots(pwl, signalrange, idlerrange, tau, T, PP, L, refidxfunc,
                                       m, spectralfiltersref, plotJSI, pumpshape,pumpcwbw)
         
         #Sidelobeless JSI
@@ -1774,7 +1740,7 @@ class GUI(QMainWindow):
         nyfunc = RefractiveIndex().getSingleIDX(self.CrystalMaterial, "Y", self.CrystalNY)
         nzfunc = RefractiveIndex().getSingleIDX(self.CrystalMaterial, "Z", self.CrystalNZ)
         refidxfunc = [nxfunc, nyfunc, nzfunc]
-        Tcp = JSI().getTcpVsPP(PPrange, temp, pwl, refidxfunc, qpmorder)
+        Tcp = yield lambda jsi: jsi.getTcpVsPP(PPrange, temp, pwl, refidxfunc, qpmorder)
 
         # plot
         # init plot window
@@ -1802,7 +1768,7 @@ class GUI(QMainWindow):
         nyfunc = RefractiveIndex().getSingleIDX(self.CrystalMaterial, "Y", self.CrystalNY)
         nzfunc = RefractiveIndex().getSingleIDX(self.CrystalMaterial, "Z", self.CrystalNZ)
         refidxfunc = [nxfunc, nyfunc, nzfunc]
-        Tcp = JSI().getTcpVslp(pwlrange, temp, polingp, refidxfunc, qpmorder)
+        Tcp = yield lambda jsi: jsi.getTcpVslp(pwlrange, temp, polingp, refidxfunc, qpmorder)
 
         # plot
         # init plot window
@@ -1820,6 +1786,43 @@ class GUI(QMainWindow):
         pltwnd.ax.legend()
         pltwnd.canvas.draw()
 
+    def plot_Tcp_map(self):
+        numpts = 200
+        PPrange = np.linspace(self.CrystalPolingPeriodFrom, self.CrystalPolingPeriodTo, numpts)
+        pwlrange = np.linspace(self.PumpWlFrom, self.PumpWlTo, numpts)
+        temp = self.CrystalTempSingle
+        qpmorder = self.QPMOrder
+        nxfunc = RefractiveIndex().getSingleIDX(self.CrystalMaterial, "X", self.CrystalNX)
+        nyfunc = RefractiveIndex().getSingleIDX(self.CrystalMaterial, "Y", self.CrystalNY)
+        nzfunc = RefractiveIndex().getSingleIDX(self.CrystalMaterial, "Z", self.CrystalNZ)
+        refidxfunc = [nxfunc, nyfunc, nzfunc]
+        Tcp = yield lambda jsi: jsi.getTcpMap(PPrange, pwlrange, temp, refidxfunc, qpmorder)
+
+        # plot
+        importplotting()
+        colormap = matplotlib.cm.jet
+        xmin = np.min(PPrange) * 10 ** 6
+        xmax = np.max(PPrange) * 10 ** 6
+        ymin = np.min(pwlrange) * 10 ** 9
+        ymax = np.max(pwlrange) * 10 ** 9
+
+        # init plot window
+        pltwndidx = self.plotwindowcount
+        self.open_new_plot_window()
+        pltwnd = self.pltwindowlist[pltwndidx]
+        pltwnd.ax.grid('off')
+        plot = pltwnd.ax.imshow(Tcp, cmap=colormap, vmin=np.nanmin(Tcp), vmax=np.nanmax(Tcp), aspect='auto',
+                                origin='lower', interpolation='none', extent=[xmin, xmax, ymin, ymax])
+        pltwnd.ax.set_xlabel('Poling period [µm]')
+        pltwnd.ax.set_ylabel('Pump wavelength [nm]')
+        pltwnd.ax.set_title('Crossing point temperature')
+
+        pltwnd.fig.subplots_adjust(bottom=0.2)
+        pltwnd.cbar_ax = pltwnd.fig.add_axes([0.05, 0.1, 0.9, 0.025])
+        pltwnd.cbar = pltwnd.fig.colorbar(plot, cax=pltwnd.cbar_ax, orientation='horizontal')
+        pltwnd.cbar.set_label('Crossing point temperature [°C]', fontsize='medium', labelpad=-1)
+        pltwnd.canvas.draw()
+
     def plot_HOM_vis(self):
         pwl = self.PumpWlSingle
         T = self.CrystalTempSingle
@@ -1853,17 +1856,11 @@ class GUI(QMainWindow):
         refidxfunc = [nxfunc, nyfunc, nzfunc]
 
         Tvec = np.arange(T, T + 1, 2)
-        [ls, li, unused] = PMC().getSI_wl_varT(pwl, PP, Tvec, refidxfunc, m)
+        [ls, li] = PMC().getSI_wl(pwl, PP, Tvec, refidxfunc, m)
         signalrange = np.linspace(ls - JSIwlrange / 2, ls + JSIwlrange / 2, JSIresolution)
         idlerrange = np.linspace(li - JSIwlrange / 2, li + JSIwlrange / 2, JSIresolution)
 
-        if PROFILE:
-            profile = cProfile.Profile()
-            profile.runcall(JSI().getHOMinterference, pwl, T, PP, m, tau, cl, signalrange, idlerrange,
-                                             JSIresolution, pumpshape, delayrange, homphase, refidxfunc, spectralfilters, pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler)
-            ps = pstats.Stats(profile)
-            ps.strip_dirs().sort_stats('tottime').print_stats(10)
-        [CoincProb,vis,fwhm] = JSI().getHOMinterference(pwl, T, PP, m, tau, cl, signalrange, idlerrange,
+        [CoincProb,vis,fwhm] = yield lambda jsi: jsi.getHOMinterference(pwl, T, PP, m, tau, cl, signalrange, idlerrange,
                                              JSIresolution, pumpshape, delayrange, homphase, refidxfunc, spectralfilters, pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler )
 
         datestr=datetime.datetime.strftime(datetime.datetime.now(), format='%Y%m%d_%H%M%S')
@@ -1914,7 +1911,7 @@ class GUI(QMainWindow):
         refidxfunc = [nxfunc, nyfunc, nzfunc]
 
         plotrange = np.arange(Tmin, Tmax, (Tmax - Tmin) / 250)
-        [siwl, idwl, Tcp] = PMC().getSI_wl_varT(pwl, PP, plotrange, refidxfunc, m)
+        [siwl, idwl, Tcp] = yield lambda jsi: PMC().getSI_wl_varT(pwl, PP, plotrange, refidxfunc, m)
         # /calculate crossing point temperature
 
         temprange = np.linspace(Tcp-self.HOMtemprange/2, Tcp+self.HOMtemprange/2, self.HOMresolution)
@@ -1927,17 +1924,11 @@ class GUI(QMainWindow):
         spectralfilters = [ffs, ffi]
 
         Tvec = np.arange(T, T + 1, 2)
-        [ls, li, unused] = PMC().getSI_wl_varT(pwl, PP, Tvec, refidxfunc, m)
+        [ls, li] = PMC().getSI_wl(pwl, PP, Tvec, refidxfunc, m)
         signalrange = np.linspace(ls - JSIwlrange / 2, ls + JSIwlrange / 2, JSIresolution)
         idlerrange = np.linspace(li - JSIwlrange / 2, li + JSIwlrange / 2, JSIresolution)
 
-        if PROFILE:
-            profile = cProfile.Profile()
-            profile.runcall(JSI().getHOMinterferenceT, pwl, PP, m, tau, cl, signalrange, idlerrange,
-                                             JSIresolution, pumpshape, temprange, homphase, refidxfunc, spectralfilters, pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler)
-            ps = pstats.Stats(profile)
-            ps.strip_dirs().sort_stats('tottime').print_stats(10)
-        [CoincProb,vis,fwhm] = JSI().getHOMinterferenceT(pwl, PP, m, tau, cl, signalrange, idlerrange,
+        [CoincProb,vis,fwhm] = yield lambda jsi: jsi.getHOMinterferenceT(pwl, PP, m, tau, cl, signalrange, idlerrange,
                                              JSIresolution, pumpshape, temprange, homphase, refidxfunc, spectralfilters, pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler)
 
         datestr=datetime.datetime.strftime(datetime.datetime.now(), format='%Y%m%d_%H%M%S')
@@ -1985,8 +1976,7 @@ class GUI(QMainWindow):
         Tvec = np.arange(T, T + 1, 2)
         ls=0
         li=0
-        unused=0
-        [ls, li, unused] = PMC().getSI_wl_varT(pwl, PP, Tvec, refidxfunc, m)
+        [ls, li] = PMC().getSI_wl(pwl, PP, Tvec, refidxfunc, m)
         signalrange = np.linspace(ls - JSIwlrange / 2, ls + JSIwlrange / 2, JSIresolution)
         idlerrange = np.linspace(li - JSIwlrange / 2, li + JSIwlrange / 2, JSIresolution)
         
@@ -1994,7 +1984,7 @@ class GUI(QMainWindow):
 
         sigfwhm=[]
         idfwhm=[]
-        [sigfwhm, idfwhm] = JSI().getFWHMvstau(pwl, signalrange, idlerrange, T, PP, m, cl, taurange, refidxfunc, spectralfilters, JSIresolution, pumpshape, decprec, usetaucf)
+        [sigfwhm, idfwhm] = yield lambda jsi: jsi.getFWHMvstau(pwl, signalrange, idlerrange, T, PP, m, cl, taurange, refidxfunc, spectralfilters, JSIresolution, pumpshape, decprec, usetaucf)
         
         
         # plot
@@ -2175,6 +2165,60 @@ class GUI(QMainWindow):
         g = GUI()
         sys.exit(app.exec_())
 
+    # slot that runs a calculation slot as background jobs. calculation slots are generators: they
+    # read their parameters from the GUI, yield each calculation as a function of a JSI instance,
+    # receive its result and plot. everything but the calculations runs in the GUI thread
+    def startjob(self, slot):
+        def start():
+            self.resumejob(slot.__name__, slot(), None)
+        return start
+
+    def resumejob(self, name, runner, result):
+        try:
+            compute = runner.send(result)
+        except StopIteration:
+            return
+        job = Job(compute, name, self.ProfileJobs)
+        job.signals.progress.connect(self.jobprogress)
+        job.signals.finished.connect(lambda result: self.jobfinished(job, runner, result))
+        job.signals.failed.connect(lambda message: self.jobfailed(job, message))
+        job.signals.cancelled.connect(lambda: self.jobdone(job))
+        self.jobs.append(job)
+        self.jobpool.start(job)
+        self.updatejobstatus()
+
+    def jobprogress(self, done, total):
+        self.ui_JobProgressBar.setMaximum(total)
+        self.ui_JobProgressBar.setValue(done)
+
+    def jobfinished(self, job, runner, result):
+        self.jobdone(job)
+        self.resumejob(job.name, runner, result)
+
+    def jobdone(self, job):
+        self.jobs.remove(job)
+        self.updatejobstatus()
+
+    def jobfailed(self, job, message):
+        self.jobdone(job)
+        msgbox = QMessageBox()
+        msgbox.setText('Error in {0:s}: {1:s}'.format(job.name, message))
+        msgbox.exec()
+
+    def canceljobs(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def updatejobstatus(self):
+        self.ui_JobProgressBar.reset()
+        self.ui_JobCancelBtn.setEnabled(len(self.jobs) > 0)
+        if self.jobs:
+            self.ui_JobLabel.setText('Running {0:s} ({1:d} queued)'.format(self.jobs[0].name, len(self.jobs) - 1))
+            # busy indicator until the first progress report
+            self.ui_JobProgressBar.setMaximum(0)
+        else:
+            self.ui_JobLabel.setText('')
+
     def open_new_plot_window(self):
         print(self.plotwindowcount)
         self.pltwindowlist.append(PlotWindow())
@@ -2342,6 +2386,17 @@ class GUI(QMainWindow):
             self.ui_CrystalNXComboBox.setStyleSheet(self.HighlightedComboBox)
             self.ui_CrystalNYComboBox.setStyleSheet(self.HighlightedComboBox)
             self.ui_CrystalNZComboBox.setStyleSheet(self.HighlightedComboBox)
+        elif str == 'Plot Tcp map':
+            self.ui_CrystalPolingPeriodfromSB.setStyleSheet(self.HighlightedDoubleSpinBox)
+            self.ui_CrystalPolingPeriodtoSB.setStyleSheet(self.HighlightedDoubleSpinBox)
+            self.ui_CrystalTsingleSB.setStyleSheet(self.HighlightedDoubleSpinBox)
+            self.ui_pumpwlfromSB.setStyleSheet(self.HighlightedDoubleSpinBox)
+            self.ui_pumpwltoSB.setStyleSheet(self.HighlightedDoubleSpinBox)
+            self.ui_PlotPMCSBQPMorder.setStyleSheet(self.HighlightedSpinBox)
+            self.ui_CrystalMaterialComboBox.setStyleSheet(self.HighlightedComboBox)
+            self.ui_CrystalNXComboBox.setStyleSheet(self.HighlightedComboBox)
+            self.ui_CrystalNYComboBox.setStyleSheet(self.HighlightedComboBox)
+            self.ui_CrystalNZComboBox.setStyleSheet(self.HighlightedComboBox)
         elif str == 'Plot HOM Visibility':
             self.ui_pumpwlsingleSB.setStyleSheet(self.HighlightedDoubleSpinBox)
             self.ui_CrystalTsingleSB.setStyleSheet(self.HighlightedDoubleSpinBox)
@@ -2461,6 +2516,7 @@ class PlotWindow(QWidget):
         # self.layout = QGridLayout()
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
+        importplotting()
         self.fig = plt.figure(facecolor="white", figsize=(8.75 * 1.2, 5 * 1.2))
         self.ax = self.fig.add_subplot(111)
         self.ax.grid()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import functools
+import inspect
+import numbers
+import os
+import numpy as np
+import ruamel.yaml as yaml
+
+
+# on disk store of the grids of one JSA/JSI calculation (see JSI.storeplots). A store is a directory with
+#   signal.npy, idler.npy: wavelength axes of the grid columns and rows
+#   PE.npy, PM.npy, JS.npy: pump envelope, phase matching and joint spectral grids (rows: idler)
+#   metadata.yaml: the physical parameters the grids were computed with
+# a store opened for writing is a tile consumer of JSI.getplots, the grids are written block by block
+# into memory mapped .npy files. Opened for reading, the grids are read only memory maps that are
+# loaded lazily, and purity, marginals and filter losses are computed in row blocks of about blockbytes
+class JSAStore:
+    quantities = ['PE', 'PM', 'JS']
+
+    def __init__(self, path, mode='r', blockbytes=2 ** 28):
+        self.path = path
+        self.mode = mode
+        self.blockbytes = blockbytes
+        self.arrays = {}
+        if mode == 'w':
+            os.makedirs(path, exist_ok=True)
+            self.metadata = {}
+        else:
+            with open(os.path.join(path, 'metadata.yaml')) as stream:
+                self.metadata = yaml.YAML(typ='safe', pure=True).load(stream)
+            self.gridshape = tuple(self.metadata['gridshape'])
+
+    # grid of a quantity ('PE', 'PM' or 'JS') or axis ('signal', 'idler'), memory mapped
+    def __getitem__(self, name):
+        if name not in self.arrays:
+            self.arrays[name] = np.load(os.path.join(self.path, name + '.npy'), mmap_mode='r')
+        return self.arrays[name]
+
+    @property
+    def signal(self):
+        return self['signal']
+
+    @property
+    def idler(self):
+        return self['idler']
+
+    # writing: axes first, then the grid blocks (consume), then the metadata (result)
+    def setaxes(self, signalrange, idlerrange):
+        np.save(os.path.join(self.path, 'signal.npy'), np.asarray(signalrange, dtype=float))
+        np.save(os.path.join(self.path, 'idler.npy'), np.asarray(idlerrange, dtype=float))
+        self.gridshape = (len(idlerrange), len(signalrange))
+
+    def consume(self, rows, PE, PM, JS):
+        for name, a in zip(self.quantities, (PE, PM, JS)):
+            a = np.broadcast_to(a, JS.shape)
+            if name not in self.arrays:
+                self.arrays[name] = np.lib.format.open_memmap(os.path.join(self.path, name + '.npy'), mode='w+',
+                                                              dtype=a.dtype, shape=self.gridshape)
+            self.arrays[name][rows] = a
+
+    def result(self):
+        for a in self.arrays.values():
+            a.flush()
+        return self
+
+    def setmetadata(self, metadata):
+        self.metadata = dict(metadata)
+        self.metadata['gridshape'] = list(self.gridshape)
+        self.metadata['dtypes'] = {name: self.arrays[name].dtype.str for name in self.arrays}
+        with open(os.path.join(self.path, 'metadata.yaml'), 'w') as stream:
+            yaml.YAML(typ='safe', pure=True).dump(self.metadata, stream)
+
+    # reading: (rows, block) of a grid in blocks of about blockbytes
+    def blocks(self, name='JS'):
+        a = self[name]
+        step = max(1, int(self.blockbytes // max(1, a.shape[1] * a.itemsize)))
+        for r0 in range(0, a.shape[0], step):
+            rows = slice(r0, min(r0 + step, a.shape[0]))
+            yield rows, np.asarray(a[rows])
+
+    # joint spectral intensity of a JS block (the grids hold amplitudes unless plotJSI was set)
+    def intensity(self, block):
+        return np.real(block) if self.metadata.get('plotJSI') else np.abs(block) ** 2
+
+    # norm, signal marginal (sum over the idler), idler marginal (sum over the signal) of the JSI
+    def marginals(self):
+        signal = np.zeros(self.gridshape[1])
+        idler = np.zeros(self.gridshape[0])
+        for rows, block in self.blocks('JS'):
+            jsi = self.intensity(block)
+            signal += np.sum(jsi, axis=0)
+            idler[rows] = np.sum(jsi, axis=1)
+        return [np.sum(idler), signal, idler]
+
+    # purity Tr[G^2] / Tr[G]^2 of the gram matrix G = JSA^dagger JSA (see JSI.purity_gram)
+    def purity(self):
+        if self.metadata.get('plotJSI'):
+            raise ValueError('The purity needs the joint spectral amplitude, this store holds the JSI')
+        gram = 0
+        for rows, block in self.blocks('JS'):
+            gram = gram + block.conj().T @ block
+        tr = np.real(np.trace(gram))
+        return np.sum(np.abs(gram) ** 2) / tr ** 2
+
+    # fraction of the JSI lost in the filters [signal filter function, idler filter function]
+    # (functions of the wavelength as returned by Filters.getFilterFunction, None: no filter)
+    def filterloss(self, filterfuncs):
+        fs = np.array([1.0 if filterfuncs[0] is None else filterfuncs[0](wl) for wl in self.signal])
+        fi = np.array([1.0 if filterfuncs[1] is None else filterfuncs[1](wl) for wl in self.idler])
+        total = 0.0
+        filtered = 0.0
+        for rows, block in self.blocks('JS'):
+            jsi = self.intensity(block)
+            total += np.sum(jsi)
+            filtered += np.sum(jsi * fi[rows, None] * fs[None, :])
+        return 1 - filtered / total
+
+
+# description of a refractive index or filter function for the metadata: the (qualified) function name
+# and the numbers it was built from (filter center and width, table range, sellmeier coefficients, ...)
+def describefunction(func):
+    if func is None:
+        return None
+    if hasattr(func, 'idxfunc'):
+        return {'function': 'TabulatedIndex', 'idxfunc': describefunction(func.idxfunc),
+                'wlmin': float(func.wlmin), 'wlmax': float(func.wlmax), 'tol': float(func.tol)}
+    if hasattr(func, 'sellmeier'):
+        name, sellmeier, thermal, tref, lowest = func.cachekey()
+        return {'function': 'SellmeierIndex', 'name': str(name), 'sellmeier': sellmeier.tolist(),
+                'thermal': thermal.tolist(), 'tref': float(tref), 'lowest': int(lowest)}
+    if isinstance(func, functools.partial):
+        description = describefunction(func.func)
+        for name, value in func.keywords.items():
+            if isinstance(value, numbers.Number):
+                description[name] = float(value)
+        return description
+    description = {'function': getattr(func, '__qualname__', type(func).__name__)}
+    if inspect.isfunction(func):
+        for name, value in inspect.getclosurevars(func).nonlocals.items():
+            if isinstance(value, numbers.Number):
+                description[name] = float(value)
+    return description
@@ -1,18 +1,51 @@
 #!/usr/bin/env python3
 
-import cProfile
-import numba
 import os
 
-import concurrent.futures
-import multiprocessing as mp
 import numpy as np
+# scipy submodules (scipy.optimize, ...) are loaded on first use, as are numba (see LazyNumba), the
+# process/thread pools and shared memory (SharedBuffers) and the JSA store (JSAStore, with its yaml
+# metadata), which are imported in the functions that use them
 import scipy
-import scipy.optimize
-import scipy.interpolate
-import scipy.integrate
 from datetime import datetime
 from Constants import Constants
+from RefractiveIndex import RefractiveIndex
+from ResultCache import cachedresult
+from LazyNumba import njit
+
+
+# pump envelope amplitude and phase matching amplitude at a single grid point.
+# the pump envelope is a function of x = peascale * (1/ls + 1/li - 1/lp):
+# peashape 0: exp(-x^2) (gaussian, cw), 1: sech(x), 2: sin(x)/x
+@njit(cache=True)
+def pepma_numba(ls, li, npump, ns, ni, invlp, peashape, peascale, pc, cl):
+    invlpp = 1 / ls + 1 / li
+    x = peascale * (invlpp - invlp)
+    if peashape == 0:
+        pe = np.exp(-x * x)
+    elif peashape == 1:
+        pe = 1 / np.cosh(x)
+    else:
+        pe = np.sin(x) / x if x != 0 else 1.0
+    dk = 2 * np.pi * (npump * invlpp - ns / ls - ni / li - pc)
+    arg = cl * dk / 2
+    sinc = np.sin(arg) / arg if arg != 0 else 1.0
+    pm = cl * sinc * (np.cos(arg) + 1j * np.sin(arg))
+    return pe, pm
+
+
+# worker processes of the 'processes' sweep executor (see JSI.mapsweep): the JSI instance and the shared
+# input arrays are handed over once per worker, tasks only carry the names and values to work on
+sweepworkerstate = {}
+
+def sweepworkerinit(jsi, specs):
+    from SharedBuffers import SharedArrays
+    sweepworkerstate['jsi'] = jsi
+    sweepworkerstate['shared'] = SharedArrays.attach(specs)
+
+def sweepworkertask(taskname, values, args):
+    return getattr(sweepworkerstate['jsi'], taskname)(sweepworkerstate['shared'].arrays, values, *args)
+
 
 class JSI:
     def __init__(self):
@@ -63,6 +96,56 @@ class JSI:
         # Use an odd value for Simpson integration.
         self.spatial_z_points = 129
 
+        # purity engine (see purity): 'auto', 'svd', 'gram' or 'randomized'.
+        # randomized purities are accurate to puritytol (absolute)
+        self.puritymethod = 'auto'
+        self.puritytol = 10 ** (-6)
+
+        # HOM trace over the delay axis: 'fft' (see homtrace_fft) or 'direct' (one grid sum per delay)
+        self.homengine = 'fft'
+
+        # executor of the per-delay ('direct' engine) and per-temperature HOM loops: 'threads',
+        # 'processes' (inputs shipped to the workers once through shared memory, see mapsweep) or
+        # 'numba' (prange kernels). homworkers: number of workers, None for one per core
+        self.homexecutor = 'threads'
+        self.homworkers = None
+
+        # executor of the purity-vs-tau stacks and the FWHM-vs-tau sweep: 'threads' or 'processes'
+        # (see mapsweep). sweepworkers: number of workers, None for one per core
+        self.sweepexecutor = 'threads'
+        self.sweepworkers = None
+
+        # low rank mode: purity and HOM routines work on factorized JSAs (see JSAfactors)
+        # instead of the full signal/idler grid
+        self.lowrank = False
+        self.lowranktol = 10 ** (-6)
+        self.lowrankmaxrank = 256
+
+        # physical constants and pump shape factors, resolved once
+        self.const = Constants().resolved()
+
+        # Compute PEA, PMA and JSA with fused numba kernels on separable (sparse meshgrid) inputs.
+        # The pump refractive index is evaluated in blocks of about fusedblocksize grid points.
+        self.fused = True
+        self.fusedblocksize = 2 ** 20
+
+        # tiled evaluation (getplots with consumers): the grid is computed in blocks of idler rows of
+        # about tilebytes each, counting tilebytesperpoint bytes per grid point for PE, PM, JS and
+        # the temporaries of the unfused functions
+        self.tilebytes = 2 ** 28
+        self.tilebytesperpoint = 128
+
+        # results of getplots, the purity and the HOM routines are cached (see ResultCache), keyed on
+        # their arguments and on these attributes
+        self.usecache = True
+        self.cacheattributes = ['TXCa', 'TXCb', 'TXrefT', 'useabs', 'usetaucf', 'walkoff_enable', 'spatial_z_points',
+                                'puritymethod', 'puritytol', 'homengine', 'lowrank', 'lowranktol', 'lowrankmaxrank',
+                                'fused', 'const']
+
+        # progress callback(done, total), called from the sweep, tile and parameter loops (e.g. by a GUI
+        # job). the calculation is cancelled by raising an exception from the callback
+        self.progress = None
+
     def calculate_focused_waists(self, lp, ls, li):
         """
         Calculate the focused beam waists at the crystal.
@@ -90,8 +173,8 @@ class JSI:
 
         Returns angle in radians.
         """
-        ny = self.ny(wavelength, T)
-        nz = self.nz(wavelength, T)
+        ny = self.gridIDX(self.ny, wavelength, T)
+        nz = self.gridIDX(self.nz, wavelength, T)
         # Walk-off for e-ray in biaxial crystal (propagation along x, z-polarized)
         rho = 0.5 * (1.0 / ny**2 - 1.0 / nz**2) * nz
         return rho
@@ -209,9 +292,9 @@ class JSI:
         w0_p, w0_s, w0_i = self.calculate_focused_waists(lp_arr, ls_arr, li_arr)
 
         t_eval = self.T if temp is None else temp
-        zr_p = self.ny(lp_arr, t_eval) * np.pi * w0_p ** 2 / lp_arr
-        zr_s = self.ny(ls_arr, t_eval) * np.pi * w0_s ** 2 / ls_arr
-        zr_i = self.nz(li_arr, t_eval) * np.pi * w0_i ** 2 / li_arr
+        zr_p = self.gridIDX(self.ny, lp_arr, t_eval) * np.pi * w0_p ** 2 / lp_arr
+        zr_s = self.gridIDX(self.ny, ls_arr, t_eval) * np.pi * w0_s ** 2 / ls_arr
+        zr_i = self.gridIDX(self.nz, li_arr, t_eval) * np.pi * w0_i ** 2 / li_arr
 
         rho_i = self.walkoff_angle(li_arr, t_eval) if self.walkoff_enable else 0.0
 
@@ -301,28 +384,83 @@ class JSI:
     def thermexpfactor(self, T):
         return (1 + self.TXCa * (T - self.TXrefT) + self.TXCb * (T - self.TXrefT) * (T - self.TXrefT))
 
+    # refractive index on a wavelength grid. 2-D inputs that only vary along one axis
+    # (meshgrids, broadcast views) are evaluated on that axis and broadcast afterwards,
+    # so an N x N signal/idler grid needs N instead of N^2 evaluations
+    def gridIDX(self, idxfunc, wl, T):
+        if np.ndim(wl) != 2 or np.ndim(T) != 0 or min(np.shape(wl)) < 2:
+            return idxfunc(wl, T)
+        row = np.ascontiguousarray(wl[:1, :])
+        if wl.strides[0] == 0 or (wl[1, 0] == wl[0, 0] and (wl == row).all()):
+            return np.broadcast_to(idxfunc(row, T), wl.shape)
+        col = np.ascontiguousarray(wl[:, :1])
+        if wl.strides[1] == 0 or (wl[0, 1] == wl[0, 0] and (wl == col).all()):
+            return np.broadcast_to(idxfunc(col, T), wl.shape)
+        return idxfunc(wl, T)
+
     # phasematching conditions
     def econv(self, lp, ls, li):
         return 1 / lp - 1 / ls - 1 / li
 
     def pconv(self, lp, ls, li, T, PP):
         # wavelengths in nm, but refractive-index-functions take µm
-        pp = self.ny(lp, T) / lp
-        ps = self.ny(ls, T) / ls
-        pi = self.nz(li, T) / li
+        pp = self.gridIDX(self.ny, lp, T) / lp
+        ps = self.gridIDX(self.ny, ls, T) / ls
+        pi = self.gridIDX(self.nz, li, T) / li
         pc = self.m / PP
         return pp - ps - pi - pc
 
     # this wrapper returns a n arroy of functions(phasematching conditions)
     # that only takes signal- and idler-wavelength as arguments
     def epconvonlywl(self, lp, T, PP):
+        return self.epconvandjaconlywl(lp, T, PP)[0]
+
+    # same as epconvonlywl, but additionally returns the analytic jacobian of the
+    # phasematching conditions (None if the refractive index functions have no known derivative).
+    # the pump term is evaluated only once, and the jacobian reuses the refractive
+    # indices of the last function evaluation
+    def epconvandjaconlywl(self, lp, T, PP):
+        ny, nz = self.ny, self.nz
+        dny = RefractiveIndex.getDerivative(self.ny)
+        dnz = RefractiveIndex.getDerivative(self.nz)
+        if np.size(T) == 1:
+            # single temperature: the solver evaluates the indices with floats, see RefractiveIndex.getScalar
+            T = float(np.ravel(T)[0])
+            ny, nz = RefractiveIndex.getScalar(ny), RefractiveIndex.getScalar(nz)
+            if dny is not None and dnz is not None:
+                dny, dnz = RefractiveIndex.getScalar(dny), RefractiveIndex.getScalar(dnz)
+        pp = ny(lp, T) / lp
+        pc = self.m / PP
+        last = {}
+
+        def nsni(ls, li):
+            if last.get('x') != (ls, li):
+                last['x'] = (ls, li)
+                last['n'] = (ny(ls, T), nz(li, T))
+            return last['n']
+
         def epconv(x):
-            # x[0]:lambda_p
             # x[0]:lambda_s
             # x[1]:lambda_i
-            return [self.econv(lp, x[0], x[1]), float(self.pconv(lp, x[0], x[1], T, PP))]
+            ns, ni = nsni(x[0], x[1])
+            pcv = pp - ns / x[0] - ni / x[1] - pc
+            return [self.econv(lp, x[0], x[1]), pcv if isinstance(pcv, float) else float(np.ravel(pcv)[0])]
+
+        if dny is None or dnz is None:
+            return epconv, None
+
+        def epjac(x):
+            # x[0]:lambda_s
+            # x[1]:lambda_i
+            ls, li = x[0], x[1]
+            ns, ni = nsni(ls, li)
+            dpcdls = -(dny(ls, T) - ns / ls) / ls
+            dpcdli = -(dnz(li, T) - ni / li) / li
+            if isinstance(dpcdls, float) and isinstance(dpcdli, float):
+                return [[1 / ls ** 2, 1 / li ** 2], [dpcdls, dpcdli]]
+            return [[1 / ls ** 2, 1 / li ** 2], [np.ravel(dpcdls)[0], np.ravel(dpcdli)[0]]]
 
-        return epconv
+        return epconv, epjac
 
     # returns signal and idler wavelengths that satisfy phasematching
     # conditions for a given pumpwavelength, temperature and poling period
@@ -330,7 +468,8 @@ class JSI:
         # x[0]: lambda_pump
         # x[1]: Temperature
         # x[2]: Poling period
-        return scipy.optimize.fsolve(self.epconvonlywl(x[0], x[1], x[2]), [2 * x[0], 2 * x[0]], xtol=1e-6)
+        epconv, epjac = self.epconvandjaconlywl(x[0], x[1], x[2])
+        return scipy.optimize.fsolve(epconv, [2 * x[0], 2 * x[0]], fprime=epjac, xtol=1e-6)
 
     # returns difference between signal and idler wavelength
     # for a given pumpwavelength, temperature and poling period
@@ -357,13 +496,13 @@ class JSI:
         return wlgap2
 
     def deltak(self, lp, ls, li, T, PP):
-        return 2 * Constants().pi * self.pconv(lp, ls, li, T, PP)
+        return 2 * self.const.pi * self.pconv(lp, ls, li, T, PP)
 
     # calculates pumpwavelength out of signal and idler wavelength, using energy conservation
     def lambdap(self, ls, li):
         return self.lamdap_numba(ls, li)
     @staticmethod
-    @numba.njit
+    @njit(cache=True)
     def lamdap_numba(ls, li):
         return 1 / (1 / ls + 1 / li)
 
@@ -402,6 +541,80 @@ class JSI:
     def PMIsinc(self, dk, cl, lp=None, ls=None, li=None):
         return np.square(np.abs(self.PMA(dk, cl, lp, ls, li)))
 
+    # pump envelope, phase matching and joint spectral amplitudes (or intensities) on a separable
+    # signal/idler grid, i.e. ls and li are a sparse meshgrid pair. Everything except the pump
+    # refractive index is computed per grid point in one loop, written straight into the output buffers.
+    # peashape, peascale: pump envelope, see pepma_numba.
+    # returns None if the inputs are not separable or the spatial overlap is enabled
+    def fusedPEAnPMAnJSA(self, lp, ls, li, peashape, peascale, t, pp, cl, intensity=False):
+        if not self.fused or self.focusing_enable or self.fibre_coupling_enable:
+            return None
+        if np.ndim(ls) != 2 or np.ndim(li) != 2 or np.ndim(t) != 0 or np.ndim(pp) != 0 or np.ndim(cl) != 0:
+            return None
+        if ls.shape[0] == 1 and li.shape[1] == 1:
+            transpose = False
+            lsv, liv = ls[0, :], li[:, 0]
+        elif ls.shape[1] == 1 and li.shape[0] == 1:
+            transpose = True
+            lsv, liv = ls[:, 0], li[0, :]
+        else:
+            return None
+        lsv = np.ascontiguousarray(lsv, dtype=float)
+        liv = np.ascontiguousarray(liv, dtype=float)
+
+        ns = self.ny(lsv, t)
+        ni = self.nz(liv, t)
+        shape = (len(liv), len(lsv))
+        pe = np.empty(shape)
+        pm = np.empty(shape, dtype=float if intensity else complex)
+        js = np.empty(shape, dtype=float if intensity else complex)
+        kernel = self.fusedjsi_numba if intensity else self.fusedjsa_numba
+
+        rows = max(1, self.fusedblocksize // len(lsv))
+        for r0 in range(0, len(liv), rows):
+            r1 = min(r0 + rows, len(liv))
+            npump = self.ny(self.lambdap(lsv[None, :], liv[r0:r1, None]), t)
+            kernel(lsv, liv[r0:r1], npump, ns, ni[r0:r1], 1 / lp, peashape, peascale, self.m / pp, cl,
+                   pe[r0:r1], pm[r0:r1], js[r0:r1])
+
+        if transpose:
+            pe, pm, js = pe.T, pm.T, js.T
+        if self.useabs and not intensity:
+            return [np.absolute(pe), np.absolute(pm), np.absolute(js)]
+        return [pe, pm, js]
+
+    @staticmethod
+    @njit(parallel=True, cache=True)
+    def fusedjsa_numba(ls, li, npump, ns, ni, invlp, peashape, peascale, pc, cl, pe, pm, js):
+        for b in numba.prange(li.size):
+            for k in range(ls.size):
+                e, p = pepma_numba(ls[k], li[b], npump[b, k], ns[k], ni[b], invlp, peashape, peascale, pc, cl)
+                pe[b, k] = e
+                pm[b, k] = p
+                js[b, k] = e * p
+
+    @staticmethod
+    @njit(parallel=True, cache=True)
+    def fusedjsi_numba(ls, li, npump, ns, ni, invlp, peashape, peascale, pc, cl, pe, pm, js):
+        for b in numba.prange(li.size):
+            for k in range(ls.size):
+                e, p = pepma_numba(ls[k], li[b], npump[b, k], ns[k], ni[b], invlp, peashape, peascale, pc, cl)
+                e = e * e
+                p = p.real * p.real + p.imag * p.imag
+                pe[b, k] = e
+                pm[b, k] = p
+                js[b, k] = e * p
+
+    # amplitudes (or intensities) from the unfused functions
+    def PEAnPMAnJSAresult(self, pea, pma, intensity):
+        jsa = pea * pma
+        if intensity:
+            return [np.abs(pea) ** 2, np.abs(pma) ** 2, np.abs(jsa) ** 2]
+        elif self.useabs:
+            return [np.absolute(pea), np.absolute(pma), np.absolute(jsa)]
+        else:
+            return [pea, pma, jsa]
+
     ###################
     ###  cw(gauss)  ###
     ###################
@@ -428,20 +641,18 @@ class JSI:
     def JSIcwgauss(self, lp, ls, li, bw, t, pp, cl):
         return np.abs(self.JSAcwgauss(lp, ls, li, bw, t, pp, cl)) ** 2
 
-    def PEAnPMAnJSAcwgauss(self, lp, ls, li, bw, t, pp, cl):
+    def PEAnPMAnJSAcwgauss(self, lp, ls, li, bw, t, pp, cl, intensity=False):
         sp = bw / (2 * np.sqrt(2 * np.log(2)))  # gaussian standard deviation from FWHM
+        fused = self.fusedPEAnPMAnJSA(lp, ls, li, 0, lp ** 2 / (2 * sp), t, pp, cl, intensity)
+        if fused is not None:
+            return fused
         dk = self.deltak(self.lambdap(ls, li), ls, li, t, pp)
         pea = self.PEAcwgauss(lp, ls, li, sp)
         pma = self.PMAcwgauss(dk, cl, lp, ls, li, temp=t)
-        jsa = pea * pma
-        if self.useabs:
-            return [np.absolute(pea), np.absolute(pma), np.absolute(jsa)]
-        else:
-            return [pea, pma, jsa]
+        return self.PEAnPMAnJSAresult(pea, pma, intensity)
 
     def PEInPMInJSIcwgauss(self, lp, ls, li, bw, t, pp, cl):
-        [pea, pma, jsa] = self.PEAnPMAnJSAcwgauss(lp, ls, li, bw, t, pp, cl)
-        return [np.abs(pea) ** 2, np.abs(pma) ** 2, np.abs(jsa) ** 2]
+        return self.PEAnPMAnJSAcwgauss(lp, ls, li, bw, t, pp, cl, intensity=True)
     ###################
     ###   gaussian  ###
     ###################
@@ -449,7 +660,7 @@ class JSI:
     # amplitude
     def PEAgauss(self, lp, ls, li, sp):
         dl = 1 / ls + 1 / li - 1 / lp
-        return (np.exp(- (Constants().pi * Constants().c * (dl) / (sp)) ** 2))  # note: 2*pi*c/(2*sp)
+        return (np.exp(- (self.const.pi * self.const.c * (dl) / (sp)) ** 2))  # note: 2*pi*c/(2*sp)
 
     # intensity
     def PEIgauss(self, lp, ls, li, sp):
@@ -459,13 +670,11 @@ class JSI:
     def JSAgauss(self, lp, ls, li, tauac, t, pp, cl):
         # tauac: autocorrelator measured pulsewidth
         if self.usetaucf:
-            tau = tauac * Constants().taucfgauss
+            tau = tauac * self.const.taucfgauss
         else:
             tau = tauac
         # tau=tauac
-        dnu = Constants().tbwpgauss / tau  # FWHM in frequency
-        dw = 2 * Constants().pi * dnu  # FWHM in angular frequency
-        sp = dw / (2 * np.sqrt(2 * np.log(2)))  # gaussian standard deviation from FWHM
+        sp = self.const.sigmagauss / tau  # gaussian standard deviation (angular frequency)
         dk = self.deltak(self.lambdap(ls, li), ls, li, t, pp)
         jsa = self.PEAgauss(lp, ls, li, sp) * self.PMAgauss(dk, cl, lp, ls, li, temp=t)
         if self.useabs:
@@ -477,35 +686,31 @@ class JSI:
     def JSIgauss(self, lp, ls, li, tauac, t, pp, cl):
         return np.abs(self.JSAgauss(lp, ls, li, tauac, t, pp, cl)) ** 2
 
-    def PEAnPMAnJSAgauss(self, lp, ls, li, tauac, t, pp, cl):
+    def PEAnPMAnJSAgauss(self, lp, ls, li, tauac, t, pp, cl, intensity=False):
         # tauac: autocorrelator measured pulsewidth
         if self.usetaucf:
-            tau = tauac * Constants().taucfgauss
+            tau = tauac * self.const.taucfgauss
         else:
             tau = tauac
         # tau=tauac
-        dnu = Constants().tbwpgauss / tau  # FWHM in frequency
-        dw = 2 * Constants().pi * dnu  # FWHM in angular frequency
-        sp = dw / (2 * np.sqrt(2 * np.log(2)))  # gaussian standard deviation from FWHM
+        sp = self.const.sigmagauss / tau  # gaussian standard deviation (angular frequency)
+        fused = self.fusedPEAnPMAnJSA(lp, ls, li, 0, self.const.pi * self.const.c / sp, t, pp, cl, intensity)
+        if fused is not None:
+            return fused
         dk = self.deltak(self.lambdap(ls, li), ls, li, t, pp)
         pea = self.PEAgauss(lp, ls, li, sp)
         pma = self.PMAgauss(dk, cl, lp, ls, li, temp=t)
-        jsa = pea * pma
-        if self.useabs:
-            return [np.absolute(pea), np.absolute(pma), np.absolute(jsa)]
-        else:
-            return [pea, pma, jsa]
+        return self.PEAnPMAnJSAresult(pea, pma, intensity)
 
     def PEInPMInJSIgauss(self, lp, ls, li, tauac, t, pp, cl):
-        [pea, pma, jsa] = self.PEAnPMAnJSAgauss(lp, ls, li, tauac, t, pp, cl)
-        return [np.abs(pea) ** 2, np.abs(pma) ** 2, np.abs(jsa) ** 2]
+        return self.PEAnPMAnJSAgauss(lp, ls, li, tauac, t, pp, cl, intensity=True)
 
     ###################
     ###   sech^2    ###
     ###################
     # pump envelope amplitude for sech^2 beam
     def PEAsech(self, lp, ls, li, B):
-        wfact = 2 * Constants().pi * Constants().c * (1 / ls + 1 / li - 1 / lp)
+        wfact = 2 * self.const.pi * self.const.c * (1 / ls + 1 / li - 1 / lp)
         argument = wfact * B
         return (1 / np.cosh(argument))
 
@@ -516,12 +721,11 @@ class JSI:
     # joint spectral amplitude for sech^2 beam
     def JSAsech(self, lp, ls, li, tauac, t, pp, cl):
         if self.usetaucf:
-            tau = tauac * Constants().taucfsech
+            tau = tauac * self.const.taucfsech
         else:
             tau = tauac
         # tau=tauac
-        dw = 2 * Constants().pi * Constants().tbwpsech / (tau)
-        B = 2 * np.arccosh(np.sqrt(2)) / dw
+        B = self.const.Bsech * tau
         
         dk = self.deltak(self.lambdap(ls, li), ls, li, t, pp)
         jsa = self.PEAsech(lp, ls, li, B) * self.PMAsech(dk, cl, lp, ls, li, temp=t)
@@ -535,26 +739,23 @@ class JSI:
     def JSIsech(self, lp, ls, li, tauac, t, pp, cl):
         return np.abs(self.JSAsech(lp, ls, li, tauac, t, pp, cl)) ** 2
 
-    def PEAnPMAnJSAsech(self, lp, ls, li, tauac, t, pp, cl):
+    def PEAnPMAnJSAsech(self, lp, ls, li, tauac, t, pp, cl, intensity=False):
         if self.usetaucf:
-            tau = tauac * Constants().taucfsech
+            tau = tauac * self.const.taucfsech
         else:
             tau = tauac
         # tau=tauac
-        dw = 2 * Constants().pi * Constants().tbwpsech / (tau)
-        B = 2 * np.arccosh(np.sqrt(2)) / dw
+        B = self.const.Bsech * tau
+        fused = self.fusedPEAnPMAnJSA(lp, ls, li, 1, 2 * self.const.pi * self.const.c * B, t, pp, cl, intensity)
+        if fused is not None:
+            return fused
         dk = self.deltak(self.lambdap(ls, li), ls, li, t, pp)
         pea = self.PEAsech(lp, ls, li, B)
         pma = self.PMAsech(dk, cl, lp, ls, li, temp=t)
-        jsa = pea * pma
-        if self.useabs:
-            return [np.absolute(pea), np.absolute(pma), np.absolute(jsa)]
-        else:
-            return [pea, pma, jsa]
+        return self.PEAnPMAnJSAresult(pea, pma, intensity)
 
     def PEInPMInJSIsech(self, lp, ls, li, tauac, t, pp, cl):
-        [pea, pma, jsa] = self.PEAnPMAnJSAsech(lp, ls, li, tauac, t, pp, cl)
-        return [np.abs(pea) ** 2, np.abs(pma) ** 2, np.abs(jsa) ** 2]
+        return self.PEAnPMAnJSAsech(lp, ls, li, tauac, t, pp, cl, intensity=True)
     
     ###################
     ###    sinc     ###
@@ -562,9 +763,9 @@ class JSI:
     # pump envelope amplitude for sinc beam
     def PEAsinc(self, lp, ls, li, B):
         dl = 1 / ls + 1 / li - 1 / lp
-        wfact = 2 * Constants().pi * Constants().c * (1 / ls + 1 / li - 1 / lp)
+        wfact = 2 * self.const.pi * self.const.c * (1 / ls + 1 / li - 1 / lp)
         #argument = wfact * B
-        argument = wfact*B / Constants().pi #/pi to counteract np.sincs spurious pi: np.sinc(x) = sin(pi*x)/(pi*x)
+        argument = wfact*B / self.const.pi #/pi to counteract np.sincs spurious pi: np.sinc(x) = sin(pi*x)/(pi*x)
         return (np.sinc(argument))
         
     # pump envelope intensity for sinc beam
@@ -578,8 +779,7 @@ class JSI:
         #else:
             #tau = tauac
         tau=tauac
-        dw = 2 * Constants().pi * Constants().tbwpsinc / (tau)
-        B = 3.79099 / dw
+        B = self.const.Bsinc * tau
         dk = self.deltak(self.lambdap(ls, li), ls, li, t, pp)
         jsa = self.PEAsinc(lp, ls, li, B) * self.PMAsinc(dk, cl, lp, ls, li, temp=t)
         if self.useabs:
@@ -591,26 +791,23 @@ class JSI:
     def JSIsinc(self, lp, ls, li, tauac, t, pp, cl):
         return np.abs(self.JSAsinc(lp, ls, li, tauac, t, pp, cl)) ** 2
         
-    def PEAnPMAnJSAsinc(self, lp, ls, li, tauac, t, pp, cl):
+    def PEAnPMAnJSAsinc(self, lp, ls, li, tauac, t, pp, cl, intensity=False):
         #if self.usetaucf:
             #tau = tauac * Constants().taucfsech
         #else:
             #tau = tauac
         tau=tauac
-        dw = 2 * Constants().pi * Constants().tbwpsinc / (tau)
-        B = 3.79099 / dw
+        B = self.const.Bsinc * tau
+        fused = self.fusedPEAnPMAnJSA(lp, ls, li, 2, 2 * self.const.pi * self.const.c * B, t, pp, cl, intensity)
+        if fused is not None:
+            return fused
         dk = self.deltak(self.lambdap(ls, li), ls, li, t, pp)
         pea = self.PEAsinc(lp, ls, li, B)
         pma = self.PMAsinc(dk, cl, lp, ls, li, temp=t)
-        jsa = pea * pma
-        if self.useabs:
-            return [np.absolute(pea), np.absolute(pma), np.absolute(jsa)]
-        else:
-            return [pea, pma, jsa]
+        return self.PEAnPMAnJSAresult(pea, pma, intensity)
 
     def PEInPMInJSIsinc(self, lp, ls, li, tauac, t, pp, cl):
-        [pea, pma, jsa] = self.PEAnPMAnJSAsinc(lp, ls, li, tauac, t, pp, cl)
-        return [np.abs(pea) ** 2, np.abs(pma) ** 2, np.abs(jsa) ** 2]
+        return self.PEAnPMAnJSAsinc(lp, ls, li, tauac, t, pp, cl, intensity=True)
 
     def GetEffectivePP(self, m, Tcp, PPguess, lp, refidxfunc):
         self.nx = refidxfunc[0]
@@ -618,7 +815,8 @@ class JSI:
         self.nz = refidxfunc[2]
         return scipy.optimize.newton_krylov(self.wlgaponlyPP(lp, Tcp), PPguess, f_tol=1e-14)
 
-    def getplots(self,pumpwl,signalrange,idlerrange,tau,temp,polingp,crystallength, refidxfunc,qpmorder,filterfuncs,plotJSI,pumpshape,pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler):
+    @cachedresult(uncached=('consumers',))
+    def getplots(self,pumpwl,signalrange,idlerrange,tau,temp,polingp,crystallength, refidxfunc,qpmorder,filterfuncs,plotJSI,pumpshape,pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler, consumers=None):
         print('start calculating JSA or JSI')
         #
         # pumpwl: Pump wavelength
@@ -633,6 +831,10 @@ class JSI:
         # filterfuncs: [function,function]: [filterfunction for signal, filterfunction for idler]
         # plotJSI: bool: True for JSI, false for JSA
         # pumpshape: string: Shape of pump beam (gaussian, sech^2)
+        # consumers: None: return the full [PE, PM, JS] grids. Otherwise a list of tile consumers
+        #            (TileMarginals, TileGram, TileDownsample, TileArray): the grids are computed in
+        #            memory bounded row blocks (see JStiles) that are passed to every consumer, and
+        #            the list of the consumers' results is returned
         #
 
         self.sigrange = signalrange
@@ -684,31 +886,97 @@ class JSI:
         else:
             print('Error: No valid pump shape specified. Please choose between "gaussian", "sech^2", "sinc" and "cw".')
 
-        X, Y = np.meshgrid(self.sigrange, self.idrange)
+        X, Y = np.meshgrid(self.sigrange, self.idrange, sparse=True)
 
-        [PE, PM, JS] = trifunc(self.pwl, X, Y, tau, self.T, self.PP, self.L)
-        
-        if filterfuncs[0]==None and filterfuncs[1]==None:
-            self.useFilter = False
-        else:
-            self.useFilter = True
+        self.setfilters(filterfuncs)
         print('self.usefilter: ', self.useFilter)
+
+        if consumers is not None:
+            for rows, PE, PM, JS in self.JStiles(trifunc, X, Y, tau):
+                for consumer in consumers:
+                    consumer.consume(rows, PE, PM, JS)
+            return [consumer.result() for consumer in consumers]
+
+        # the whole grid is one kernel call, progress (and cancelling) is only possible around it
+        self.reportprogress(0, 1)
+        [PE, PM, JS] = trifunc(self.pwl, X, Y, tau, self.T, self.PP, self.L)
+        self.reportprogress(1, 1)
+
         if self.useFilter:
-            #self.useFilter = True
-            self.filtermatrix = []
-            self.filtersignalfunction = filterfuncs[0]
-            self.filteridlerfunction = filterfuncs[1]
-            for i in range(0, len(self.sigrange)):
-                filtervector = []
-                for j in range(0, len(self.idrange)):
-                    filterval=self.filteridlerfunction(self.idrange[j])*self.filtersignalfunction(self.sigrange[i])
-                    filtervector.append(filterval)
-                self.filtermatrix.append(filtervector)
+            filterrows, filtercols = self.filtervectors()
+            self.filtermatrix = filterrows[:, None] * filtercols[None, :]
             JS = JS * self.filtermatrix
 
         return [PE, PM, JS]
 
-    def getpurity_vsTau(self,pumpwl,signalrange,idlerrange,taurange,temp,polingp,crystallength,refidxfunc,qpmorder,filterfuncs,pumpshape):
+    # filters of a calculation, [signal filter function, idler filter function] (None: no filter).
+    # useFilter follows from them, so that no calculation depends on the filters of an earlier one
+    def setfilters(self, filterfuncs):
+        self.filtersignalfunction = filterfuncs[0]
+        self.filteridlerfunction = filterfuncs[1]
+        self.useFilter = not (filterfuncs[0] is None and filterfuncs[1] is None)
+
+    # the filter transmissions along the idler axis (rows of the grids) and the signal axis (columns).
+    # the filter matrix of getplots is their outer product
+    def filtervectors(self):
+        return (self.filtervector(self.filteridlerfunction, self.idrange),
+                self.filtervector(self.filtersignalfunction, self.sigrange))
+
+    def filtervector(self, filterfunc, wlrange):
+        if filterfunc is None:
+            return np.ones(np.size(wlrange))
+        return np.array([filterfunc(l) for l in np.ravel(wlrange)], dtype=float)
+
+    # getplots into a JSAStore directory at path: the grids are written block by block into memory
+    # mapped .npy files, with a metadata sidecar of all physical parameters. For filter loss estimates
+    # from the store (JSAStore.filterloss) compute it without filters. returns the store (read only)
+    def storeplots(self, path, pumpwl, signalrange, idlerrange, tau, temp, polingp, crystallength, refidxfunc, qpmorder, filterfuncs, plotJSI, pumpshape, pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler):
+        from JSAStore import JSAStore, describefunction
+        store = JSAStore(path, mode='w')
+        store.setaxes(signalrange, idlerrange)
+        self.getplots(pumpwl, signalrange, idlerrange, tau, temp, polingp, crystallength, refidxfunc, qpmorder, filterfuncs, plotJSI, pumpshape, pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler, consumers=[store])
+        store.setmetadata({
+            'created': datetime.now().isoformat(),
+            'pumpwl': float(pumpwl),
+            'tau': float(tau),
+            'pumpcwbw': float(pumpcwbw),
+            'pumpshape': str(pumpshape),
+            'temperature': float(temp),
+            'polingperiod': float(polingp),
+            'crystallength': float(crystallength),
+            # with thermal expansion, as used in the calculation
+            'polingperiod_effective': float(self.PP),
+            'crystallength_effective': float(self.L),
+            'qpmorder': int(qpmorder),
+            'plotJSI': bool(plotJSI),
+            'useabs': bool(self.useabs),
+            'indexmodels': {pol: describefunction(func) for pol, func in zip(['X', 'Y', 'Z'], refidxfunc)},
+            'filters': {'signal': describefunction(filterfuncs[0]), 'idler': describefunction(filterfuncs[1])},
+            'focusing_enable': bool(focusing_enable),
+            'fibre_coupling_enable': bool(fibre_coupling_enable),
+            'walkoff_enable': bool(self.walkoff_enable),
+            'focallength': {'pump': float(focallength_pump), 'signal': float(focallength_signal), 'idler': float(focallength_idler)},
+            'beamdiameter': {'pump': float(beamdiameter_pump), 'signal': float(beamdiameter_signal), 'idler': float(beamdiameter_idler)},
+        })
+        return JSAStore(path)
+
+    # [PE, PM, JS] of trifunc on the sparse meshgrid X, Y in blocks of idler rows, each of about
+    # self.tilebytes. yields (rows, PE, PM, JS), rows being the slice of the block in the full grid.
+    # the filter is applied per block with the same entries as the filter matrix of getplots
+    def JStiles(self, trifunc, X, Y, tau):
+        step = max(1, int(self.tilebytes // (self.tilebytesperpoint * X.size)))
+        if self.useFilter:
+            filterrows, filtercols = self.filtervectors()
+        for r0 in range(0, Y.shape[0], step):
+            self.reportprogress(r0, Y.shape[0])
+            rows = slice(r0, min(r0 + step, Y.shape[0]))
+            [PE, PM, JS] = trifunc(self.pwl, X, Y[rows], tau, self.T, self.PP, self.L)
+            if self.useFilter:
+                JS = JS * filterrows[rows, None] * filtercols[None, :]
+            yield rows, PE, PM, JS
+
+    @cachedresult()
+    def getpurity_vsTau(self,pumpwl,signalrange,idlerrange,taurange,temp,polingp,crystallength,refidxfunc,qpmorder,filterfuncs,pumpshape,batched=True,chunkbytes=2**28,threads=None):
         #
         # pumpwl: Pump wavelength
         # signalrange: [double,double]: Signal wavelength range
@@ -721,6 +989,9 @@ class JSI:
         # qpmorder: Quasi phase matching order
         # filter: [string,bool,bool]: [Type of filter to use, True: use filter for signal, True: use filter for idler]
         # pumpshape: string: Shape of pump beam (gaussian, sech^2)
+        # batched: bool: compute the purities from stacks of JSAs (see purity_vsTau_batched)
+        # chunkbytes: memory bound for the JSA stacks of all threads together
+        # threads: number of threads working on the stacks (None: one per core)
         #
 
         print('start calculating JSA or JSI')
@@ -763,39 +1034,48 @@ class JSI:
         else:
             self.calcSech = True
 
-        X, Y = np.meshgrid(self.sigrange, self.idrange)
+        X, Y = np.meshgrid(self.sigrange, self.idrange, sparse=True)
 
         purity = []
 
-        pma = pmafunc(self.deltak(self.lambdap(X, Y), X, Y, self.T, self.PP), self.L, self.pwl, X, Y, temp=self.T)
-
-        for i in range(0, len(self.taurange)):
-            self.tau = self.taurange[i]
-            JSA = pma * peafunc(self.pwl, X, Y, self.tau)
-                
+        def pmablock(rows, cols):
+            xs, ys = self.gridslice(X, rows, cols), self.gridslice(Y, rows, cols)
+            pma = pmafunc(self.deltak(self.lambdap(xs, ys), xs, ys, self.T, self.PP), self.L, self.pwl, xs, ys, temp=self.T)
             if self.useFilter:
-                self.filtersignalfunction = filterfuncs[0]
-                self.filteridlerfunction = filterfuncs[1]
-                if not (self.filtersignalfunction==None and self.filteridlerfunction==None):
-                    self.filtermatrix = []
-                    self.useFilter = True
-                    for i in range(0, len(self.sigrange)):
-                        filtervector = []
-                        for j in range(0, len(self.idrange)):
-                            filterval=self.filteridlerfunction(self.sigrange[i])*self.filtersignalfunction(self.idrange[j])
-                            filtervector.append(filterval)
-                        self.filtermatrix.append(filtervector)
-                    JSA = JSA * self.filtermatrix
+                pma = pma * filterrows[rows, None] * filtercols[None, cols]
+            return pma
+
+        # the filters do not depend on tau, apply them to pma once. the filter matrix is the one of
+        # getplots, separable into the two vectors of filtervectors, so only these are evaluated, once,
+        # and the blocks of pmablock take their slices
+        self.filtermatrix = None
+        self.setfilters(filterfuncs)
+        if self.useFilter:
+            filterrows, filtercols = self.filtervectors()
+            self.filtermatrix = filterrows[:, None] * filtercols[None, :]
+
+        if self.lowrank:
+            shape = (len(self.idrange), len(self.sigrange))
+            for i in range(0, len(self.taurange)):
+                self.reportprogress(i, len(self.taurange))
+                def jsablock(rows, cols, tau=self.taurange[i]):
+                    xs, ys = self.gridslice(X, rows, cols), self.gridslice(Y, rows, cols)
+                    return pmablock(rows, cols) * peafunc(self.pwl, xs, ys, tau)
+                purity.append(self.JSAfactors(jsablock, shape).purity())
+        elif batched:
+            pma = pmablock(slice(None), slice(None))
+            purity = list(self.purity_vsTau_batched(pma, peafunc, X, Y, chunkbytes, threads))
+        else:
+            pma = pmablock(slice(None), slice(None))
+            for i in range(0, len(self.taurange)):
+                self.reportprogress(i, len(self.taurange))
+                self.tau = self.taurange[i]
+                JSA = pma * peafunc(self.pwl, X, Y, self.tau)
 
-            # Purity
-            # SDV
-            sA = scipy.linalg.svd(JSA, overwrite_a=True, compute_uv=False)
-            # singular values in s. need to normalize s to get the schmidt magnitudes
-            snA = sA / scipy.linalg.norm(sA, 2)
-            # sum of squares of schmidt magnitudes is purity
-            purity.append(np.sum(snA ** 4))
-            #infostring = "Pulsewidth: {0:.5f}ps\tpurity: {1:.5f}".format(self.tau * 10 ** (12), purity[i])
-            #print(infostring)
+                # Purity
+                purity.append(self.purity(JSA))
+                #infostring = "Pulsewidth: {0:.5f}ps\tpurity: {1:.5f}".format(self.tau * 10 ** (12), purity[i])
+                #print(infostring)
 
         # interpolate purity curve
         increased_taurange = np.linspace(self.taurange[0], self.taurange[-1], 100000)
@@ -808,6 +1088,160 @@ class JSI:
 
         return [purity,max,increased_taurange[maxidx]]
 
+    # purities for all pulse durations in self.taurange. The JSAs pma * pea(tau) are built as
+    # (k, M, N) stacks of at most chunkbytes / threads bytes each, and the singular values of a whole
+    # stack are computed with one np.linalg.svd call. Stacks are processed by the sweep executor
+    # (numpy releases the GIL in LAPACK, so threads work in parallel as well)
+    def purity_vsTau_batched(self, pma, peafunc, X, Y, chunkbytes=2**28, threads=None):
+        if threads is None:
+            threads = self.sweepworkers or len(os.sched_getaffinity(0))
+        taus = np.asarray(self.taurange, dtype=float)
+        k = max(1, int(chunkbytes // (threads * pma.size * 16)))
+        arrays = {'pma': pma, 'X': X, 'Y': Y}
+        if threads <= 1 or len(taus) <= k:
+            return self.puritytaus(arrays, taus, peafunc.__name__, k)
+        return self.mapsweep(self.puritytaus, arrays, taus, peafunc.__name__, k, executor=self.sweepexecutor, max_workers=threads)
+
+    # purities for the pulse durations taus, from stacks of at most k JSAs pma * pea(tau)
+    def puritytaus(self, arrays, taus, peaname, k):
+        pma, X, Y = arrays['pma'], arrays['X'], arrays['Y']
+        peafunc = getattr(self, peaname)
+        return np.concatenate([self.purity(pma[None, :, :] * peafunc(self.pwl, X[None], Y[None], taus[i:i + k, None, None]))
+                               for i in range(0, len(taus), k)])
+
+    # part of a sparse meshgrid array (shape (M, 1) or (1, N)) belonging to the grid block [rows, cols]
+    def gridslice(self, g, rows, cols):
+        return g[rows if g.shape[0] > 1 else slice(None), cols if g.shape[1] > 1 else slice(None)]
+
+    # rank-r factorization JSA ~ U V^T of the (M, N) joint spectral amplitude, built by adaptive cross
+    # approximation with partial pivoting. entryfunc(rows, cols) returns the JSA on the grid block
+    # [rows, cols] (slices), and only single rows and columns are ever evaluated, so the cost is
+    # O((M + N) r) evaluations and O((M + N) r^2) operations instead of the full grid.
+    # stops when the last cross is below tol relative to the frobenius norm of the approximation and
+    # the residuals of a few random rows and columns confirm it (otherwise these become the next pivots).
+    # JSAs that are not low rank (no convergence up to maxrank, at most a quarter of the grid) are
+    # factorized from the full grid by a truncated SVD instead
+    def JSAfactors(self, entryfunc, shape, tol=None, maxrank=None):
+        tol = self.lowranktol if tol is None else tol
+        maxrank = self.lowrankmaxrank if maxrank is None else maxrank
+        M, N = shape
+        maxrank = min(maxrank, max(1, min(M, N) // 4))
+        U = np.zeros((M, 0), dtype=complex)
+        V = np.zeros((N, 0), dtype=complex)
+
+        def row(i):
+            return np.ravel(entryfunc(slice(i, i + 1), slice(None))) - V @ U[i]
+
+        def col(j):
+            return np.ravel(entryfunc(slice(None), slice(j, j + 1))) - U @ V[j]
+
+        # start in the row through the maximum of the centre column
+        rng = np.random.default_rng(0)
+        c = col(N // 2)
+        i = int(np.argmax(np.abs(c)))
+        pivotmin = np.max(np.abs(c)) * 10 ** (-14)
+        used = np.zeros(M, dtype=bool)
+        norm2 = 0
+        while U.shape[1] < maxrank and not used.all():
+            used[i] = True
+            r = row(i)
+            j = int(np.argmax(np.abs(r)))
+            if np.abs(r[j]) > pivotmin:
+                u = col(j)
+                v = r / r[j]
+                norm2 = norm2 + 2 * np.real(np.sum((U.conj().T @ u) * (V.conj().T @ v))) \
+                    + np.real(np.vdot(u, u) * np.vdot(v, v))
+                U = np.column_stack([U, u])
+                V = np.column_stack([V, v])
+                c = u
+                if np.linalg.norm(u) * np.linalg.norm(v) <= tol * np.sqrt(norm2):
+                    check = tol * np.sqrt(norm2)
+                    rowsok = [k for k in rng.choice(M, min(8, M), replace=False)
+                              if not used[k] and np.linalg.norm(row(k)) * np.sqrt(M) > check]
+                    if rowsok:
+                        i = rowsok[0]
+                        continue
+                    colsok = [cc for cc in (col(k) for k in rng.choice(N, min(8, N), replace=False))
+                              if np.linalg.norm(cc) * np.sqrt(N) > check]
+                    if not colsok:
+                        return FactorizedJSA(U, V)
+                    c = colsok[0]
+            # next pivot row: largest entry of the last residual column among the unused rows
+            a = np.abs(c)
+            a[used] = -1
+            i = int(np.argmax(a))
+        if used.all():
+            return FactorizedJSA(U, V)
+        u, sv, vh = np.linalg.svd(entryfunc(slice(None), slice(None)), full_matrices=False)
+        r = max(1, int(np.sum(sv > tol * sv[0])))
+        return FactorizedJSA(u[:, :r] * sv[:r], vh[:r].T)
+
+    # simpson integration weights of an n point grid (unit spacing), so that
+    # scipy.integrate.simpson(y) == w @ y
+    def simpsonweights(self, n):
+        return scipy.integrate.simpson(np.eye(n))
+
+    # purity sum(lambda^4) of every JSA in a (..., M, N) stack, lambda being the normalized singular
+    # values (schmidt magnitudes). methods:
+    #   'svd': full singular value decomposition, O(N^3)
+    #   'gram': trace identity P = Tr[rho^2] / Tr[rho]^2 with rho = JSA JSA^dagger, exact and a single
+    #           matrix product instead of an SVD
+    #   'randomized': truncated randomized SVD whose rank is doubled until the bound on the
+    #           neglected schmidt modes is below puritytol
+    #   'auto': gram for grids up to 512 points, randomized with a small maximum rank for larger
+    #           ones (falling back to gram if the spectrum is too flat for a low rank approximation)
+    def purity(self, jsa, method=None):
+        method = self.puritymethod if method is None else method
+        if method == 'auto':
+            n = min(jsa.shape[-2:])
+            if n <= 512:
+                return self.purity_gram(jsa)
+            return self.purity_randomized(jsa, self.puritytol, maxrank=n // 16)
+        if method == 'svd':
+            return self.purity_svd(jsa)
+        elif method == 'gram':
+            return self.purity_gram(jsa)
+        elif method == 'randomized':
+            return self.purity_randomized(jsa, self.puritytol)
+        else:
+            raise ValueError('Unknown purity method')
+
+    def purity_svd(self, jsa):
+        s = np.linalg.svd(jsa, compute_uv=False)
+        sn = s / np.linalg.norm(s, axis=-1, keepdims=True)
+        return np.sum(sn ** 4, axis=-1)
+
+    def purity_gram(self, jsa):
+        if jsa.shape[-2] > jsa.shape[-1]:
+            jsa = jsa.swapaxes(-1, -2)
+        rho = jsa @ jsa.conj().swapaxes(-1, -2)
+        tr = np.real(np.trace(rho, axis1=-2, axis2=-1))
+        return np.sum(np.abs(rho) ** 2, axis=(-2, -1)) / tr ** 2
+
+    # randomized range finder with power iterations (Halko, Martinsson, Tropp 2011).
+    # with the k leading singular values s_i and the exact frobenius norm F^2 = sum(s^2) the neglected
+    # part of the purity is bounded by s_k^2 * (F^2 - sum_k s_i^2) / F^4.
+    # if the bound is not met below maxrank (default: a quarter of the grid), gram is used instead
+    def purity_randomized(self, jsa, tol, rank=16, oversampling=8, poweriter=2, maxrank=None):
+        n = min(jsa.shape[-2:])
+        maxrank = n // 4 if maxrank is None else maxrank
+        jsah = jsa.conj().swapaxes(-1, -2)
+        fro2 = np.sum(np.abs(jsa) ** 2, axis=(-2, -1))
+        rng = np.random.default_rng(0)
+        while rank + oversampling <= maxrank:
+            q = np.linalg.qr(jsa @ rng.standard_normal((jsa.shape[-1], rank + oversampling)))[0]
+            for i in range(0, poweriter):
+                q = np.linalg.qr(jsah @ q)[0]
+                q = np.linalg.qr(jsa @ q)[0]
+            s2 = np.linalg.svd(q.conj().swapaxes(-1, -2) @ jsa, compute_uv=False)[..., :rank] ** 2
+            purity = np.sum(s2 ** 2, axis=-1) / fro2 ** 2
+            bound = s2[..., -1] * np.maximum(fro2 - np.sum(s2, axis=-1), 0) / fro2 ** 2
+            if np.all(bound <= tol):
+                return purity
+            rank = 2 * rank
+        return self.purity_gram(jsa)
+
+    @cachedresult()
     def getpurity_vsL(self,pumpwl,signalrange,idlerrange,tau,temp,polingp,crystallengthrange,refidxfunc,qpmorder,filterfuncs,pumpshape,pumpcwbw):
         #
         # pumpwl: Pump wavelength
@@ -852,12 +1286,35 @@ class JSI:
         elif self.pumpshape.casefold() == 'sinc':
             self.calcSinc = True
 
-        X, Y = np.meshgrid(self.sigrange, self.idrange)
+        X, Y = np.meshgrid(self.sigrange, self.idrange, sparse=True)
+
+        # the filters do not depend on the crystal length, the filter matrix is the one of getplots
+        self.filtermatrix = None
+        self.setfilters(filterfuncs)
+        if self.useFilter:
+            filterrows, filtercols = self.filtervectors()
+            self.filtermatrix = filterrows[:, None] * filtercols[None, :]
 
         purity = []
 
         for i in range(0, len(self.Lrange)):
+            self.reportprogress(i, len(self.Lrange))
             self.L = self.Lrange[i]
+            if self.lowrank:
+                if self.calcGaussian:
+                    jsafunc, tau = self.JSAgauss, self.tau
+                elif self.calcSech:
+                    jsafunc, tau = self.JSAsech, self.tau
+                elif self.calcSinc:
+                    jsafunc, tau = self.JSAsinc, self.tau
+                def jsablock(rows, cols):
+                    jsa = jsafunc(self.pwl, self.gridslice(X, rows, cols), self.gridslice(Y, rows, cols),
+                                  tau, self.T, self.PP, self.L)
+                    if self.useFilter:
+                        jsa = jsa * filterrows[rows, None] * filtercols[None, cols]
+                    return jsa
+                purity.append(self.JSAfactors(jsablock, (len(self.idrange), len(self.sigrange))).purity())
+                continue
             # JSA
             if self.calcGaussian:
                 JSA = self.JSAgauss(self.pwl, X, Y, self.tau, self.T, self.PP, self.L)
@@ -869,27 +1326,10 @@ class JSI:
                 JSA = self.JSAcwgauss(self.pwl, X, Y, self.pumpcwbw, self.T, self.PP, self.L)
                 
             if self.useFilter:
-                self.filtersignalfunction = filterfuncs[0]
-                self.filteridlerfunction = filterfuncs[1]
-                if not (self.filtersignalfunction==None and self.filteridlerfunction==None):
-                    self.filtermatrix = []
-                    self.useFilter = True
-                    for i in range(0, len(self.sigrange)):
-                        filtervector = []
-                        for j in range(0, len(self.idrange)):
-                            filterval=self.filteridlerfunction(self.sigrange[i])*self.filtersignalfunction(self.idrange[j])
-                            filtervector.append(filterval)
-                    self.filtermatrix.append(filtervector)
-
-                    JSA = JSA * self.filtermatrix
+                JSA = JSA * self.filtermatrix
 
             # Purity
-            # SDV
-            sA = scipy.linalg.svd(JSA, overwrite_a=True, compute_uv=False)
-            # singular values in s. need to normalize s to get the schmidt magnitudes
-            snA = sA / scipy.linalg.norm(sA, 2)
-            # sum of squares of schmidt magnitudes is purity
-            purity.append(np.sum(snA ** 4))
+            purity.append(self.purity(JSA))
             #infostring = "Crystal length: {0:.5f}ps\tpurity: {1:.5f}".format(self.L * 10 ** (3), purity[i])
             #print(infostring)
 
@@ -904,13 +1344,113 @@ class JSI:
 
         return [purity,max,increased_Lrange[maxidx]]
 
-    def getTcpVslp(self,pwlrange,temp,polingp,refidxfunc,qpmorder):
+    # phase mismatch (without 2pi) at degeneracy, i.e. for lambda_s = lambda_i = 2*lambda_p.
+    # the crossing point temperature is the root of this function in T
+    def degeneratepconv(self, lp, T, PP):
+        return self.pconv(lp, 2 * lp, 2 * lp, T, PP)
+
+    # crossing point temperature for a single (lp, PP): bracketed 1-D root of degeneratepconv.
+    # the bracket is grown outward from Tguess, so the root closest to Tguess is returned
+    def getTcp(self, lp, PP, Tguess, Tstep=1, Tmaxstep=10**4):
+        def f(T):
+            return float(np.ravel(self.degeneratepconv(lp, T, PP))[0])
+        if np.size(lp) == 1 and np.size(PP) == 1:
+            # degeneratepconv with floats, see RefractiveIndex.getScalar
+            lp, PP = float(np.ravel(lp)[0]), float(np.ravel(PP)[0])
+            ny, nz = RefractiveIndex.getScalar(self.ny), RefractiveIndex.getScalar(self.nz)
+            def f(T):
+                return ny(lp, T) / lp - ny(2 * lp, T) / (2 * lp) - nz(2 * lp, T) / (2 * lp) - self.m / PP
+        flo = fhi = f(Tguess)
+        if flo == 0:
+            return Tguess
+        lo = hi = Tguess
+        d = Tstep
+        while d <= Tmaxstep:
+            a, b = Tguess - d, Tguess + d
+            fa, fb = f(a), f(b)
+            if np.sign(fb) != np.sign(fhi):
+                return scipy.optimize.brentq(f, hi, b, xtol=1e-12)
+            if np.sign(fa) != np.sign(flo):
+                return scipy.optimize.brentq(f, a, lo, xtol=1e-12)
+            lo, flo, hi, fhi = a, fa, b, fb
+            d = 2 * d
+        return np.nan
+
+    # crossing point temperature for a single (lp, PP) through the nested signal/idler solve
+    def getTcpNested(self, lp, PP, Tguess):
+        return scipy.optimize.fsolve(self.wlgaponlyT(lp, PP), Tguess)[0]
+
+    # crossing point temperatures for whole arrays of pump wavelengths and/or poling periods.
+    # degeneratepconv is solved for all points at once with array newton steps;
+    # points that do not converge are solved one by one with getTcp, optionally in a process pool
+    def getTcp_batch(self, lp, PP, Tguess, xtol=1e-10, maxiter=50, processes=None):
+        lp, PP, T = np.broadcast_arrays(np.asarray(lp, dtype=float), np.asarray(PP, dtype=float),
+                                        np.asarray(Tguess, dtype=float))
+        # contiguous copies (np.ascontiguousarray would turn single points into 1-d arrays)
+        lp = np.array(lp, order='C')
+        PP = np.array(PP, order='C')
+        T = np.array(T)
+        Tguess = T.copy()
+
+        # dfdT by central difference: the refractive index functions need not have a temperature
+        # derivative (tabulated or user supplied models), and newton only needs an approximate one.
+        # the root (f = 0) does not depend on it, a relative error e of dfdT only slows the steps to a
+        # contraction of ~e. f is smooth on the kelvin scale, the truncation error (~h^2) is below 1e-9
+        # up to h = 0.1 K. the rounding error is ~eps |n/λ| / (h dfdT), with n/λ ~ 4.5e6 / m and
+        # dfdT ~ 30 / (m K) for PPKTP at 405 nm, i.e. ~1e-9 for h = 1e-2 K (~1e-8 for 1e-3 K)
+        h = 10 ** (-2)
+        converged = np.zeros(T.shape, dtype=bool)
+        for i in range(0, maxiter):
+            f = self.degeneratepconv(lp, T, PP)
+            dfdT = (self.degeneratepconv(lp, T + h, PP) - self.degeneratepconv(lp, T - h, PP)) / (2 * h)
+            step = f / dfdT
+            # in place, so that single points stay 0-d arrays
+            T -= step
+            converged = np.abs(step) <= xtol * np.maximum(1, np.abs(T))
+            if np.all(converged):
+                break
+
+        # np.ndindex also covers single (0-d) points
+        failed = [idx for idx in np.ndindex(T.shape) if not (converged[idx] and np.isfinite(T[idx]))]
+        if failed:
+            self.mapTcp(self.getTcp, T, failed, lp, PP, Tguess, processes)
+        return T
+
+    # solves the crossing point temperature for the points idcs one by one with
+    # tcpfunc(lp, PP, Tguess) and writes the results into Tcp.
+    # processes: None runs serially, otherwise the number of worker processes (0: one per core)
+    def mapTcp(self, tcpfunc, Tcp, idcs, lp, PP, Tguess, processes=None):
+        args = [(lp[idx], PP[idx], Tguess[idx]) for idx in idcs]
+        if processes is None:
+            results = [tcpfunc(*a) for a in args]
+        else:
+            import concurrent.futures
+            import multiprocessing as mp
+            max_workers = processes if processes else len(os.sched_getaffinity(0))
+            # spawned workers, see mapsweep
+            with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context('spawn')) as ex:
+                results = list(ex.map(tcpfunc, *zip(*args)))
+        for idx, res in zip(idcs, results):
+            Tcp[idx] = res
+        return Tcp
+
+    # crossing point temperatures for a range of pump wavelengths.
+    # vectorized: solve all points at once (getTcp_batch). Otherwise the nested
+    # signal/idler solve is used, either serially with warm starts or, if processes
+    # is given, in a process pool
+    def getTcpVslp(self,pwlrange,temp,polingp,refidxfunc,qpmorder,vectorized=True,processes=None):
         self.PP=polingp
         self.T = temp
         [self.nx,self.ny,self.nz] = refidxfunc
         self.m=qpmorder
 
-        plotrange = pwlrange
+        plotrange = np.asarray(pwlrange)
+        if vectorized:
+            return self.getTcp_batch(plotrange, self.PP, self.T, processes=processes)
+        if processes is not None:
+            Tcp = np.full(plotrange.shape, float(self.T))
+            return self.mapTcp(self.getTcpNested, Tcp, list(np.ndindex(plotrange.shape)),
+                               plotrange, np.full(plotrange.shape, self.PP), Tcp.copy(), processes)
         Tcp = []
         initialTguess = self.T
         Tguess = initialTguess
@@ -922,13 +1462,20 @@ class JSI:
 
         return Tcp
 
-    def getTcpVsPP(self,PPrange,temp,pwl,refidxfunc,qpmorder):
+    # crossing point temperatures for a range of poling periods. See getTcpVslp for the modes
+    def getTcpVsPP(self,PPrange,temp,pwl,refidxfunc,qpmorder,vectorized=True,processes=None):
         self.pwl=pwl
         self.T = temp
         [self.nx,self.ny,self.nz] = refidxfunc
         self.m=qpmorder
 
-        plotrange = PPrange
+        plotrange = np.asarray(PPrange)
+        if vectorized:
+            return self.getTcp_batch(pwl, plotrange, self.T, processes=processes)
+        if processes is not None:
+            Tcp = np.full(plotrange.shape, float(self.T))
+            return self.mapTcp(self.getTcpNested, Tcp, list(np.ndindex(plotrange.shape)),
+                               np.full(plotrange.shape, pwl), plotrange, Tcp.copy(), processes)
         Tcp = []
         initialTguess = self.T
         Tguess = initialTguess
@@ -940,7 +1487,293 @@ class JSI:
 
         return Tcp
 
+    # crossing point temperature map over poling period (columns) and pump wavelength (rows).
+    # initial guesses come from 2-D continuation: the centre point is solved from temp (which
+    # stays the guess if it has no solution), the centre column (along the pump wavelength axis)
+    # outward from the centre point, and every row outward from its value on the centre column,
+    # each cell from its already solved row neighbour (see getTcpContinued). The rows are solved
+    # in chunks, all rows of a chunk at once; processes: None runs the chunks serially, otherwise
+    # the number of worker processes (0: one per core)
+    def getTcpMap(self, PPrange, pwlrange, temp, refidxfunc, qpmorder, chunksize=64, processes=None):
+        self.T = temp
+        [self.nx, self.ny, self.nz] = refidxfunc
+        self.m = qpmorder
+
+        PPrange = np.asarray(PPrange, dtype=float)
+        pwlrange = np.asarray(pwlrange, dtype=float)
+        jc = len(PPrange) // 2
+        ic = len(pwlrange) // 2
+
+        Tcentre = self.getTcp_batch(pwlrange[ic], PPrange[jc], temp)
+        Tcentre = Tcentre if np.isfinite(Tcentre) else temp
+        Tcolumn = self.getTcpContinued(pwlrange, np.full(len(pwlrange), PPrange[jc]), ic, Tcentre)
+        Tcolumn = np.where(np.isfinite(Tcolumn), Tcolumn, Tcentre)
+
+        PP, lp = np.meshgrid(PPrange, pwlrange)
+
+        chunks = [slice(i, i + chunksize) for i in range(0, len(pwlrange), chunksize)]
+        Tcp = np.empty(PP.shape)
+        if processes is None:
+            for i, c in enumerate(chunks):
+                self.reportprogress(i, len(chunks))
+                Tcp[c] = self.getTcpContinued(lp[c], PP[c], jc, Tcolumn[c])
+        else:
+            import concurrent.futures
+            import multiprocessing as mp
+            max_workers = processes if processes else len(os.sched_getaffinity(0))
+            # spawned workers, see mapsweep
+            with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context('spawn')) as ex:
+                futures = [ex.submit(self.getTcpContinued, lp[c], PP[c], jc, Tcolumn[c]) for c in chunks]
+                for c, f in zip(chunks, self.sweepresults(futures)):
+                    Tcp[c] = f
+
+        return Tcp
+
+    # crossing point temperatures by continuation along the last axis of lp and PP: the points at
+    # index start are solved from Tstart, the others outward from start, each from the solution of
+    # its neighbour towards start (Tstart where that has none). All rows are solved at once with
+    # getTcp_batch
+    def getTcpContinued(self, lp, PP, start, Tstart):
+        Tcp = np.empty(np.shape(lp))
+        Tcp[..., start] = self.getTcp_batch(lp[..., start], PP[..., start], Tstart)
+        for j in list(range(start + 1, Tcp.shape[-1])) + list(range(start - 1, -1, -1)):
+            neighbour = Tcp[..., j - 1] if j > start else Tcp[..., j + 1]
+            Tcp[..., j] = self.getTcp_batch(lp[..., j], PP[..., j], np.where(np.isfinite(neighbour), neighbour, Tstart))
+        return Tcp
+
+    # interference term of the HOM trace, sum_ab w_a w_b jsa1_ab conj(jsa2_ab) exp(-2 pi i nu_ab tau) for all
+    # delays tau, with simpson weights w and the frequency difference nu_ab = c/ls_b - c/li_a.
+    # instead of one grid sum per delay this is a type 1 non-uniform FFT (Greengard, Lee 2004):
+    # the terms are spread once onto a uniform frequency grid with a gaussian kernel, the grid is
+    # fourier transformed (an FFT for equally spaced delays, a direct sum over the bins otherwise)
+    # and the kernel is divided out again. eps: target relative accuracy
+    def homtrace_fft(self, jsa1, jsa2, li, ls, delays, eps=10 ** (-12)):
+        delays = np.asarray(delays, dtype=float)
+        q = self.const.c / np.asarray(li, dtype=float)
+        p = self.const.c / np.asarray(ls, dtype=float)
+        numin, numax = np.min(p) - np.max(q), np.max(p) - np.min(q)
+        tmax = max(np.max(np.abs(delays)), 1 / (numax - numin))
+
+        # oversampling R = 2: grid spacing h and gaussian width s keep aliasing and truncation below eps
+        R = 2
+        lneps = np.log(1 / eps)
+        uniform = len(delays) > 1 and np.allclose(np.diff(delays), delays[1] - delays[0], rtol=10 ** (-9), atol=0)
+        if uniform:
+            dtau = delays[1] - delays[0]
+            L = int(np.ceil(2 * R * tmax / abs(dtau)))
+            h = 1 / (L * dtau)
+        else:
+            h = 1 / (2 * R * tmax)
+        s = abs(h) * np.sqrt(lneps / (2 * np.pi ** 2 * (1 - 1 / R)))
+        w = int(np.ceil(s * np.sqrt(2 * lneps) / abs(h)))
+        nu0 = numin - w * abs(h) if h > 0 else numax + w * abs(h)
+        K = int(np.ceil((numax - numin) / abs(h))) + 2 * w + 2
+
+        c = jsa1 * np.conjugate(jsa2)
+        wrows = self.simpsonweights(c.shape[0])
+        wcols = self.simpsonweights(c.shape[1])
+        # one private grid per numba thread. the thread count is passed in, a kernel that reads it
+        # itself can not be cached
+        import numba
+        f = self.gridgauss_numba(np.ascontiguousarray(c, dtype=np.complex128), wrows, wcols, q, p, nu0, h, s, w, K,
+                                 numba.get_num_threads())
+
+        if uniform:
+            k = np.arange(K)
+            g = np.bincount(k % L, weights=np.real(f * np.exp(-2j * np.pi * k * h * delays[0])), minlength=L) \
+                + 1j * np.bincount(k % L, weights=np.imag(f * np.exp(-2j * np.pi * k * h * delays[0])), minlength=L)
+            F = h * np.exp(-2j * np.pi * nu0 * delays) * np.fft.fft(g)[np.arange(len(delays)) % L]
+        else:
+            nuk = nu0 + h * np.arange(K)
+            F = np.array([h * np.sum(f * np.exp(-2j * np.pi * nuk * t)) for t in delays])
+        # fourier transform of the gaussian kernel
+        G = s * np.sqrt(2 * np.pi) * np.exp(-2 * np.pi ** 2 * s ** 2 * delays ** 2)
+        return F / G
+
+    # spreads the weighted terms c_ab w_a w_b at frequencies p_b - q_a onto the grid nu0 + k h (k < K)
+    # with the gaussian exp(-(nu - nu_k)^2 / (2 s^2)), using 2w points per term. rows are split into
+    # nblocks blocks with private grids that are summed at the end
+    @staticmethod
+    @njit(parallel=True, cache=True)
+    def gridgauss_numba(c, wrows, wcols, q, p, nu0, h, s, w, K, nblocks):
+        grids = np.zeros((nblocks, K), dtype=np.complex128)
+        a2 = (h / s) ** 2 / 2
+        em = np.empty(2 * w)
+        for m in range(2 * w):
+            em[m] = np.exp(-a2 * (m - w + 1) ** 2)
+        rows = c.shape[0]
+        for blk in numba.prange(nblocks):
+            for a in range(blk * rows // nblocks, (blk + 1) * rows // nblocks):
+                for b in range(c.shape[1]):
+                    cab = c[a, b] * wrows[a] * wcols[b]
+                    x = (p[b] - q[a] - nu0) / h
+                    k0 = int(np.floor(x))
+                    d = x - k0
+                    # exp(-a2 (d - m)^2) = exp(-a2 d^2) exp(2 a2 d)^m exp(-a2 m^2)
+                    e1 = np.exp(-a2 * d * d)
+                    e2 = np.exp(2 * a2 * d)
+                    e = e1 * e2 ** (-w + 1)
+                    for m in range(2 * w):
+                        grids[blk, k0 - w + 1 + m] += cab * e * em[m]
+                        e = e * e2
+        return grids.sum(axis=0)
+
+    # runs task(arrays, values_chunk, *args) over chunks of values and returns the concatenated results.
+    # arrays: dict of the (large) inputs. executor:
+    #   'threads': thread pool, the arrays are used directly
+    #   'processes': process pool. the arrays are placed in the process wide shared buffer pool
+    #                (SharedBuffers.defaultpool, blocks are reused by later sweeps), every worker attaches
+    #                to them in its initializer, and tasks only carry the task name and value chunk
+    #   'numba', 'serial': the task is called once for all values (the HOM tasks then use their prange kernels)
+    def mapsweep(self, task, arrays, values, *args, executor='threads', max_workers=None):
+        values = np.asarray(values)
+        if executor in ('numba', 'serial'):
+            return task(arrays, values, *args)
+        if max_workers is None:
+            max_workers = len(os.sched_getaffinity(0))
+        chunks = np.array_split(values, min(len(values), 4 * max_workers))
+        import concurrent.futures
+        if executor == 'processes':
+            import multiprocessing as mp
+            from SharedBuffers import defaultpool
+            pool = defaultpool()
+            # spawned workers: forking once numba's threading layer is running can deadlock
+            with pool.lock:
+                specs = pool.share(arrays)
+                with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context('spawn'), initializer=sweepworkerinit, initargs=(self, specs)) as ex:
+                    results = self.sweepresults([ex.submit(sweepworkertask, task.__name__, c, args) for c in chunks])
+        elif executor == 'threads':
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
+                results = self.sweepresults([ex.submit(task, arrays, c, *args) for c in chunks])
+        else:
+            raise ValueError('Unknown executor ' + str(executor))
+        return np.concatenate(results)
+
+    # results of the sweep futures in order, reporting progress as they complete. if a chunk fails
+    # or the progress callback raises, the chunks that have not started yet are cancelled
+    def sweepresults(self, futures):
+        import concurrent.futures
+        try:
+            for done, future in enumerate(concurrent.futures.as_completed(futures)):
+                future.result()
+                self.reportprogress(done + 1, len(futures))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return [future.result() for future in futures]
+
+    def reportprogress(self, done, total):
+        if self.progress is not None:
+            self.progress(done, total)
+
+    # copies sent to worker processes leave the progress callback behind (progress is reported by the
+    # parent process, see sweepresults)
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['progress'] = None
+        return state
+
+    # HOM interference term (unnormalized) for the delays, see getHOMinterference
+    def homdelays(self, arrays, delays):
+        jsi1, jsa1t2c, exp_prefac = arrays['jsi1'], arrays['jsa1t2c'], arrays['exp_prefac']
+        if self.homexecutor == 'numba':
+            wrows = self.simpsonweights(jsi1.shape[0])
+            wcols = self.simpsonweights(jsi1.shape[1])
+            return self.homdelays_numba(np.ascontiguousarray(jsi1, dtype=np.float64), np.ascontiguousarray(jsa1t2c, dtype=np.complex128),
+                                        np.ascontiguousarray(exp_prefac, dtype=np.complex128), wrows, wcols, np.asarray(delays, dtype=float))
+        return np.array([scipy.integrate.simpson(scipy.integrate.simpson( jsi1 \
+                         - jsa1t2c * np.exp(exp_prefac*delay)   )) for delay in delays])
+
+    # sum_ab w_a w_b (jsi1 - jsa1t2c exp(exp_prefac * delay)) for every delay, w being simpson weights
+    @staticmethod
+    @njit(parallel=True, cache=True)
+    def homdelays_numba(jsi1, jsa1t2c, exp_prefac, wrows, wcols, delays):
+        jsi1sum = 0.0
+        for a in range(jsi1.shape[0]):
+            for b in range(jsi1.shape[1]):
+                jsi1sum += wrows[a] * wcols[b] * jsi1[a, b]
+        out = np.empty(len(delays), dtype=np.complex128)
+        for t in numba.prange(len(delays)):
+            acc = 0j
+            for a in range(jsi1.shape[0]):
+                for b in range(jsi1.shape[1]):
+                    acc += wrows[a] * wcols[b] * jsa1t2c[a, b] * np.exp(exp_prefac[a, b] * delays[t])
+            out[t] = jsi1sum - acc
+        return out
+
+    # normalized HOM interference for the crystal temperatures temps, see getHOMinterferenceT.
+    # arrays: sparse signal/idler meshgrid X, Y, pump envelope pea and delay phase exponential
+    def homtemps(self, arrays, temps, pwl, cl, polingp):
+        X, Y, pea, exponential = arrays['X'], arrays['Y'], arrays['pea'], arrays['exponential']
+        spatial = self.focusing_enable or self.fibre_coupling_enable
+        two_pi = 2 * np.pi
+        invX = 1.0 / X
+        invY = 1.0 / Y
+        lp_xy = self.lambdap(X, Y)
+        pc = self.m / polingp
+        if self.homexecutor == 'numba' and not spatial:
+            wrows = self.simpsonweights(pea.shape[0])
+            wcols = self.simpsonweights(pea.shape[1])
+            pea = np.ascontiguousarray(np.broadcast_to(pea, exponential.shape), dtype=np.complex128)
+            exponential = np.ascontiguousarray(exponential, dtype=np.complex128)
+
+        HOMI = np.empty(len(temps), dtype=complex)
+        for i, T in enumerate(temps):
+            clt = self.thermexpfactor(T)*cl
+
+            # Build dk for both (X,Y) and (Y,X) using shared refractive-index evaluations.
+            ny_lp = self.gridIDX(self.ny, lp_xy, T)
+            ny_x = self.gridIDX(self.ny, X, T)
+            ny_y = self.gridIDX(self.ny, Y, T)
+            nz_x = self.gridIDX(self.nz, X, T)
+            nz_y = self.gridIDX(self.nz, Y, T)
+
+            if self.homexecutor == 'numba' and not spatial:
+                pp = np.ascontiguousarray(np.broadcast_to(ny_lp / lp_xy - pc, exponential.shape), dtype=np.float64)
+                HOMI[i] = self.homtemp_numba(pp, np.ravel(ny_x * invX), np.ravel(ny_y * invY), np.ravel(nz_x * invX),
+                                             np.ravel(nz_y * invY), clt, pea, exponential, wrows, wcols)
+                continue
+
+            dk_xy = two_pi * (ny_lp / lp_xy - ny_x * invX - nz_y * invY - pc)
+            dk_yx = two_pi * (ny_lp / lp_xy - ny_y * invY - nz_x * invX - pc)
+
+            pma_xy = self.PMA(dk_xy, clt, pwl, X, Y, temp=T)
+            pma_yx = self.PMA(dk_yx, clt, pwl, Y, X, temp=T)
+
+            jsa1 = pea * pma_xy
+            jsi1 = np.abs(jsa1)**2
+            jsa2c = np.conjugate(pea * pma_yx)
+            norm = scipy.integrate.simpson(scipy.integrate.simpson( jsi1  )  )
+
+            HOMI[i] = scipy.integrate.simpson(scipy.integrate.simpson( jsi1 \
+                                    - jsa1 * jsa2c * exponential   )) / norm
+        return HOMI
+
+    # normalized HOM interference at one temperature from the phase mismatch terms: pp = n(lp)/lp - m/PP
+    # on the grid, psx/psy = ny(ls)/ls of the signal (columns) and idler (rows) wavelengths, pix/piy the
+    # same with nz. pma, jsa and the simpson sums are formed per grid point, rows in parallel
+    @staticmethod
+    @njit(parallel=True, cache=True)
+    def homtemp_numba(pp, psx, psy, pix, piy, cl, pea, exponential, wrows, wcols):
+        rows, cols = pea.shape
+        num = np.zeros(rows, dtype=np.complex128)
+        den = np.zeros(rows)
+        for a in numba.prange(rows):
+            for b in range(cols):
+                arg = cl * np.pi * (pp[a, b] - psx[b] - piy[a])
+                pm_xy = cl * (np.sin(arg) / arg if arg != 0 else 1.0) * (np.cos(arg) + 1j * np.sin(arg))
+                arg = cl * np.pi * (pp[a, b] - psy[a] - pix[b])
+                pm_yx = cl * (np.sin(arg) / arg if arg != 0 else 1.0) * (np.cos(arg) + 1j * np.sin(arg))
+                jsa1 = pea[a, b] * pm_xy
+                jsi1 = jsa1.real ** 2 + jsa1.imag ** 2
+                w = wrows[a] * wcols[b]
+                num[a] += w * (jsi1 - jsa1 * np.conj(pea[a, b] * pm_yx) * exponential[a, b])
+                den[a] += w * jsi1
+        return num.sum() / den.sum()
+
     #by numerical integration
+    @cachedresult(ignore=('JSIresolution', 'homphase', 'filterfuncs'))
     def getHOMinterference(self, pwl, temp, polingp, qpmorder, tau, cl, signalrange, idlerrange,JSIresolution, pumpshape, delayrange, homphase, refidxfunc, filterfuncs, pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler):
         t0=datetime.now()
         self.m = qpmorder
@@ -959,7 +1792,7 @@ class JSI:
         self.Beamdiameter_signal = beamdiameter_signal
         self.Beamdiameter_idler = beamdiameter_idler
 
-        X, Y = np.meshgrid(signalrange, idlerrange)
+        X, Y = np.meshgrid(signalrange, idlerrange, sparse=True)
 
         self.calcGaussian, self.calcSech, self.calcSinc, self.calcCW = False, False, False, False
         if pumpshape.casefold() =='gaussian':
@@ -993,18 +1826,41 @@ class JSI:
         self.L = cl * self.thermexpfactor(temp)
 
 
-        jsa1 = jsafunc(pwl, X, Y, tau, temp, polingp, cl)
-        jsi1 = np.abs(jsa1)**2
-        jsa2 = jsafunc(pwl, Y, X, tau, temp, polingp, cl)
-        jsa1t2c = jsa1 * np.conjugate(jsa2)
-        exp_prefac = -1j*2*np.pi*Constants().c*(1/X-1/Y)
-        norm = np.sum(scipy.integrate.simpson( jsi1 ))
-        def homf(i):
-            return  scipy.integrate.simpson(scipy.integrate.simpson( jsi1 \
-                   - jsa1t2c * np.exp(exp_prefac*delayrange[i])   ))
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(os.sched_getaffinity(0))) as ex:
-            futures = [ex.submit(homf, i) for i in range(0,len(delayrange))]
-            HOMI = np.array([f.result() for f in futures])
+        if self.lowrank:
+            # same sums as below, evaluated on the factors: the delay phase and the simpson weights
+            # are separable in signal and idler
+            shape = (len(idlerrange), len(signalrange))
+            jsa1 = self.JSAfactors(lambda rows, cols: jsafunc(pwl, self.gridslice(X, rows, cols), self.gridslice(Y, rows, cols), tau, temp, polingp, cl), shape)
+            jsa2 = self.JSAfactors(lambda rows, cols: jsafunc(pwl, self.gridslice(Y, rows, cols), self.gridslice(X, rows, cols), tau, temp, polingp, cl), shape)
+            wrows = self.simpsonweights(shape[0])
+            wcols = self.simpsonweights(shape[1])
+            delays = np.asarray(delayrange)[:, None]
+            rowphase = np.exp(1j * 2 * np.pi * self.const.c * delays / np.ravel(Y)[None, :])
+            colphase = np.exp(-1j * 2 * np.pi * self.const.c * delays / np.ravel(X)[None, :])
+            jsi1sum = jsa1.overlap(jsa1, np.ones((1, shape[0])), np.ones((1, shape[1])), wrows, wcols)[0]
+            norm = jsa1.overlap(jsa1, np.ones((1, shape[0])), np.ones((1, shape[1])), np.ones(shape[0]), wcols)[0]
+            HOMI = jsi1sum - jsa1.overlap(jsa2, rowphase, colphase, wrows, wcols)
+        elif self.homengine == 'fft':
+            # progress between the steps, there is no loop over the delays
+            self.reportprogress(0, 3)
+            jsa1 = jsafunc(pwl, X, Y, tau, temp, polingp, cl)
+            self.reportprogress(1, 3)
+            jsa2 = jsafunc(pwl, Y, X, tau, temp, polingp, cl)
+            self.reportprogress(2, 3)
+            jsi1 = np.abs(jsa1)**2
+            norm = np.sum(scipy.integrate.simpson( jsi1 ))
+            HOMI = scipy.integrate.simpson(scipy.integrate.simpson( jsi1 )) \
+                   - self.homtrace_fft(jsa1, jsa2, np.ravel(Y), np.ravel(X), delayrange)
+            self.reportprogress(3, 3)
+        else:
+            jsa1 = jsafunc(pwl, X, Y, tau, temp, polingp, cl)
+            jsi1 = np.abs(jsa1)**2
+            jsa2 = jsafunc(pwl, Y, X, tau, temp, polingp, cl)
+            jsa1t2c = jsa1 * np.conjugate(jsa2)
+            exp_prefac = -1j*2*np.pi*self.const.c*(1/X-1/Y)
+            norm = np.sum(scipy.integrate.simpson( jsi1 ))
+            arrays = {'jsi1': jsi1, 'jsa1t2c': jsa1t2c, 'exp_prefac': exp_prefac}
+            HOMI = self.mapsweep(self.homdelays, arrays, delayrange, executor=self.homexecutor, max_workers=self.homworkers)
 
         HOMI = np.real(HOMI/norm)
 
@@ -1029,6 +1885,23 @@ class JSI:
         print('calculating HOM took', (t1-t0).total_seconds(), 's')
         return [HOMI,vis,homfwhm]
 
+    # HOM interference of a stored JSA (see storeplots), without recomputing it. The exchanged JSA is
+    # the transpose, so signal and idler axes of the store have to be the same
+    def getHOMfromstore(self, store, delayrange):
+        if store.metadata.get('plotJSI'):
+            raise ValueError('HOM interference needs the joint spectral amplitude, this store holds the JSI')
+        if not np.array_equal(store.signal, store.idler):
+            raise ValueError('HOM interference from a store needs identical signal and idler axes')
+        jsa1 = np.asarray(store['JS'])
+        jsi1 = np.abs(jsa1)**2
+        norm = np.sum(scipy.integrate.simpson( jsi1 ))
+        HOMI = scipy.integrate.simpson(scipy.integrate.simpson( jsi1 )) \
+               - self.homtrace_fft(jsa1, jsa1.T, np.asarray(store.idler), np.asarray(store.signal), delayrange)
+        HOMI = np.real(HOMI/norm)
+        vis = np.abs((np.max(HOMI)-np.min(HOMI))/(np.max(HOMI)))
+        return [HOMI, vis]
+
+    @cachedresult(ignore=('JSIresolution', 'homphase', 'filterfuncs'))
     def getHOMinterferenceT(self, pwl, polingp, qpmorder, tau, cl, signalrange, idlerrange, JSIresolution, pumpshape, temprange, homphase, refidxfunc, filterfuncs, pumpcwbw, focusing_enable, fibre_coupling_enable, focallength_pump, focallength_signal, focallength_idler, beamdiameter_pump, beamdiameter_signal, beamdiameter_idler):
         t0=datetime.now()
         self.focusing_enable = focusing_enable
@@ -1046,7 +1919,7 @@ class JSI:
         # https://arxiv.org/pdf/1211.0120.pdf (On the Purity and Indistinguishability of Down-Converted Photons. Osorio, Sangouard, thew 2012)
         # Ansari, 2013 msc thesis
         #
-        X, Y = np.meshgrid(signalrange, idlerrange)
+        X, Y = np.meshgrid(signalrange, idlerrange, sparse=True)
 
         self.calcGaussian, self.calcSech, self.calcSinc, self.calcCW = False, False, False, False
         pump_param = tau
@@ -1082,48 +1955,13 @@ class JSI:
 
 
 
-        const = Constants()
-        two_pi = 2 * np.pi
-        invX = 1.0 / X
-        invY = 1.0 / Y
-        lp_xy = self.lambdap(X, Y)
-        pea = peafunc(pwl, X, Y, pump_param)
-        exponential = np.exp(-1j * two_pi * const.c * (invX - invY) * delay)
-
-
-        def homf(i):
-            clt = self.thermexpfactor(temprange[i])*cl
-
-            # Build dk for both (X,Y) and (Y,X) using shared refractive-index evaluations.
-            ny_lp = self.ny(lp_xy, temprange[i])
-            ny_x = self.ny(X, temprange[i])
-            ny_y = self.ny(Y, temprange[i])
-            nz_x = self.nz(X, temprange[i])
-            nz_y = self.nz(Y, temprange[i])
-            pc = self.m / polingp
-
-            dk_xy = two_pi * (ny_lp / lp_xy - ny_x * invX - nz_y * invY - pc)
-            dk_yx = two_pi * (ny_lp / lp_xy - ny_y * invY - nz_x * invX - pc)
-
-            pma_xy = pmafunc(dk_xy, clt, pwl, X, Y, temp=temprange[i])
-            pma_yx = pmafunc(dk_yx, clt, pwl, Y, X, temp=temprange[i])
-
-            jsa1 = pea * pma_xy
-            jsi1 = np.abs(jsa1)**2
-            jsa2c = np.conjugate(pea * pma_yx)
-            norm = scipy.integrate.simpson(scipy.integrate.simpson( jsi1  )  )
-
-            return  scipy.integrate.simpson(scipy.integrate.simpson( jsi1 \
-                                    - jsa1 * jsa2c * exponential   )) / norm
-        
-
-        max_workers = len(os.sched_getaffinity(0))
+        arrays = {'X': X, 'Y': Y,
+                  'pea': peafunc(pwl, X, Y, pump_param),
+                  'exponential': np.exp(-1j * 2 * np.pi * self.const.c * (1 / X - 1 / Y) * delay)}
+        max_workers = self.homworkers
         if self.focusing_enable or self.fibre_coupling_enable:
-            max_workers = max_workers//2
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
-            futures = [ex.submit(homf, i) for i in range(0,len(temprange))]
-            HOMI = np.array([f.result() for f in futures])
+            max_workers = max(1, (max_workers or len(os.sched_getaffinity(0)))//2)
+        HOMI = self.mapsweep(self.homtemps, arrays, temprange, pwl, cl, polingp, executor=self.homexecutor, max_workers=max_workers)
 
         # calc FWHM
         if 0:
@@ -1152,51 +1990,79 @@ class JSI:
     def getFWHMvstau(self, pwl, signalrange, idlerrange, temp, polingp, qpmorder, cl, taurange, refidxfunc, filterfuncs, JSIresolution, pumpshape, decprec, usetaucf):
         [self.nx, self.ny, self.nz] = refidxfunc
         self.usetaucf = usetaucf
-        
+        taurange = np.asarray(taurange, dtype=float)
+
+        # pump envelope function and its parameter for every tau (as in the JSA functions)
         self.calcGaussian = False
         self.calcSech = False
         self.calcSinc = False
         self.calcCWGauss = False
         if pumpshape.casefold() =='gaussian':
             self.calcGaussian = True
-            jsifunc = self.JSIgauss
+            peafunc = self.PEAgauss
+            peaparams = self.const.sigmagauss / (taurange * self.const.taucfgauss if self.usetaucf else taurange)
         elif pumpshape.casefold() =='sech^2':
             self.calcSech = True
-            jsifunc = self.JSIsech
+            peafunc = self.PEAsech
+            peaparams = self.const.Bsech * (taurange * self.const.taucfsech if self.usetaucf else taurange)
         elif pumpshape.casefold() =='sinc':
             self.calcSinc = True
-            jsifunc = self.JSIsinc
+            peafunc = self.PEAsinc
+            peaparams = self.const.Bsinc * taurange
         elif pumpshape.casefold() =='cw':
             self.calcCWGauss = True
-            jsifunc = self.JSIcwgauss
+            peafunc = self.PEAcwgauss
+            peaparams = taurange / (2 * np.sqrt(2 * np.log(2)))
         else:
             print('ERROR: Unknown pump beamshape')
 
-        fwhmsig=[]
-        fwhmid=[]
-
         #TMP
         self.useFilter=False
 
-        for h in range(0,len(taurange)):
-            result =jsifunc(pwl, signalrange[:,None], idlerrange[None,:], taurange[h], temp, polingp*self.thermexpfactor(temp), cl)
+        self.filtermatrix = None
+        if self.useFilter:
+            self.filtersignalfunction = filterfuncs[0]
+            self.filteridlerfunction = filterfuncs[1]
+            if not (self.filtersignalfunction==None and self.filteridlerfunction==None):
+                self.filtermatrix = []
+                for i in range(0, len(signalrange)):
+                    filtervector = []
+                    for j in range(0, len(idlerrange)):
+                        filterval = self.filteridlerfunction(signalrange[i]) * self.filtersignalfunction(idlerrange[j])
+                        filtervector.append(filterval)
+                    self.filtermatrix.append(filtervector)
+
+        # the phase matching amplitude does not depend on tau: computed once and shared by the sweep
+        ls, li = signalrange[:,None], idlerrange[None,:]
+        pp = polingp*self.thermexpfactor(temp)
+        pma = self.PMA(self.deltak(self.lambdap(ls, li), ls, li, temp, pp), cl, pwl, ls, li, temp=temp)
+
+        fwhm = self.mapsweep(self.fwhmtaus, {'ls': ls, 'li': li, 'pma': pma}, peaparams, peafunc.__name__, pwl, decprec,
+                             executor=self.sweepexecutor, max_workers=self.sweepworkers)
+        found = ~np.isnan(fwhm[:, 0])
+        fwhmsig = list(fwhm[found, 0])
+        fwhmid = list(fwhm[found, 1])
+        return [fwhmsig,fwhmid]
+
+    # signal and idler FWHM (in nm) of the JSIs |pea(peaparam) * pma|^2 for the pump envelope parameters
+    # peaparams, nan where no half maximum points are found. see getFWHMvstau
+    def fwhmtaus(self, arrays, peaparams, peaname, pwl, decprec):
+        ls, li, pma = arrays['ls'], arrays['li'], arrays['pma']
+        # the wavelength ranges may come in as column vectors (see GUI), hence the ravel
+        signalrange, idlerrange = np.ravel(ls[:, 0]), np.ravel(li[0])
+        peafunc = getattr(self, peaname)
+        fwhm = np.full((len(peaparams), 2), np.nan)
+        for h in range(0,len(peaparams)):
+            jsa = peafunc(pwl, ls, li, peaparams[h]) * pma
+            if self.useabs:
+                jsa = np.absolute(jsa)
+            result = np.abs(jsa) ** 2
             maximum = np.max(result)
             result = result/maximum-0.5
 
             print(f"{result=}")
-            if self.useFilter:
-                self.filtersignalfunction = filterfuncs[0]
-                self.filteridlerfunction = filterfuncs[1]
-                if not (self.filtersignalfunction==None and self.filteridlerfunction==None):
-                    self.filtermatrix = []
-                    for i in range(0, len(signalrange)):
-                        filtervector = []
-                        for j in range(0, len(idlerrange)):
-                            filterval = self.filteridlerfunction(signalrange[i]) * self.filtersignalfunction(idlerrange[j])
-                            filtervector.append(filterval)
-                        self.filtermatrix.append(filtervector)
-                    
-                    result = result*self.filtermatrix
+            if self.useFilter and self.filtermatrix is not None:
+                result = result*self.filtermatrix
             hmptss=[]
             hmptsi=[]
             hmpts=[]
@@ -1211,6 +2077,130 @@ class JSI:
             print(f"{hmptss=}")
             if len(hmptss) != 0:
                 if len(hmptsi) !=0:
-                    fwhmsig.append(max(hmptss)-min(hmptss))
-                    fwhmid.append(max(hmptsi)-min(hmptsi))
-        return [fwhmsig,fwhmid]
+                    fwhm[h] = [max(hmptss)-min(hmptss), max(hmptsi)-min(hmptsi)]
+        return fwhm
+
+
+class FactorizedJSA:
+    # joint spectral amplitude in factorized form JSA = U V^T, U: (M, r) idler factors, V: (N, r) signal factors
+    # (rows and columns of the grids used throughout JSI). See JSI.JSAfactors
+    def __init__(self, U, V):
+        self.U = U
+        self.V = V
+        self.rank = U.shape[1]
+
+    def todense(self):
+        return self.U @ self.V.T
+
+    # schmidt coefficients are the singular values of the r x r core of the orthogonalized factors
+    def singularvalues(self):
+        ru = np.linalg.qr(self.U)[1]
+        rv = np.linalg.qr(self.V)[1]
+        return np.linalg.svd(ru @ rv.T, compute_uv=False)
+
+    def purity(self):
+        s = self.singularvalues()
+        sn = s / np.linalg.norm(s)
+        return np.sum(sn ** 4)
+
+    # marginal intensities: sum over the signal for every idler point, and sum over the idler for
+    # every signal point, optionally with integration weights
+    def marginals(self, wrows=None, wcols=None):
+        wrows = np.ones(self.U.shape[0]) if wrows is None else wrows
+        wcols = np.ones(self.V.shape[0]) if wcols is None else wcols
+        gu = self.U.T @ (wrows[:, None] * self.U.conj())
+        gv = self.V.T @ (wcols[:, None] * self.V.conj())
+        idler = np.real(np.sum((self.U @ gv) * self.U.conj(), axis=1))
+        signal = np.real(np.sum((self.V @ gu) * self.V.conj(), axis=1))
+        return idler, signal
+
+    # sum_ab wrows_a wcols_b rowphase_ta colphase_tb JSA_ab conj(other_ab) for every t
+    def overlap(self, other, rowphase, colphase, wrows, wcols):
+        gu = np.matmul(((rowphase * wrows[None, :])[:, :, None] * self.U[None]).swapaxes(1, 2), other.U.conj())
+        gv = np.matmul(((colphase * wcols[None, :])[:, :, None] * self.V[None]).swapaxes(1, 2), other.V.conj())
+        return np.sum(gu * gv, axis=(1, 2))
+
+
+# consumers of the row blocks of JSI.getplots(..., consumers=[...]). consume(rows, PE, PM, JS) is
+# called for every block, rows being the slice of grid (idler) rows it covers; result() returns
+# what was collected. amplitude: JS blocks are amplitudes (plotJSI False), the intensity is |JS|^2
+
+# norm and marginals of the joint spectral intensity (plain sums over the grid points)
+class TileMarginals:
+    def __init__(self, amplitude=True):
+        self.amplitude = amplitude
+        self.norm = 0.0
+        self.signal = None
+        self.idler = []
+
+    def consume(self, rows, PE, PM, JS):
+        jsi = np.abs(JS) ** 2 if self.amplitude else np.real(JS)
+        self.norm += np.sum(jsi)
+        self.signal = np.sum(jsi, axis=0) if self.signal is None else self.signal + np.sum(jsi, axis=0)
+        self.idler.append(np.sum(jsi, axis=1))
+
+    # norm, signal marginal (sum over the idler), idler marginal (sum over the signal)
+    def result(self):
+        return [self.norm, self.signal, np.concatenate(self.idler)]
+
+
+# gram matrix G = JSA^dagger JSA (signal x signal), accumulated block by block. it has the same
+# nonzero eigenvalues as rho = JSA JSA^dagger, so the purity is Tr[G^2] / Tr[G]^2 (see JSI.purity_gram)
+class TileGram:
+    def __init__(self):
+        self.gram = None
+
+    def consume(self, rows, PE, PM, JS):
+        g = JS.conj().T @ JS
+        self.gram = g if self.gram is None else self.gram + g
+
+    def purity(self):
+        tr = np.real(np.trace(self.gram))
+        return np.sum(np.abs(self.gram) ** 2) / tr ** 2
+
+    def result(self):
+        return [self.purity(), self.gram]
+
+
+# [PE, PM, JS] averaged over blocks of grid points into a (rows, cols) plot buffer
+class TileDownsample:
+    def __init__(self, gridshape, shape):
+        self.gridshape = gridshape
+        self.shape = (min(shape[0], gridshape[0]), min(shape[1], gridshape[1]))
+        shape = self.shape
+        # output bin of every grid column and the first column of every bin
+        self.colbins = np.arange(gridshape[1]) * shape[1] // gridshape[1]
+        self.colstarts = np.searchsorted(self.colbins, np.arange(shape[1]))
+        self.counts = np.zeros(shape)
+        self.buffers = None
+
+    def consume(self, rows, PE, PM, JS):
+        rowbins = np.arange(rows.start, rows.stop) * self.shape[0] // self.gridshape[0]
+        blocks = [np.broadcast_to(a, JS.shape) for a in (PE, PM, JS)]
+        if self.buffers is None:
+            self.buffers = [np.zeros(self.shape, dtype=np.result_type(a.dtype, float)) for a in blocks]
+        for buffer, a in zip(self.buffers, blocks):
+            np.add.at(buffer, rowbins, np.add.reduceat(a, self.colstarts, axis=1))
+        np.add.at(self.counts, rowbins, np.bincount(self.colbins, minlength=self.shape[1])[None, :])
+
+    def result(self):
+        return [buffer / self.counts for buffer in self.buffers]
+
+
+# one of PE, PM, JS (quantity) written block by block into a .npy file that is opened as a memory map
+class TileArray:
+    def __init__(self, filename, gridshape, quantity='JS'):
+        self.filename = filename
+        self.gridshape = gridshape
+        self.quantity = ['PE', 'PM', 'JS'].index(quantity)
+        self.array = None
+
+    def consume(self, rows, PE, PM, JS):
+        a = np.broadcast_to((PE, PM, JS)[self.quantity], JS.shape)
+        if self.array is None:
+            self.array = np.lib.format.open_memmap(self.filename, mode='w+', dtype=a.dtype, shape=tuple(self.gridshape))
+        self.array[rows] = a
+
+    def result(self):
+        self.array.flush()
+        return self.array
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import functools
+import threading
+import types
+
+lock = threading.RLock()
+
+
+# drop-in for numba.njit (@njit or @njit(parallel=True, ...)) that imports numba and compiles the
+# function on its first call instead of at definition, so that importing a module with kernels is
+# cheap. the kernels may use numba (numba.prange, ...) without importing it.
+# signatures: argument types ('f8, f8[::1]', ...) compiled ahead of the first call by warmup. unlike
+# numba.njit(signatures) other argument types are still compiled on demand
+def njit(func=None, signatures=(), **options):
+    if func is None:
+        return lambda func: LazyDispatcher(func, signatures, options)
+    return LazyDispatcher(func, signatures, options)
+
+
+# a dispatcher for the function of dispatcher compiled with other options, e.g. a serial variant of a
+# parallel kernel for scalar arguments. numba caches the compiled code per function name, so the variant
+# is compiled from a copy of the function under its own name (name), with its own cache entries
+def variant(dispatcher, name, signatures=(), **options):
+    func = dispatcher.py_func
+    copy = types.FunctionType(func.__code__, func.__globals__, name, func.__defaults__, func.__closure__)
+    copy.__qualname__ = func.__qualname__[:len(func.__qualname__) - len(func.__name__)] + name
+    copy.__module__ = func.__module__
+    return LazyDispatcher(copy, signatures, options)
+
+
+# compiles the signatures of the dispatchers (see LazyDispatcher.warmup), e.g. from a background thread
+def warmup(dispatchers):
+    for dispatcher in dispatchers:
+        dispatcher.warmup()
+
+
+class LazyDispatcher:
+    def __init__(self, func, signatures, options):
+        functools.update_wrapper(self, func)
+        self.py_func = func
+        self.signatures = signatures
+        self.options = options
+        self.dispatcher = None
+
+    # the numba dispatcher. jitted functions this one calls are compiled first, numba needs them
+    # as dispatchers in the globals of the function
+    def compile(self):
+        with lock:
+            if self.dispatcher is None:
+                import numba
+                funcglobals = self.py_func.__globals__
+                funcglobals.setdefault('numba', numba)
+                for name in self.py_func.__code__.co_names:
+                    if isinstance(funcglobals.get(name), LazyDispatcher):
+                        funcglobals[name] = funcglobals[name].compile()
+                self.dispatcher = numba.njit(**self.options)(self.py_func)
+        return self.dispatcher
+
+    # compiles the declared signatures now. with cache=True they are loaded from numba's on-disk cache
+    # (__pycache__) if the source is unchanged, so only the first session pays for the compilation
+    def warmup(self):
+        dispatcher = self.compile()
+        for signature in self.signatures:
+            dispatcher.compile(signature)
+        return dispatcher
+
+    def __call__(self, *args, **kwargs):
+        dispatcher = self.dispatcher
+        if dispatcher is None:
+            dispatcher = self.compile()
+        return dispatcher(*args, **kwargs)
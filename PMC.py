@@ -3,7 +3,8 @@
 
 import numpy as np
 import scipy
-import scipy.optimize
+from RefractiveIndex import RefractiveIndex
+from ResultCache import cachedresult
 
 class PMC:
         def __init__(self):
@@ -18,6 +19,10 @@ class PMC:
             self.PP=46.2 * 10 ** (-6)
             self.m=1
 
+            # tuning curves are cached (see ResultCache), keyed on the arguments and these attributes
+            self.usecache = True
+            self.cacheattributes = ['TXCa', 'TXCb', 'TXrefT']
+
         # thermal expansion factor
         def thermexpfactor(self, T):
             return (1 + self.TXCa * (T - self.TXrefT) + self.TXCb * (T - self.TXrefT) * (T - self.TXrefT))
@@ -34,16 +39,52 @@ class PMC:
 
         #this wrapper returns a list of functions(phasematching conditions) that only takes signal- and idler-wavelength as arguments
         def epconvonlywl(self,T,PP):
+                return self.epconvandjaconlywl(T,PP)[0]
+
+        #same as epconvonlywl, but additionally returns the analytic jacobian of the phasematching conditions
+        #(None if the refractive index functions have no known derivative).
+        #the pump term is evaluated only once, and the jacobian reuses the refractive indices of the last function evaluation
+        def epconvandjaconlywl(self,T,PP):
+                ny, nz = self.ny, self.nz
+                dny = RefractiveIndex.getDerivative(self.ny)
+                dnz = RefractiveIndex.getDerivative(self.nz)
+                if np.size(T) == 1:
+                        #single temperature: the solver evaluates the indices with floats, see RefractiveIndex.getScalar
+                        T = float(np.ravel(T)[0])
+                        ny, nz = RefractiveIndex.getScalar(ny), RefractiveIndex.getScalar(nz)
+                        if dny is not None and dnz is not None:
+                                dny, dnz = RefractiveIndex.getScalar(dny), RefractiveIndex.getScalar(dnz)
+                pp = ny(self.lp,T)/self.lp
+                pc = self.m/PP
+                last = {}
+                def nsni(ls, li):
+                        if last.get('x') != (ls, li):
+                                last['x'] = (ls, li)
+                                last['n'] = (ny(ls,T), nz(li,T))
+                        return last['n']
+
                 def epconv(x):
                         #x[0]:lambda_s
                         #x[1]:lambda_i
+                        ns, ni = nsni(x[0], x[1])
                         ec = self.econv(x[0],x[1])
-                        pc = self.pconv(x[0],x[1],T,PP)
-                        if isinstance(pc, list) or isinstance(pc,np.ndarray):
-                                return [ec, float(pc[0])]
-                        else:
-                                return [ec, float(pc)]
-                return epconv
+                        pcv = pp - ns/x[0] - ni/x[1] - pc
+                        return [ec, pcv if isinstance(pcv, float) else float(np.ravel(pcv)[0])]
+
+                if dny is None or dnz is None:
+                        return epconv, None
+
+                def epjac(x):
+                        #x[0]:lambda_s
+                        #x[1]:lambda_i
+                        ls, li = x[0], x[1]
+                        ns, ni = nsni(ls, li)
+                        dpcdls = -(dny(ls,T) - ns/ls)/ls
+                        dpcdli = -(dnz(li,T) - ni/li)/li
+                        if isinstance(dpcdls, float) and isinstance(dpcdli, float):
+                                return [[1/ls**2, 1/li**2], [dpcdls, dpcdli]]
+                        return [[1/ls**2, 1/li**2], [np.ravel(dpcdls)[0], np.ravel(dpcdli)[0]]]
+                return epconv, epjac
 
         #returns signal and idler wavelengths that satisfy phasematching conditions for a given pumpwavelength, temperature and poling period
         def SIwls(self,x):
@@ -54,7 +95,53 @@ class PMC:
                 if isinstance(x[1],list):
                         print("hi")
                         x[1]=x[1][0]
-                return scipy.optimize.fsolve(self.epconvonlywl(x[1], x[2]), [2 * x[0], 2 * x[0]], xtol=1e-6)
+                epconv, epjac = self.epconvandjaconlywl(x[1], x[2])
+                return scipy.optimize.fsolve(epconv, [2 * x[0], 2 * x[0]], fprime=epjac, xtol=1e-6)
+
+        #phasematching condition with the idler wavelength eliminated by energy conservation
+        def pconvonlyls(self, lp, ls, T, PP):
+                li = 1 / (1 / lp - 1 / ls)
+                return self.ny(lp, T) / lp - self.ny(ls, T) / ls - self.nz(li, T) / li - self.m / PP
+
+        #returns signal and idler wavelengths for whole arrays of temperatures and/or poling periods at once.
+        #the phasematching condition (idler eliminated via energy conservation) is solved for the
+        #signal wavelength with a vectorized newton iteration. points that do not converge fall back to SIwls
+        def SIwls_batch(self, lp, T, PP, xtol=1e-12, maxiter=50):
+                T, PP = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(PP, dtype=float))
+                T = np.ascontiguousarray(T)
+                PP = np.ascontiguousarray(PP)
+
+                dny = RefractiveIndex.getDerivative(self.ny)
+                dnz = RefractiveIndex.getDerivative(self.nz)
+
+                ls = np.full(T.shape, 2.0 * lp)
+                converged = np.zeros(T.shape, dtype=bool)
+                for i in range(0, maxiter):
+                        f = self.pconvonlyls(lp, ls, T, PP)
+                        if dny is None or dnz is None:
+                                h = ls * 1e-7
+                                dfdls = (self.pconvonlyls(lp, ls + h, T, PP) - self.pconvonlyls(lp, ls - h, T, PP)) / (2 * h)
+                        else:
+                                # dli/dls = li^2/ls^2 from energy conservation
+                                li = 1 / (1 / lp - 1 / ls)
+                                dfdls = -(dny(ls, T) - self.ny(ls, T) / ls) / ls \
+                                        - (dnz(li, T) - self.nz(li, T) / li) / ls**2
+                        step = f / dfdls
+                        lsnew = ls - step
+                        # keep iterates on the physical branch (ls > lp, so that li > 0)
+                        lsnew = np.where(lsnew > lp, lsnew, (ls + lp) / 2)
+                        converged = np.abs(lsnew - ls) <= xtol * np.abs(ls)
+                        ls = lsnew
+                        if np.all(converged):
+                                break
+                li = 1 / (1 / lp - 1 / ls)
+
+                failed = ~(converged & np.isfinite(ls) & np.isfinite(li))
+                if np.any(failed):
+                        self.lp = lp
+                for idx in zip(*np.nonzero(failed)):
+                        ls[idx], li[idx] = self.SIwls([lp, T[idx], PP[idx]])
+                return ls, li
 
         #returns a function that only depends on the poling period
         def wlgaponlyT(self,PP,lp):
@@ -70,7 +157,66 @@ class PMC:
                         return swl - iwl
                 return wlgap2
 
+        #phase mismatch (without 2pi) at degeneracy, i.e. for lambda_s = lambda_i = 2*lambda_p.
+        #the crossing point is the root of this function, no signal/idler solve is needed
+        def degeneratepconv(self, lp, T, PP):
+                return self.ny(lp, T) / lp - (self.ny(2 * lp, T) + self.nz(2 * lp, T)) / (2 * lp) - self.m / PP
+
+        #crossing point temperature: bracketed 1-D root of degeneratepconv in T.
+        #the bracket is grown outward from Tguess, so the root closest to Tguess is returned
+        def getTcp(self, lp, PP, Tguess=50, Tstep=1, Tmaxstep=10**4):
+                def f(T):
+                        return float(np.ravel(self.degeneratepconv(lp, T, PP))[0])
+                if np.size(lp) == 1 and np.size(PP) == 1:
+                        #degeneratepconv with floats, see RefractiveIndex.getScalar
+                        lp, PP = float(np.ravel(lp)[0]), float(np.ravel(PP)[0])
+                        ny, nz = RefractiveIndex.getScalar(self.ny), RefractiveIndex.getScalar(self.nz)
+                        def f(T):
+                                return ny(lp, T) / lp - (ny(2 * lp, T) + nz(2 * lp, T)) / (2 * lp) - self.m / PP
+                flo = fhi = f(Tguess)
+                if flo == 0:
+                        return Tguess
+                lo = hi = Tguess
+                d = Tstep
+                while d <= Tmaxstep:
+                        a, b = Tguess - d, Tguess + d
+                        fa, fb = f(a), f(b)
+                        if np.sign(fb) != np.sign(fhi):
+                                return scipy.optimize.brentq(f, hi, b, xtol=1e-12)
+                        if np.sign(fa) != np.sign(flo):
+                                return scipy.optimize.brentq(f, a, lo, xtol=1e-12)
+                        lo, flo, hi, fhi = a, fa, b, fb
+                        d = 2 * d
+                print('Warning: no crossing point temperature found')
+                return np.nan
+
+        #poling period of the crossing point at temperature T. degeneratepconv is linear in 1/PP, so this is closed form
+        def getPPcp(self, lp, T):
+                dk0 = self.degeneratepconv(lp, T, np.inf)
+                return float(np.ravel(self.m / dk0)[0])
+
+        #signal and idler wavelengths at temperature(s) T, without the crossing point search
+        #(e.g. to centre the wavelength window of a calculation). cached like getSI_wl_varT
+        @cachedresult()
+        def getSI_wl(self,pumpwl,polingp,T,refidxfunc,qpmorder):
+
+                self.m=qpmorder
+                self.lp=pumpwl
+                self.PP = polingp
+
+                self.nx = refidxfunc[0]
+                self.ny = refidxfunc[1]
+                self.nz = refidxfunc[2]
+
+                txf = self.thermexpfactor(np.asarray(T))
+                sigwl, idwl = self.SIwls_batch(pumpwl, T, polingp * txf)
+
+                #return:
+                #signal wavelength, idler wavelength
+                return [sigwl,idwl]
+
         #calculate signal and idler wavelengths. Temperature is variated
+        @cachedresult()
         def getSI_wl_varT(self,pumpwl,polingp,Trange,refidxfunc,qpmorder):
 
                 self.m=qpmorder
@@ -81,22 +227,19 @@ class PMC:
                 self.ny = refidxfunc[1]
                 self.nz = refidxfunc[2]
 
-                sigwl=np.zeros(len(Trange))
-                idwl=np.zeros(len(Trange))
-                txf = self.thermexpfactor(Trange)
-                for i in range(0,len(Trange)):
-                        [sigwl[i],idwl[i]]=self.SIwls([pumpwl,Trange[i],polingp*txf[i]])
+                txf = self.thermexpfactor(np.asarray(Trange))
+                sigwl, idwl = self.SIwls_batch(pumpwl, Trange, polingp * txf)
 
                 #calculate the crossing point temperature
-                Tcp=0
                 Tcpguess=50
-                Tcp=scipy.optimize.fsolve(self.wlgaponlyT(polingp,pumpwl),Tcpguess)
+                Tcp=self.getTcp(pumpwl,polingp,Tcpguess)
                 
                 #return:
                 #signal wavelength, idler wavelength, crossing point temperature
-                return [sigwl,idwl,Tcp[0]]
+                return [sigwl,idwl,Tcp]
 
         # calculate signal and idler wavelengths. PP is variated
+        @cachedresult()
         def getSI_wl_varPP(self, pumpwl, PPrange, T, refidxfunc, qpmorder):
 
                 self.m = qpmorder
@@ -107,17 +250,12 @@ class PMC:
                 self.nz = refidxfunc[2]
                 self.T = T
 
-                sigwl = np.zeros(len(PPrange))
-                idwl = np.zeros(len(PPrange))
-                txf = self.thermexpfactor(PPrange)
-                for i in range(0, len(PPrange)):
-                        [sigwl[i], idwl[i]] = self.SIwls([pumpwl, T, PPrange[i] * txf[i]])
+                txf = self.thermexpfactor(np.asarray(PPrange))
+                sigwl, idwl = self.SIwls_batch(pumpwl, T, np.asarray(PPrange) * txf)
 
-                # calculate the crossing point temperature
-                PPcp = 0
-                PPguess = ((PPrange[-1]-PPrange[0])/2)
-                PPcp = scipy.optimize.fsolve(self.wlgaponlyPP(T, pumpwl), PPguess)
+                # calculate the crossing point poling period
+                PPcp = self.getPPcp(pumpwl, T)
 
                 # return:
-                # signal wavelength, idler wavelength, crossing point temperature
-                return [sigwl, idwl, PPcp[0]]
+                # signal wavelength, idler wavelength, crossing point poling period
+                return [sigwl, idwl, PPcp]
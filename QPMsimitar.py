@@ -1,17 +1,9 @@
 #!/usr/bin/env python3
 
-has_qt6 = False
-try:
-    from PyQt6.QtWidgets import QApplication
-    has_qt6 = True
-except ModuleNotFoundError:
-    print("Qt6 not found. Usingg Qt5 fallback")
-    from PyQt5.QtWidgets import QApplication
-from GUI import GUI
-from RefractiveIndex import RefractiveIndex
-from PMC import PMC
-from Constants import Constants
+import argparse
+import ruamel.yaml as yaml
 from Settings import Settings
+from Constants import Constants
 import sys
 
 class QPMsimitar:
@@ -21,12 +13,57 @@ class QPMsimitar:
         self.config.loadSettings()
         constants=Constants()
         print(constants.pi)
+        # Qt is only imported for the GUI, batch runs (see main) work without it
+        from GUI import GUI
         self.gui=GUI(self.config)
 
     def showGUI(self):
         self.gui.showWindow()
 
+#command line: without a command the GUI is started. Otherwise the calculation is run headless
+#with the parameters of the config file (optionally overridden with --set) and the results are
+#written to a .npz file, see Batch
+def main(argv):
+    from Batch import Batch
+    parser = argparse.ArgumentParser(description='QPM simulation tool. Without a command the GUI is started.')
+    parser.add_argument('command', nargs='?', choices=Batch.commands, help='calculation to run without the GUI')
+    parser.add_argument('--config', default='config.yaml', help='settings file (default: config.yaml)')
+    parser.add_argument('--output', default=None, help='result file (default: <command>_<date>_<time>.npz)')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help="override a setting, e.g. --set 'Crystal Temperature single=30'")
+    parser.add_argument('--jsi', action='store_true', help='jsi: calculate the JSI instead of the JSA')
+    args = parser.parse_args(argv)
+    if args.command is None:
+        return None
+
+    config = Settings()
+    config.standardSettings()
+    config.loadSettings(args.config)
+    for setting in args.set:
+        key, sep, val = setting.partition('=')
+        if not sep or config.get(key.strip()) is None:
+            parser.error('unknown setting ' + setting)
+        # values are parsed like in the config file
+        config.set(key.strip(), yaml.YAML(typ='safe', pure=True).load(val))
+    batch = Batch(config)
+    if args.command == 'jsi':
+        results = batch.jsi(plotJSI=args.jsi)
+    else:
+        results = batch.run(args.command)
+    path = batch.save(results, args.output, args.command)
+    print('Results written to ' + path)
+    return path
+
 if __name__ == '__main__':
+    if main(sys.argv[1:]) is not None:
+        sys.exit(0)
+    has_qt6 = False
+    try:
+        from PyQt6.QtWidgets import QApplication
+        has_qt6 = True
+    except ModuleNotFoundError:
+        print("Qt6 not found. Usingg Qt5 fallback")
+        from PyQt5.QtWidgets import QApplication
     app = QApplication(sys.argv)
     MPA = QPMsimitar()
     if has_qt6:
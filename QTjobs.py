@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import cProfile
+import pstats
+import traceback
+
+try:
+    from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+except ModuleNotFoundError:
+    from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from JSI import JSI
+
+
+# raised from the progress callback of a cancelled job, unwinds the calculation
+class JobCancelled(Exception):
+    pass
+
+
+#signals of a job. they are emitted from the pool thread and delivered in the GUI thread
+class JobSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+#one background calculation for a QThreadPool: compute(jsi) is called with a new JSI instance
+#whose progress callback emits signals.progress. cancel() is cooperative, the calculation stops at
+#the next progress report of the JSI loops (a job that has not started yet does not run at all).
+#with profile set, the calculation is run under cProfile and the statistics are printed
+class Job(QRunnable):
+    def __init__(self, compute, name='', profile=False):
+        QRunnable.__init__(self)
+        # the GUI keeps the job until it is done
+        self.setAutoDelete(False)
+        self.compute = compute
+        self.name = name
+        self.profile = profile
+        self.cancelrequested = False
+        self.signals = JobSignals()
+
+    def run(self):
+        jsi = JSI()
+        jsi.progress = self.report
+        try:
+            if self.cancelrequested:
+                raise JobCancelled()
+            if self.profile:
+                profile = cProfile.Profile()
+                result = profile.runcall(self.compute, jsi)
+                ps = pstats.Stats(profile)
+                ps.strip_dirs().sort_stats('tottime').print_stats(10)
+            else:
+                result = self.compute(jsi)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit('{0:s}: {1:s}'.format(type(e).__name__, str(e)))
+            return
+        self.signals.finished.emit(result)
+
+    def report(self, done, total):
+        if self.cancelrequested:
+            raise JobCancelled()
+        self.signals.progress.emit(done, total)
+
+    def cancel(self):
+        self.cancelrequested = True
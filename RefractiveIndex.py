@@ -1,18 +1,31 @@
 #!/usr/bin/env python3
+import collections
 import numpy as np
-import numba
+from numpy.polynomial import Polynomial
+from LazyNumba import njit, variant
+
+# argument types of the sellmeier kernels (wavelength, temperature, sellmeier, thermal, tref, lowest)
+# that are compiled ahead of time by RefractiveIndex.warmup: scalars from the solvers, 1-D arrays for
+# tuning curves and 2-D arrays for the JSA grids, with float or integer temperatures
+IDXSIGNATURES = ['{0}, {1}, f8[:, ::1], f8[:, ::1], f8, i8'.format(l, t) for l, t in
+                 [('f8', 'f8'), ('f8', 'i8'), ('f8[::1]', 'f8'), ('f8[::1]', 'i8'), ('f8[::1]', 'f8[::1]'),
+                  ('f8[:, ::1]', 'f8'), ('f8[:, ::1]', 'i8')]]
+# the derivatives are only needed by the solvers and for tables, i.e. for scalars and 1-D arrays
+DLSIGNATURES = IDXSIGNATURES[:5]
+# single floats (see SellmeierIndex.scalar)
+SCALARSIGNATURES = IDXSIGNATURES[:2]
 
 class RefractiveIndex:
     def __init__(self):
         self.initConstants()
-        self.materialList = ['PPKTP','KTP']
+        # materials and papers come from the model registry (see registerSellmeier at the end of the file).
+        # only the materials the calculations support are offered (see calculationmaterials)
+        self.materialList = list(calculationmaterials)
         self.material = 'PPKTP'
 
-        PPKTPIndices = [['kato'], ['koenig', 'kato'], ['fradkin', 'kato', 'kato2']]
-        KTPIndices = [['kato'], ['koenig', 'kato'], ['fradkin', 'kato', 'kato2']]
         self.AvailableIndices = []
-        self.AvailableIndices.append(['PPKTP', PPKTPIndices])
-        self.AvailableIndices.append(['KTP', KTPIndices])
+        for material, models in sellmeiermodels.items():
+            self.AvailableIndices.append([material, [list(models[pol]) for pol in ['X', 'Y', 'Z']]])
 
     def setMaterial(self,material):
         if material in self.materialList:
@@ -40,214 +53,361 @@ class RefractiveIndex:
             return -1
 
     def getIDX(self,crystaltype,IDXtype):
-        global ridz, ridy, ridx
-        success = 0
         if (len(IDXtype)!=3):
             print('Error: need 3 entries when requesting refractive indices (for nx, ny and nz')
             return -1
-        if (crystaltype=='PPKTP'):
-            if (IDXtype[0]=='kato'):
-                ridx = self.PPKTP_nx_kato
-                success = success + 1
-            else:
-                print('Error: no refractive index type ' , IDXtype[0] , 'known')
-
-            if (IDXtype[1]=='könig'):
-                ridy=self.PPKTP_ny_koenig
-                success = success + 1
-            elif (IDXtype[1]=='kato'):
-                ridy=self.PPKTP_ny_kato
-                success = success + 1
-            else:
-                print('Error: no refractive index type ' , IDXtype[1] , 'known')
-
-            if (IDXtype[2]=='fradkin'):
-                ridz = self.PPKTP_nz_fradkin
-                success = success + 1
-            elif (IDXtype[2] == 'kato'):
-                ridz = self.PPKTP_nz_kato
-                success = success + 1
-            elif (IDXtype[2]=='kato2'):
-                ridz=self.PPKTP_nz2_kato
-                success = success + 1
-            else:
-                print('Error: no refractive index type ' , IDXtype[2] , 'known')
-
-            if (success==3):
-                return [ridx, ridy, ridz]
-            else:
-                print('Error occured.')
-                return -1
-
-        else:
+        if crystaltype not in sellmeiermodels:
             print('Error: Crystal type unknown')
             return -1
+        # getIDX has always taken the spelling 'könig'
+        IDXtype = [{'könig': 'koenig'}.get(paper, paper) for paper in IDXtype]
+        idxfuncs = [self.getSingleIDX(crystaltype, pol, paper) for pol, paper in zip(['X', 'Y', 'Z'], IDXtype)]
+        if any(isinstance(idxfunc, int) for idxfunc in idxfuncs):
+            print('Error occured.')
+            return -1
+        return idxfuncs
 
     def getSingleIDX(self,material,pol,paper):
-        if (material == 'PPKTP' or material == 'KTP'):
-            if (pol == 'X'):
-                if (paper == 'kato'):
-                    return self.PPKTP_nx_kato
-                else:
-                    print('Error: Paper unknown')
-                    return -1
-            elif (pol == 'Y'):
-                if (paper == 'kato'):
-                    return self.PPKTP_ny_kato
-                elif (paper == 'koenig'):
-                    return self.PPKTP_ny_koenig
-                else:
-                    print('Error: Paper unknown')
-                    return -1
-            elif (pol == 'Z'):
-                if (paper == 'kato'):
-                    return self.PPKTP_nz_kato
-                if (paper == 'kato2'):
-                    return self.PPKTP_nz2_kato
-                elif (paper == 'fradkin'):
-                    return self.PPKTP_nz_fradkin
-                else:
-                    print('Error: Paper unknown')
-                    return -1
-            else:
-                print('Error: Polarizaion unknown')
-                return -1
-        else:
+        if material not in sellmeiermodels:
             print('Error: Material unknown')
             return -1
+        if pol not in sellmeiermodels[material]:
+            print('Error: Polarizaion unknown')
+            return -1
+        if paper not in sellmeiermodels[material][pol]:
+            print('Error: Paper unknown')
+            return -1
+        return sellmeiermodels[material][pol][paper]
+
+    # returns a tabulated version of a refractive index function (see TabulatedIndex)
+    def getTabulatedIDX(self, material, pol, paper, wlmin, wlmax, tol=1e-10):
+        idxfunc = self.getSingleIDX(material, pol, paper)
+        if isinstance(idxfunc, int):
+            return -1
+        return TabulatedIndex(idxfunc, wlmin, wlmax, tol)
+
+    # returns the wavelength derivative dn/dλ belonging to a refractive index function
+    # obtained from getIDX/getSingleIDX, or None if no analytic derivative is known
+    @staticmethod
+    def getDerivative(idxfunc):
+        if isinstance(idxfunc, (TabulatedIndex, SellmeierIndex)):
+            return idxfunc.dl
+        return None
+
+    # scalar fast path of an index function (or of its derivative from getDerivative) for solvers that
+    # evaluate it point by point with floats: the compiled kernel is called directly with the model
+    # coefficients, without the wrapper and LazyNumba layers. other functions (tabulated or user
+    # supplied ones) are returned unchanged
+    @staticmethod
+    def getScalar(idxfunc):
+        if isinstance(idxfunc, SellmeierIndex):
+            return idxfunc.scalar()
+        owner = getattr(idxfunc, '__self__', None)
+        if isinstance(owner, SellmeierIndex) and idxfunc.__name__ == 'dl':
+            return owner.scalar(derivative=True)
+        return idxfunc
+
+    # compiles the kernels of the refractive index functions idxfuncs (from getIDX/getSingleIDX/
+    # getTabulatedIDX) and of their derivatives before the first calculation needs them
+    @staticmethod
+    def warmup(idxfuncs):
+        for idxfunc in idxfuncs:
+            if isinstance(idxfunc, TabulatedIndex):
+                TabulatedIndex.chebval_numba.warmup()
+                idxfunc = idxfunc.idxfunc
+            if isinstance(idxfunc, SellmeierIndex):
+                idxfunc.warmup()
 
     def initConstants(self):
         # speed of light in µm/s
         c = 299792458000000
 
-        # refractive indices fit parameters
-        # emanueli & arie 2003
-        self.a1z = np.array([9.9587 * 10 ** (-6), 9.9228 * 10 ** (-6), -8.9603 * 10 ** (-6), 4.1010 * 10 ** (-6)])
-        self.a2z = np.array([-1.1882 * 10 ** (-8), 10.459 * 10 ** (-8), -9.8136 * 10 ** (-8), 3.1481 * 10 ** (-8)])
-        self.a1y = np.array([6.2897 * 10 ** (-6), 6.3061 * 10 ** (-6), -6.0629 * 10 ** (-6), 2.6486 * 10 ** (-6)])
-        self.a2y = np.array([-0.14445 * 10 ** (-8), 2.2244 * 10 ** (-8), -3.5770 * 10 ** (-8), 1.3470 * 10 ** (-8)])
-
-        # refractive indices fit parameters
-        # kato & takaoka 2002
-        # thermal
-        self.ax = np.array([0.1627, 0.8416, -0.5353, 0.1717])
-        self.ay = np.array([0.5425, 0.5154, -0.4063, 0.1997])
-        self.az = np.array([-0.1897, 3.6677, -2.9220, 0.9221])
-        self.az2 = np.array([-0.5523, 3.3920, -1.7101, 0.3424])
-        # sellmeier
-        self.fnx = np.array([3.2910, 0.04140, -0.03978, 9.35522, -31.45571])
-        self.fny = np.array([3.45018, 0.04341, -0.04597, 16.98825, -39.43799])
-        self.fnz = np.array([4.59423, 0.06206, -0.04763, 110.80672, -86.12171])
-
         # Thermal expansion coefficients of KTP
         # (Emanueli 2003)
         self.TXCa = 6.7 * 10 ** (-6)
         self.TXCb = 11 * 10 ** (-9)
         self.TXrefT = 25
 
-    # refractive indices
-    def PPKTP_ny_koenig(self, lin, t):
-        # input in meter, equations for µm
-        return self.PPKTP_ny_koenig_numba(lin, t, self.a1y, self.a2y)
+    # thermal expansion factor
+    def thermexpfactor(self, T):
+        dT=T - self.TXrefT
+        return (1 + self.TXCa * dT + self.TXCb * dT**2)
+
+
+class TabulatedIndex:
+    # refractive index function n(λ, T) served from chebyshev tables in wavelength.
+    # one table per temperature is built by sampling idxfunc at chebyshev nodes on [wlmin, wlmax],
+    # doubling the degree until the interpolation error is below tol. Tables are kept in an LRU
+    # cache, so repeated lookups at the same temperature only evaluate the polynomial.
+    # wavelengths outside [wlmin, wlmax] and non-uniform temperature arrays are evaluated directly.
+    def __init__(self, idxfunc, wlmin, wlmax, tol=1e-10, maxdeg=128, maxtables=256):
+        self.idxfunc = idxfunc
+        self.wlmin = wlmin
+        self.wlmax = wlmax
+        self.wlmid = (wlmax + wlmin) / 2
+        self.wlhalf = (wlmax - wlmin) / 2
+        self.tol = tol
+        self.maxdeg = maxdeg
+        self.maxtables = maxtables
+        self.tables = collections.OrderedDict()
+
+    # identity for the result cache (the tables themselves are derived data)
+    def cachekey(self):
+        return [self.idxfunc, self.wlmin, self.wlmax, self.tol, self.maxdeg]
+
+    def table(self, t):
+        key = float(t)
+        if key in self.tables:
+            self.tables.move_to_end(key)
+            return self.tables[key]
+        def f(x):
+            return self.idxfunc(self.wlmid + self.wlhalf * x, key)
+        xcheck = np.linspace(-1, 1, 4 * self.maxdeg + 1)
+        ncheck = f(xcheck)
+        deg = 8
+        while True:
+            c = np.polynomial.chebyshev.chebinterpolate(f, deg)
+            err = np.max(np.abs(self.chebval_numba(xcheck, 0.0, 1.0, c) - ncheck))
+            if err <= self.tol or deg >= self.maxdeg:
+                break
+            deg = 2 * deg
+        dc = np.polynomial.chebyshev.chebder(c) / self.wlhalf
+        self.tables[key] = (c, dc)
+        if len(self.tables) > self.maxtables:
+            self.tables.popitem(last=False)
+        return self.tables[key]
+
+    def evaluate(self, lin, t, which, direct):
+        if np.ndim(t) != 0:
+            tarr = np.asarray(t)
+            if tarr.size == 0 or np.any(tarr != tarr.flat[0]):
+                return direct(lin, t)
+            t = tarr.flat[0]
+        lin = np.asarray(lin, dtype=float)
+        n = self.chebval_numba(np.ravel(lin), self.wlmid, self.wlhalf, self.table(t)[which]).reshape(lin.shape)
+        outside = np.isnan(n)
+        if np.any(outside):
+            n[outside] = direct(lin[outside], t)
+        return n if n.ndim else n[()]
+
+    def __call__(self, lin, t):
+        return self.evaluate(lin, t, 0, self.idxfunc)
+
+    # wavelength derivative dn/dλ (per meter) from the same tables
+    def dl(self, lin, t):
+        return self.evaluate(lin, t, 1, self.directdl)
+
+    def directdl(self, lin, t):
+        dl = RefractiveIndex.getDerivative(self.idxfunc)
+        if dl is None:
+            h = lin * 1e-7
+            return (self.idxfunc(lin + h, t) - self.idxfunc(lin - h, t)) / (2 * h)
+        return dl(lin, t)
+
+    # clenshaw recurrence for a chebyshev series on [wlmid - wlhalf, wlmid + wlhalf], one independent
+    # loop per point. Points outside the interval are returned as nan
     @staticmethod
-    @numba.njit(parallel=True)
-    def PPKTP_ny_koenig_numba(lin, t, a1y, a2y):
-        l = lin * 10 ** 6
-        ll = l**2
-        linv = 1/l
-        # könig, wong 2002
-        # emanueli 2003
-        f1 = a1y[0] + linv * (a1y[1] + linv * (a1y[2] + (a1y[3] *linv)))
-        f2 = a2y[0] + linv * (a2y[1] + linv * (a2y[2] + (a2y[3] *linv)))
-        f3 = np.sqrt(np.abs(-0.0138408 * ll + 0.922683 / (1 - 0.0467695 / ll) + 2.0993))
-        return (t - 25) * ( f1 +  (t - 25) * f2 )  + f3
-
-    # refractive indices
-    def PPKTP_nz_fradkin(self, lin, t):
-        return self.PPKTP_nz_fradkin_numba(lin, t, self.a1z, self.a2z)
+    @njit(signatures=['f8[::1], f8, f8, f8[::1]'], parallel=True, cache=True)
+    def chebval_numba(lin, wlmid, wlhalf, c):
+        out = np.empty_like(lin)
+        for k in numba.prange(lin.size):
+            x = (lin[k] - wlmid) / wlhalf
+            if abs(x) > 1:
+                out[k] = np.nan
+                continue
+            x2 = 2 * x
+            b1 = 0.0
+            b2 = 0.0
+            for j in range(len(c) - 1, 0, -1):
+                b0 = x2 * b1 - b2 + c[j]
+                b2 = b1
+                b1 = b0
+            out[k] = x * b1 - b2 + c[0]
+        return out
+
+
+# polynomial with coefficients c (ascending powers) at x, horner scheme. x may be a scalar or an array
+@njit(cache=True)
+def polyval_numba(c, x):
+    y = c[-1] + 0 * x
+    for i in range(len(c) - 2, -1, -1):
+        y = y * x + c[i]
+    return y
+
+
+class SellmeierIndex:
+    # refractive index function n(λ, T) of a sellmeier model given by its coefficients (λ in meter,
+    # T in °C). with λ in µm and dT = T - tref:
+    #   n = sqrt(|A + D λ² + Σ_k (B_k + E_k λ²) / (λ² - C_k)|) + Σ_j dT^j λ^lowest Σ_i thermal[j-1][i] λ^i
+    # A (constant), D (ir) and the terms (B_k, E_k, C_k) are numbers or polynomials in T (ascending
+    # coefficients), so temperature dependent sellmeier fits and room temperature fits with a
+    # thermo-optic polynomial in λ are evaluated by the same two kernels. name identifies the model
+    def __init__(self, name, constant, terms=(), ir=0, thermal=(), tref=20, lowest=0):
+        self.name = name
+        polys = [constant, ir] + [c for term in terms for c in term]
+        polys = [np.atleast_1d(np.asarray(p, dtype=float)) for p in polys]
+        self.sellmeier = np.zeros((len(polys), max(len(p) for p in polys)))
+        for row, p in zip(self.sellmeier, polys):
+            row[:len(p)] = p
+        thermal = [np.atleast_1d(np.asarray(p, dtype=float)) for p in thermal] or [np.zeros(1)]
+        self.thermal = np.zeros((len(thermal), max(len(p) for p in thermal)))
+        for row, p in zip(self.thermal, thermal):
+            row[:len(p)] = p
+        self.tref = float(tref)
+        self.lowest = int(lowest)
+
+    def __repr__(self):
+        return 'SellmeierIndex(' + self.name + ')'
+
+    # identity for the result cache
+    def cachekey(self):
+        return [self.name, self.sellmeier, self.thermal, self.tref, self.lowest]
+
+    def __call__(self, lin, t):
+        return self.sellmeier_numba(lin, t, self.sellmeier, self.thermal, self.tref, self.lowest)
+
+    # wavelength derivative dn/dλ (per meter)
+    def dl(self, lin, t):
+        return self.sellmeier_dl_numba(lin, t, self.sellmeier, self.thermal, self.tref, self.lowest)
+
+    # n(λ, T) (or dn/dλ) for floats, calling the compiled serial kernel directly (see RefractiveIndex.getScalar)
+    def scalar(self, derivative=False):
+        kernel = (self.sellmeier_dl_scalar_numba if derivative else self.sellmeier_scalar_numba).compile()
+        sellmeier, thermal, tref, lowest = self.sellmeier, self.thermal, self.tref, self.lowest
+        def scalaridx(lin, t):
+            return kernel(lin, t, sellmeier, thermal, tref, lowest)
+        return scalaridx
+
+    # the kernels are shared by all models, so this compiles them once for all of them
+    def warmup(self):
+        self.sellmeier_numba.warmup()
+        self.sellmeier_dl_numba.warmup()
+        self.sellmeier_scalar_numba.warmup()
+        self.sellmeier_dl_scalar_numba.warmup()
+
     @staticmethod
-    @numba.njit(parallel=True)
-    def PPKTP_nz_fradkin_numba(lin, t, a1z, a2z):
+    @njit(signatures=IDXSIGNATURES, parallel=True, cache=True)
+    def sellmeier_numba(lin, t, sellmeier, thermal, tref, lowest):
         # input in meter, equations for µm
         l = lin * 10 ** 6
         ll = l**2
-        linv = 1/l
-        # fradkin, arie, skilar, rosenman 1999
-        # emanueli 2003
-        f1 = a1z[0] + linv * (a1z[1] + linv * (a1z[2] + (a1z[3] *linv)))
-        f2 = a2z[0] + linv * (a2z[1] + linv * (a2z[2] + (a2z[3] *linv)))
-        f3 = np.sqrt(np.abs(-0.00968956 * ll + 1.18431 / (1 - 0.0514852 / ll) + 0.6603 / (1 - 100.005 / ll) + 2.12725))
-        return (t - 25) * (f1 + (t - 25)  * f2 ) + f3
-
-    # refractive indices
-    def PPKTP_nx_kato(self, lin, t):
-        # input in meter, equations for µm
-        return self.PPKTP_nx_kato_numba(lin, t, self.fnx, self.ax)
-    @staticmethod
-    @numba.njit(parallel=True)
-    def PPKTP_nx_kato_numba(lin, t, fnx, ax):
-        l = lin * 10 ** 6
-        linv=1/l
-        ll= l**2
-        # kato & takaoka 2002
-        # note that this is at 20°C
-        nx = np.sqrt(fnx[0] + fnx[1] / (ll + fnx[2]) + fnx[3] / (ll + fnx[4]))
-        # change of nx per °C
-        dnxdT = (ax[0] + linv * (ax[1] + linv*(ax[2] + linv*ax[3]))) * 10 ** (-5)
-        dT = t - 20
-        return (nx + dT * dnxdT)
-
-    def PPKTP_ny_kato(self, lin, t):
-        return self.PPKTP_ny_kato_numba(lin, t, self.fny, self.ay)
+        nn = polyval_numba(sellmeier[0], t) + polyval_numba(sellmeier[1], t) * ll
+        for k in range(2, sellmeier.shape[0], 3):
+            nn = nn + (polyval_numba(sellmeier[k], t) + polyval_numba(sellmeier[k + 1], t) * ll) \
+                 / (ll - polyval_numba(sellmeier[k + 2], t))
+        n = np.sqrt(np.abs(nn))
+        dT = t - tref
+        dTj = dT
+        for j in range(thermal.shape[0]):
+            n = n + dTj * polyval_numba(thermal[j], l) * l ** lowest
+            dTj = dTj * dT
+        return n
+
     @staticmethod
-    @numba.njit(parallel=True)
-    def PPKTP_ny_kato_numba(lin, t, fny, ay):
-        # input in meter, equations for µm
+    @njit(signatures=DLSIGNATURES, parallel=True, cache=True)
+    def sellmeier_dl_numba(lin, t, sellmeier, thermal, tref, lowest):
         l = lin * 10 ** 6
-        linv=1/l
-        ll = l**2
-        # kato & takaoka 2002
-        # note that this is at 20°C
-        ny = np.sqrt(fny[0] + fny[1] / (ll + fny[2]) + fny[3] / (ll + fny[4]))
-        # change of nx per °C
-        dnydT = (ay[0] + linv * (ay[1] + linv*(ay[2] + linv*ay[3] ))) * 10 ** (-5)
-        dT = t - 20
-        return (ny + dT * dnydT)
-
-    def PPKTP_nz_kato(self, lin, t):
-        return self.PPKTP_nz_kato_numba(lin, t, self.fnz, self.az)
-    @staticmethod
-    @numba.njit(parallel=True)
-    def PPKTP_nz_kato_numba(lin, t, fnz, az):
-        #input in meter, equations for µm
-        l=lin*10**6
-        linv=1/l
         ll = l**2
-        # kato & takaoka 2002
-        # note that this is at 20°C
-        nz = np.sqrt(fnz[0] + fnz[1] / (ll + fnz[2]) + fnz[3] / (ll + fnz[4]))
-        # change of nx per °C
-        dnzdT = (az[0] + linv*(az[1] + linv*(az[2] + linv*az[3] ))) * 10 ** (-5)
-        dT = t - 20
-        return (nz + dT * dnzdT)
-
-    def PPKTP_nz2_kato(self, lin, t):
-        return self.PPKTP_nz2_kato_numba(lin, t, self.fnz, self.az2)
-    @staticmethod
-    @numba.njit(parallel=True)
-    def PPKTP_nz2_kato_numba(lin, t, fnz, az2):
-        #input in meter, equations for µm
-        l=lin*10**6
-        ll=l**2
-        # kato & takaoka 2002
-        # note that this is at 20°C
-        nz = np.sqrt(fnz[0] + fnz[1] / (ll + fnz[2]) + fnz[3] / (ll + fnz[4]))
-        # change of nx per °C
-        dnzdT = (az2[0]/l + az2[1] + az2[2] * l + az2[3] * ll) * 10 ** (-5)
-        dT = t - 20
-        return (nz + dT * dnzdT)
+        ir = polyval_numba(sellmeier[1], t)
+        nn = polyval_numba(sellmeier[0], t) + ir * ll
+        dnn = 2 * l * ir
+        for k in range(2, sellmeier.shape[0], 3):
+            b = polyval_numba(sellmeier[k], t)
+            e = polyval_numba(sellmeier[k + 1], t)
+            c = polyval_numba(sellmeier[k + 2], t)
+            nn = nn + (b + e * ll) / (ll - c)
+            dnn = dnn - 2 * l * (b + e * c) / (ll - c)**2
+        dn = np.sign(nn) * dnn / (2 * np.sqrt(np.abs(nn)))
+        # d/dλ (λ^lowest p(λ)) = λ^(lowest - 1) (lowest p(λ) + λ p'(λ))
+        dT = t - tref
+        dTj = dT
+        for j in range(thermal.shape[0]):
+            th = thermal[j]
+            p = th[-1] + 0 * l
+            dp = 0 * l
+            for i in range(len(th) - 2, -1, -1):
+                dp = dp * l + p
+                p = p * l + th[i]
+            dn = dn + dTj * (lowest * p + l * dp) * l ** (lowest - 1)
+            dTj = dTj * dT
+        return dn * 10 ** 6
 
-    # thermal expansion factor
-    def thermexpfactor(self, T):
-        dT=T - self.TXrefT
-        return (1 + self.TXCa * dT + self.TXCb * dT**2)
+    # serial variants of the kernels for single floats, where parallel=True only adds overhead
+    sellmeier_scalar_numba = staticmethod(variant(sellmeier_numba.__func__, 'sellmeier_scalar_numba', SCALARSIGNATURES, cache=True))
+    sellmeier_dl_scalar_numba = staticmethod(variant(sellmeier_dl_numba.__func__, 'sellmeier_dl_scalar_numba', SCALARSIGNATURES, cache=True))
+
+
+# refractive index models: sellmeiermodels[material][pol][paper]. the first paper of each
+# polarization is the default. materials and papers are listed in the order they are registered
+sellmeiermodels = collections.OrderedDict()
+
+def registerSellmeier(materials, pol, paper, model):
+    for material in materials:
+        models = sellmeiermodels.setdefault(material, collections.OrderedDict(
+            [(p, collections.OrderedDict()) for p in ['X', 'Y', 'Z']]))
+        models[pol][paper] = model
+
+
+KTP = ['PPKTP', 'KTP']
+
+# kato & takaoka 2002, at 20°C: n² = A + B1 / (λ² - C1) + B2 / (λ² - C2), thermo-optic
+# coefficients dn/dT = (a0 + a1/λ + a2/λ² + a3/λ³) 10^-5 (kato2: a0/λ + a1 + a2 λ + a3 λ²)
+registerSellmeier(KTP, 'X', 'kato', SellmeierIndex(
+    'KTP:X:kato', 3.2910, [(0.04140, 0, 0.03978), (9.35522, 0, 31.45571)],
+    thermal=[10 ** (-5) * np.array([0.1717, -0.5353, 0.8416, 0.1627])], tref=20, lowest=-3))
+
+# könig & wong 2002 (Y) and fradkin et al. 1999 (Z): n² = A + E1 λ² / (λ² - C1) (+ E2 λ² / (λ² - C2)) - D λ²,
+# thermal fit of emanueli & arie 2003: dn = dT n1(λ) + dT² n2(λ), dT = T - 25°C, n1,2 = Σ a_i / λ^i
+registerSellmeier(KTP, 'Y', 'koenig', SellmeierIndex(
+    'KTP:Y:koenig', 2.0993, [(0, 0.922683, 0.0467695)], ir=-0.0138408,
+    thermal=[[2.6486 * 10 ** (-6), -6.0629 * 10 ** (-6), 6.3061 * 10 ** (-6), 6.2897 * 10 ** (-6)],
+             [1.3470 * 10 ** (-8), -3.5770 * 10 ** (-8), 2.2244 * 10 ** (-8), -0.14445 * 10 ** (-8)]],
+    tref=25, lowest=-3))
+registerSellmeier(KTP, 'Y', 'kato', SellmeierIndex(
+    'KTP:Y:kato', 3.45018, [(0.04341, 0, 0.04597), (16.98825, 0, 39.43799)],
+    thermal=[10 ** (-5) * np.array([0.1997, -0.4063, 0.5154, 0.5425])], tref=20, lowest=-3))
+
+registerSellmeier(KTP, 'Z', 'fradkin', SellmeierIndex(
+    'KTP:Z:fradkin', 2.12725, [(0, 1.18431, 0.0514852), (0, 0.6603, 100.005)], ir=-0.00968956,
+    thermal=[[4.1010 * 10 ** (-6), -8.9603 * 10 ** (-6), 9.9228 * 10 ** (-6), 9.9587 * 10 ** (-6)],
+             [3.1481 * 10 ** (-8), -9.8136 * 10 ** (-8), 10.459 * 10 ** (-8), -1.1882 * 10 ** (-8)]],
+    tref=25, lowest=-3))
+registerSellmeier(KTP, 'Z', 'kato', SellmeierIndex(
+    'KTP:Z:kato', 4.59423, [(0.06206, 0, 0.04763), (110.80672, 0, 86.12171)],
+    thermal=[10 ** (-5) * np.array([0.9221, -2.9220, 3.6677, -0.1897])], tref=20, lowest=-3))
+registerSellmeier(KTP, 'Z', 'kato2', SellmeierIndex(
+    'KTP:Z:kato2', 4.59423, [(0.06206, 0, 0.04763), (110.80672, 0, 86.12171)],
+    thermal=[10 ** (-5) * np.array([-0.5523, 3.3920, -1.7101, 0.3424])], tref=20, lowest=-1))
+
+# 5% MgO doped congruent LiNbO3, gayer et al. 2008 (0.5 - 4 µm, 20 - 200°C):
+# n² = a1 + b1 f + (a2 + b2 f) / (λ² - (a3 + b3 f)²) + (a4 + b4 f) / (λ² - a5²) - a6 λ²,
+# f = (T - 24.5)(T + 570.82). the coefficients are polynomials in T
+def gayer(name, a, b):
+    f = Polynomial([-24.5 * 570.82, 570.82 - 24.5, 1])
+    return SellmeierIndex(name, (a[0] + b[0] * f).coef,
+                          [((a[1] + b[1] * f).coef, 0, ((a[2] + b[2] * f) ** 2).coef), ((a[3] + b[3] * f).coef, 0, a[4] ** 2)],
+                          ir=-a[5])
+
+PPLNo = gayer('PPLN:o:gayer', [5.653, 0.1185, 0.2091, 89.61, 10.85, 1.97 * 10 ** (-2)],
+              [7.941 * 10 ** (-7), 3.134 * 10 ** (-8), -4.641 * 10 ** (-9), -2.188 * 10 ** (-6)])
+PPLNe = gayer('PPLN:e:gayer', [5.756, 0.0983, 0.2020, 189.32, 12.52, 1.32 * 10 ** (-2)],
+              [2.860 * 10 ** (-6), 4.700 * 10 ** (-8), 6.113 * 10 ** (-8), 1.516 * 10 ** (-4)])
+registerSellmeier(['PPLN'], 'X', 'gayer', PPLNo)
+registerSellmeier(['PPLN'], 'Y', 'gayer', PPLNo)
+registerSellmeier(['PPLN'], 'Z', 'gayer', PPLNe)
+
+# beta-BaB2O4, eimerl et al. 1987: n² = A + B / (λ² - C) - D λ², dn/dT constant
+# (o: -9.3, e: -16.6 10^-6 / °C). uniaxial, optic axis along Z
+BBOo = SellmeierIndex('BBO:o:eimerl', 2.7405, [(0.0184, 0, 0.0179)], ir=-0.0155,
+                      thermal=[[-9.3 * 10 ** (-6)]], tref=20)
+BBOe = SellmeierIndex('BBO:e:eimerl', 2.3730, [(0.0128, 0, 0.0156)], ir=-0.0044,
+                      thermal=[[-16.6 * 10 ** (-6)]], tref=20)
+registerSellmeier(['BBO'], 'X', 'eimerl', BBOo)
+registerSellmeier(['BBO'], 'Y', 'eimerl', BBOo)
+registerSellmeier(['BBO'], 'Z', 'eimerl', BBOe)
+
+# materials offered for calculations (GUI, Batch). The phase matching and JSA code assumes type-II
+# down conversion in KTP: ny for pump and signal, nz for the idler, and the thermal expansion of KTP
+# (initConstants). The PPLN and BBO models need their own polarisations and expansion coefficients,
+# until then they are only available through getSingleIDX/getIDX
+calculationmaterials = KTP
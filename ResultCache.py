@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+# hashlib and pickle are imported where keys are hashed and results go to disk, this module is loaded
+# with JSI (see JSI.py)
+import collections
+import functools
+import inspect
+import numbers
+import os
+import threading
+import numpy as np
+
+
+# cache of calculation results, addressed by a hash of everything the result depends on (see resultkey).
+# results are kept in memory in least recently used order up to maxbytes (numpy array sizes), and
+# optionally pickled to diskdir, where they survive the session
+class ResultCache:
+    def __init__(self, maxbytes=2 ** 30, diskdir=None):
+        self.maxbytes = maxbytes
+        self.diskdir = diskdir
+        self.entries = collections.OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    # (True, result) if key is cached, (False, None) otherwise
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, self.entries[key][0]
+        if self.diskdir is not None and os.path.isfile(self.diskfile(key)):
+            import pickle
+            with open(self.diskfile(key), 'rb') as stream:
+                result = pickle.load(stream)
+            self.put(key, result, disk=False)
+            self.hits += 1
+            return True, result
+        self.misses += 1
+        return False, None
+
+    def put(self, key, result, disk=True):
+        size = resultsize(result)
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key)[1]
+            if size <= self.maxbytes:
+                self.entries[key] = (result, size)
+                self.nbytes += size
+            while self.nbytes > self.maxbytes:
+                self.nbytes -= self.entries.popitem(last=False)[1][1]
+        if disk and self.diskdir is not None:
+            import pickle
+            os.makedirs(self.diskdir, exist_ok=True)
+            # write to a temporary file first, so that no partially written result is ever read
+            try:
+                with open(self.diskfile(key) + '.tmp', 'wb') as stream:
+                    pickle.dump(result, stream, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError) as err:
+                # e.g. a user supplied closure among the attributes, the result stays in memory only
+                print('Warning: result not written to the disk cache: ' + str(err))
+                os.remove(self.diskfile(key) + '.tmp')
+                return
+            os.replace(self.diskfile(key) + '.tmp', self.diskfile(key))
+
+    def diskfile(self, key):
+        return os.path.join(self.diskdir, key + '.pkl')
+
+    def clear(self, disk=False):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+        if disk and self.diskdir is not None and os.path.isdir(self.diskdir):
+            for name in os.listdir(self.diskdir):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.diskdir, name))
+
+
+# process wide result cache (created on first use)
+def defaultcache():
+    global cache
+    if cache is None:
+        cache = ResultCache()
+    return cache
+
+cache = None
+
+
+# disk tier of the default cache, from the 'Result cache directory' setting (None or '': memory only)
+def setdiskdir(diskdir):
+    defaultcache().diskdir = diskdir or None
+
+
+# method decorator: results are taken from the default cache if the method was called before with the
+# same arguments (except those named in ignore, which the result does not depend on) on an instance
+# with the same configuration attributes (self.cacheattributes). the instance must have usecache set.
+# calls with arguments that can not be hashed, or with one of the arguments named in uncached not
+# None (e.g. tile consumers), bypass the cache. the attributes the method sets on the instance (those
+# that are new or refer to another object afterwards) are cached with the result and set again on a
+# cache hit, later calls may depend on them (e.g. useFilter). arrays are cached as read only views,
+# without copies, and every call gets fresh lists of read only arrays (see freeze)
+def cachedresult(ignore=(), uncached=()):
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not getattr(self, 'usecache', False):
+                return method(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            if any(bound.arguments[name] is not None for name in uncached):
+                return method(self, *args, **kwargs)
+            arguments = {name: value for name, value in bound.arguments.items() if name != 'self' and name not in ignore}
+            config = {name: getattr(self, name, None) for name in getattr(self, 'cacheattributes', [])}
+            try:
+                key = resultkey(method.__qualname__, arguments, config)
+            except TypeError:
+                return method(self, *args, **kwargs)
+            found, entry = defaultcache().get(key)
+            if found:
+                # fresh containers and views, also for entries just loaded from disk
+                result, attributes = freeze(entry)
+                vars(self).update(attributes)
+                return result
+            before = dict(vars(self))
+            result = method(self, *args, **kwargs)
+            attributes = {name: value for name, value in vars(self).items()
+                          if name not in before or before[name] is not value}
+            entry = freeze((result, attributes))
+            defaultcache().put(key, entry)
+            result, attributes = freeze(entry)
+            vars(self).update(attributes)
+            return result
+        return wrapper
+    return decorator
+
+
+# result with its arrays replaced by read only views (no copies), in rebuilt containers
+def freeze(result):
+    if isinstance(result, np.ndarray):
+        view = result.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(result, (list, tuple)):
+        return type(result)(freeze(x) for x in result)
+    if isinstance(result, dict):
+        return {name: freeze(value) for name, value in result.items()}
+    return result
+
+
+# sha256 of a canonical serialization of the objects (see feedkey)
+def resultkey(*objs):
+    import hashlib
+    h = hashlib.sha256()
+    for obj in objs:
+        feedkey(h, obj, set())
+    return h.hexdigest()
+
+
+# canonical serialization: numbers by value (so 25, 25.0 and np.float64(25) are the same), arrays by
+# dtype, shape and content, containers element wise, functions by qualified name, closure values and
+# bound instance, partials by function and bound arguments. objects with a cachekey() method are described by it, other objects by their type
+# and attributes. anything else raises TypeError
+def feedkey(h, obj, seen):
+    if obj is None:
+        h.update(b'N')
+    elif isinstance(obj, (bool, np.bool_)):
+        h.update(b'B1' if obj else b'B0')
+    elif isinstance(obj, numbers.Real):
+        h.update(b'R' + float(obj).hex().encode())
+    elif isinstance(obj, numbers.Complex):
+        h.update(b'C' + complex(obj).real.hex().encode() + complex(obj).imag.hex().encode())
+    elif isinstance(obj, str):
+        h.update(b'S%d:' % len(obj) + obj.encode())
+    elif isinstance(obj, np.ndarray):
+        if obj.dtype.hasobject:
+            feedkey(h, obj.tolist(), seen)
+            return
+        h.update(b'A' + obj.dtype.str.encode() + repr(obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).data)
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'L%d:' % len(obj))
+        for x in obj:
+            feedkey(h, x, seen)
+    elif isinstance(obj, dict):
+        h.update(b'D%d:' % len(obj))
+        for k in sorted(obj, key=str):
+            feedkey(h, str(k), seen)
+            feedkey(h, obj[k], seen)
+    elif inspect.ismethod(obj):
+        h.update(b'M' + obj.__func__.__qualname__.encode())
+        feedkey(h, obj.__self__, seen)
+    elif inspect.isfunction(obj):
+        h.update(b'F' + obj.__module__.encode() + b'.' + obj.__qualname__.encode())
+        feedkey(h, inspect.getclosurevars(obj).nonlocals, seen)
+    elif isinstance(obj, functools.partial):
+        h.update(b'P')
+        feedkey(h, [obj.func, list(obj.args), obj.keywords], seen)
+    elif hasattr(obj, 'cachekey'):
+        h.update(b'K' + type(obj).__qualname__.encode())
+        feedkey(h, obj.cachekey(), seen)
+    elif hasattr(obj, '__dict__') and not callable(obj):
+        if id(obj) in seen:
+            h.update(b'O')
+            return
+        seen.add(id(obj))
+        h.update(b'O' + type(obj).__module__.encode() + b'.' + type(obj).__qualname__.encode())
+        feedkey(h, vars(obj), seen)
+    else:
+        raise TypeError('no cache key for ' + type(obj).__name__)
+
+
+# memory held by a result: numpy arrays by size, everything else as a small constant
+def resultsize(result):
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    if isinstance(result, (list, tuple)):
+        return 64 + sum(resultsize(x) for x in result)
+    if isinstance(result, dict):
+        return 64 + sum(resultsize(x) for x in result.values())
+    return 64
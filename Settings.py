@@ -2,17 +2,91 @@
 
 import ruamel.yaml as yaml
 from pathlib import Path
+from RefractiveIndex import RefractiveIndex
 
 class ValueNotFoundError(Exception):
     pass
 
 
 class Settings:
+    # attribute names of the calculation parameters and the settings they are read from, shared by
+    # the GUI and Batch (the crystal material and refractive indices are checked in getProperties)
+    properties = [
+        ("JITwarmup", "JIT warm-up"),
+        ("ProfileJobs", "Profile calculations"),
+        ("ResultCacheDir", "Result cache directory"),
+        ("CrystalPolingPeriodFrom", "Crystal Poling Period From"),
+        ("CrystalPolingPeriodSingle", "Crystal Poling Period Single"),
+        ("CrystalPolingPeriodTo", "Crystal Poling Period To"),
+        ("PumpWlFrom", "Pump wavelength from"),
+        ("PumpWlSingle", "Pump wavelength single"),
+        ("PumpWlTo", "Pump wavelength to"),
+        ("SIWlFrom", "SI wavelength from"),
+        ("SIWlSingle", "SI wavelength single"),
+        ("SIWlTo", "SI wavelength to"),
+        ("PulsewidthFrom", "Pump pulsewidth from"),
+        ("PulsewidthSingle", "Pump pulsewidth single"),
+        ("PulsewidthTo", "Pump pulsewidth to"),
+        ("PumpCWbwFrom", "Pump cw bandwidth from"),
+        ("PumpCWbwSingle", "Pump cw bandwidth single"),
+        ("PumpCWbwTo", "Pump cw bandwidth to"),
+        ("PumpShape", "Pump pulse shape"),
+        ("PumpShapeApplyDeconvolutionFactor", "Pump pulsewidth apply deconvolution factor"),
+        ("CrystalTempFrom", "Crystal Temperature from"),
+        ("CrystalTempSingle", "Crystal Temperature single"),
+        ("CrystalTempTo", "Crystal Temperature to"),
+        ("CrystalLengthFrom", "Crystal Length from"),
+        ("CrystalLengthSingle", "Crystal Length single"),
+        ("CrystalLengthTo", "Crystal Length to"),
+        ("QPMOrder", "QPM Order"),
+        ("JSIwlRange", "JSI wavelength range"),
+        ("JSIresolution", "JSI resolution"),
+        ("PurityWLresolution", "Purity wavelength resolution"),
+        ("PurityTauresolution", "Purity tau resolution"),
+        ("PurityWLrange", "Purity wavelength range"),
+        ("Focusing_enable", "Enable Focusing"),
+        ("Fibrecoupling_enable", "Enable Fibre Coupling"),
+        ("Focallength_pump", "Focallength Pump"),
+        ("Focallength_signal", "Focallength Signal"),
+        ("Focallength_idler", "Focallength Idler"),
+        ("Beamdiameter_pump", "Beamdiameter Pump"),
+        ("Beamdiameter_signal", "Beamdiameter Signal"),
+        ("Beamdiameter_idler", "Beamdiameter Idler"),
+        ("SIfilterIdlerType", "SI filter Idler Type"),
+        ("SIfilterSignalType", "SI filter Signal Type"),
+        ("SIfilterIdlerCenterWL", "SI filter Idler center wavelength"),
+        ("SIfilterSignalCenterWL", "SI filter Signal center wavelength"),
+        ("SIfilterIdlerFWHM", "SI filter Idler FWHM"),
+        ("SIfilterSignalFWHM", "SI filter Signal FWHM"),
+        ("HOMresolution", "HOM interference plot resolution"),
+        ("HOMdelayrange", "HOM interference plot range"),
+        ("HOMtemprange", "HOM interference plot temperature range"),
+        ("HOMphase", "HOM interference plot phase"),
+        ("fwhmres", "FWHM plot resolution"),
+        ("fwhmprecision", "FWHM decimal precision"),
+    ]
+
     def __init__(self):
         pass
 
-    def saveSettings(self):
-        with open('config.yaml','w') as stream:
+    # sets the calculation parameters as attributes of obj (GUI or Batch). a crystal material or
+    # refractive index that is not available falls back to the first available one
+    def getProperties(self, obj):
+        materials = RefractiveIndex().materialList
+        obj.CrystalMaterial = self.get('Crystal Material')
+        if obj.CrystalMaterial not in materials:
+            obj.CrystalMaterial = materials[0]
+        available = RefractiveIndex().getAvailableRefractiveIndices(obj.CrystalMaterial)
+        for i, axis in enumerate(['X', 'Y', 'Z']):
+            idx = self.get("Crystal Refractive Index " + axis)
+            if idx not in available[i]:
+                idx = available[i][0]
+            setattr(obj, 'CrystalN' + axis, idx)
+        for attr, key in self.properties:
+            setattr(obj, attr, self.get(key))
+
+    def saveSettings(self, path='config.yaml'):
+        with open(path,'w') as stream:
             try:
                 print('Writing config file')
                 tmpconfig = yaml.YAML(typ='safe', pure=True)
@@ -92,9 +166,15 @@ class Settings:
         self.config.append(["Focallength Signal", 10.0])
         self.config.append(["Focallength Idler", 10.0])
 
-    def loadSettings(self):
-        if Path('config.yaml').is_file():
-            with open('config.yaml') as stream:
+        self.config.append(["JIT warm-up", True])
+        # run the GUI calculations under cProfile and print the statistics (QTjobs.Job)
+        self.config.append(["Profile calculations", False])
+        # results are also kept in this directory across sessions, empty: in memory only (ResultCache)
+        self.config.append(["Result cache directory", ""])
+
+    def loadSettings(self, path='config.yaml'):
+        if Path(path).is_file():
+            with open(path) as stream:
                 try:
                     print('Reading config file.')
                     tmpconfig = yaml.YAML(typ='safe', pure=True)
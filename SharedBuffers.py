@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import atexit
+import threading
+import numpy as np
+from multiprocessing import shared_memory
+
+
+# numpy arrays copied once into shared memory blocks, so that worker processes can use them
+# without pickling the data for every task. specs is a small picklable {name: (block, shape, dtype)}
+# description; workers call SharedArrays.attach(specs) and get views onto the same memory.
+# the creating side owns the blocks and unlinks them on close (use as a context manager)
+class SharedArrays:
+    def __init__(self, arrays=None):
+        self.blocks = []
+        self.arrays = {}
+        self.specs = {}
+        self.owner = True
+        if arrays is not None:
+            for name, arr in arrays.items():
+                self.add(name, arr)
+
+    def add(self, name, arr):
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+        view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+        view[...] = arr
+        self.blocks.append(shm)
+        self.arrays[name] = view
+        self.specs[name] = (shm.name, arr.shape, arr.dtype.str)
+        return view
+
+    # worker side: views onto the blocks described by specs. the blocks are not unlinked on close
+    @classmethod
+    def attach(cls, specs):
+        shared = cls()
+        shared.owner = False
+        for name, (block, shape, dtype) in specs.items():
+            shm = shared_memory.SharedMemory(name=block)
+            shared.blocks.append(shm)
+            shared.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            shared.specs[name] = (block, shape, dtype)
+        return shared
+
+    def close(self):
+        # drop the views first, a block can not be closed while arrays still export its buffer
+        self.arrays = {}
+        for shm in self.blocks:
+            shm.close()
+            if self.owner:
+                shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# named shared memory buffers that persist between calls, so that repeated sweeps reuse their blocks
+# instead of allocating (and transferring) new ones. get(name, shape, dtype) returns a view onto the
+# block of that name, which is only replaced if it is too small. share(arrays) copies arrays into the
+# pool (arrays that already are pool views are not copied) and returns the specs for
+# SharedArrays.attach. lock serializes users of the pool, since names are reused
+class SharedBufferPool:
+    def __init__(self):
+        self.blocks = {}
+        self.arrays = {}
+        self.specs = {}
+        self.lock = threading.RLock()
+        atexit.register(self.close)
+
+    def get(self, name, shape, dtype=float):
+        dtype = np.dtype(dtype)
+        shape = tuple(int(n) for n in np.atleast_1d(shape))
+        nbytes = max(1, int(np.prod(shape)) * dtype.itemsize)
+        with self.lock:
+            shm = self.blocks.get(name)
+            if shm is None or shm.size < nbytes:
+                self.release(name)
+                shm = shared_memory.SharedMemory(create=True, size=nbytes)
+                self.blocks[name] = shm
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            self.arrays[name] = view
+            self.specs[name] = (shm.name, shape, dtype.str)
+            return view
+
+    def put(self, name, arr):
+        arr = np.asarray(arr)
+        with self.lock:
+            if self.arrays.get(name) is arr:
+                return arr
+            view = self.get(name, arr.shape, arr.dtype)
+            view[...] = arr
+            return view
+
+    def share(self, arrays):
+        with self.lock:
+            for name, arr in arrays.items():
+                self.put(name, arr)
+            return {name: self.specs[name] for name in arrays}
+
+    def release(self, name):
+        with self.lock:
+            shm = self.blocks.pop(name, None)
+            self.arrays.pop(name, None)
+            self.specs.pop(name, None)
+            if shm is not None:
+                try:
+                    shm.close()
+                except BufferError:
+                    # views handed out earlier are still alive, the mapping goes away with them
+                    pass
+                shm.unlink()
+
+    def close(self):
+        with self.lock:
+            for name in list(self.blocks):
+                self.release(name)
+
+
+# process wide buffer pool (created on first use)
+def defaultpool():
+    global pool
+    if pool is None:
+        pool = SharedBufferPool()
+    return pool
+
+pool = None
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from JSI import JSI
+from RefractiveIndex import RefractiveIndex
+
+
+# nx, ny, nz of PPKTP as selected in the default settings
+@pytest.fixture(scope='session')
+def ktp():
+    R = RefractiveIndex()
+    return [R.getSingleIDX('PPKTP', 'X', 'kato'), R.getSingleIDX('PPKTP', 'Y', 'koenig'), R.getSingleIDX('PPKTP', 'Z', 'fradkin')]
+
+
+# a JSI without the result cache, so that every call is actually computed
+@pytest.fixture
+def jsi():
+    j = JSI()
+    j.usecache = False
+    return j
+
+
+# pump wavelength, poling period, temperature and crystal length of the default settings (degenerate
+# type-II down conversion at 809.74 nm)
+PUMPWL, PP, TEMP, LENGTH = 404.87e-9, 10e-6, 28.66, 10e-3
+
+
+# signal and idler axes around the degenerate point
+@pytest.fixture(scope='session')
+def axes():
+    return np.linspace(807.24e-9, 812.24e-9, 49), np.linspace(807.24e-9, 812.24e-9, 49)
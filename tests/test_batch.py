@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from Batch import Batch
+from RefractiveIndex import RefractiveIndex
+from Settings import Settings
+import QPMsimitar
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CONFIG = os.path.join(ROOT, 'config.yaml')
+
+
+# the jsi command writes the grids of getplots, computed with the overridden settings
+def test_main_jsi(tmp_path):
+    output = str(tmp_path / 'jsi.npz')
+    path = QPMsimitar.main(['jsi', '--config', CONFIG, '--set', 'JSI resolution=31', '--set', 'Crystal Temperature single=30',
+                            '--output', output])
+    assert path == output
+    results = np.load(output)
+    batch = Batch(path=CONFIG)
+    batch.JSIresolution, batch.CrystalTempSingle = 31, 30
+    expected = batch.jsi()
+    assert results['JS'].shape == (31, 31)
+    for name in ['signal', 'idler', 'PE', 'PM', 'JS']:
+        np.testing.assert_array_equal(results[name], expected[name])
+
+
+def test_main_errors(tmp_path):
+    with pytest.raises(SystemExit):
+        QPMsimitar.main(['jsi', '--config', CONFIG, '--set', 'No such setting=1'])
+    with pytest.raises(ValueError):
+        Batch(path=CONFIG).run('gui')
+    assert QPMsimitar.main(['--config', CONFIG]) is None
+
+
+# a headless run needs neither Qt nor matplotlib
+def test_headless_command(tmp_path):
+    output = str(tmp_path / 'tcp.npz')
+    blocker = "import sys; sys.modules.update({m: None for m in ['PyQt5', 'PyQt6', 'matplotlib']});"
+    run = "import runpy; sys.argv = ['QPMsimitar.py', 'pmc_wl_vs_T', '--config', {0!r}, '--output', {1!r}];" \
+          "runpy.run_path('QPMsimitar.py', run_name='__main__')".format(CONFIG, output)
+    proc = subprocess.run([sys.executable, '-c', blocker + run], cwd=ROOT, capture_output=True, text=True, timeout=300)
+    assert proc.returncode == 0, proc.stderr
+    results = np.load(output)
+    assert results['signal'].shape == results['temperature'].shape == (250,)
+    assert np.isfinite(results['Tcp'])
+
+
+# Batch reads every parameter of the shared settings mapping, unavailable models fall back to the first
+def test_properties_from_settings():
+    batch = Batch(path=CONFIG)
+    for attr, key in batch.config.properties:
+        assert getattr(batch, attr) == batch.config.get(key)
+    batch.config.set('Crystal Material', 'no such crystal')
+    batch.config.set('Crystal Refractive Index Y', 'no such model')
+    batch.getProperties()
+    available = RefractiveIndex().getAvailableRefractiveIndices(batch.CrystalMaterial)
+    assert batch.CrystalMaterial == RefractiveIndex().materialList[0]
+    assert batch.CrystalNY == available[1][0]
+
+
+# calculations are profiled only when the setting is switched on
+def test_profiling_off_by_default():
+    settings = Settings()
+    settings.standardSettings()
+    assert settings.get('Profile calculations') is False
+    assert Batch(path=CONFIG).ProfileJobs is False
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import PUMPWL, PP, TEMP, LENGTH
+from Filters import Filters
+from JSI import JSI
+import ResultCache
+import QPMsimitar
+
+CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.yaml')
+
+
+@pytest.fixture(autouse=True)
+def emptycache():
+    ResultCache.defaultcache().clear()
+    yield
+    ResultCache.defaultcache().clear()
+
+
+def plotargs(ktp, axes, filterfuncs):
+    s, i = axes
+    return (PUMPWL, s, i, 1e12, TEMP, PP, LENGTH, ktp, 1, filterfuncs, False, 'gaussian', 0.1e-9,
+            False, False, 0.1, 0.1, 0.1, 1e-3, 1e-3, 1e-3)
+
+
+def test_cached_results_match(ktp, axes, jsi):
+    F = Filters()
+    filterfuncs = [F.getFilterFunction('Gaussian', 809.5e-9, 1e-9), F.getFilterFunction('Gaussian', 810e-9, 1e-9)]
+    uncached = jsi.getplots(*plotargs(ktp, axes, filterfuncs))
+    hits = ResultCache.defaultcache().hits
+    first = JSI().getplots(*plotargs(ktp, axes, filterfuncs))
+    second = JSI().getplots(*plotargs(ktp, axes, filterfuncs))
+    for a, b, c in zip(uncached, first, second):
+        np.testing.assert_array_equal(a, b)
+        np.testing.assert_array_equal(a, c)
+    assert ResultCache.defaultcache().hits == hits + 1
+
+
+# a hit sets the attributes getplots sets, e.g. useFilter and the filter matrix
+def test_hit_restores_attributes(ktp, axes):
+    F = Filters()
+    filterfuncs = [F.getFilterFunction('Gaussian', 809.5e-9, 1e-9), F.getFilterFunction('Gaussian', 810e-9, 1e-9)]
+    computed, restored = JSI(), JSI()
+    computed.getplots(*plotargs(ktp, axes, filterfuncs))
+    restored.getplots(*plotargs(ktp, axes, filterfuncs))
+    assert restored.useFilter
+    for name in ['PP', 'L', 'T', 'pwl', 'filtersignalfunction', 'filteridlerfunction']:
+        assert getattr(restored, name) == getattr(computed, name)
+    np.testing.assert_array_equal(restored.filtermatrix, computed.filtermatrix)
+    np.testing.assert_array_equal(restored.sigrange, axes[0])
+
+
+# purities only depend on their own filters, not on those an earlier getplots left on the instance
+def test_purity_after_getplots(ktp, axes):
+    F = Filters()
+    filterfuncs = [F.getFilterFunction('Gaussian', 809.5e-9, 1e-9), F.getFilterFunction('Gaussian', 810e-9, 1e-9)]
+    purityargs = (PUMPWL, axes[0], axes[1], np.linspace(0.5e12, 3e12, 8), TEMP, PP, LENGTH, ktp, 1, filterfuncs, 'gaussian')
+    results = {}
+    for usecache in [False, True]:
+        j = JSI()
+        j.usecache = usecache
+        first = j.getpurity_vsTau(*purityargs)[0]
+        j.getplots(*plotargs(ktp, axes, filterfuncs))
+        second = j.getpurity_vsTau(*purityargs)[0]
+        lengths = j.getpurity_vsL(PUMPWL, axes[0], axes[1], 1e-12, TEMP, PP, np.linspace(5e-3, 15e-3, 5), ktp, 1,
+                                  filterfuncs, 'gaussian', 0.1e-9)[0]
+        np.testing.assert_array_equal(first, second)
+        results[usecache] = (second, lengths)
+    np.testing.assert_array_equal(results[True][0], results[False][0])
+    np.testing.assert_array_equal(results[True][1], results[False][1])
+    unfiltered = JSI().getpurity_vsTau(*purityargs[:-2], [None, None], 'gaussian')[0]
+    assert np.all(np.asarray(results[True][0]) > np.asarray(unfiltered))
+
+
+# cached arrays are shared read only, containers are fresh for every call
+def test_results_read_only(ktp, axes):
+    first = JSI().getplots(*plotargs(ktp, axes, [None, None]))
+    second = JSI().getplots(*plotargs(ktp, axes, [None, None]))
+    assert np.shares_memory(first[2], second[2])
+    assert not first[2].flags.writeable and not second[2].flags.writeable
+    with pytest.raises(ValueError):
+        second[2][0, 0] = 0
+    second[2] = None
+    assert JSI().getplots(*plotargs(ktp, axes, [None, None]))[2] is not None
+
+
+# with the 'Result cache directory' setting, results are written to disk and read by a later session
+def test_disk_tier_from_setting(tmp_path):
+    cachedir = str(tmp_path / 'cache')
+    try:
+        first = np.load(QPMsimitar.main(['pmc_wl_vs_T', '--config', CONFIG, '--set', 'Result cache directory=' + cachedir,
+                                         '--output', str(tmp_path / 'first.npz')]))
+        assert ResultCache.defaultcache().diskdir == cachedir
+        assert any(name.endswith('.pkl') for name in os.listdir(cachedir))
+        # a new session: empty memory tier
+        ResultCache.cache = ResultCache.ResultCache()
+        second = np.load(QPMsimitar.main(['pmc_wl_vs_T', '--config', CONFIG, '--set', 'Result cache directory=' + cachedir,
+                                          '--output', str(tmp_path / 'second.npz')]))
+        assert ResultCache.defaultcache().hits == 1 and ResultCache.defaultcache().misses == 0
+        for name in ['temperature', 'signal', 'idler', 'Tcp']:
+            np.testing.assert_array_equal(first[name], second[name])
+        QPMsimitar.main(['pmc_wl_vs_T', '--config', CONFIG, '--output', str(tmp_path / 'third.npz')])
+        assert ResultCache.defaultcache().diskdir is None
+    finally:
+        ResultCache.setdiskdir(None)
@@ -0,0 +1,26 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from Constants import Constants
+from JSI import JSI
+
+
+# the resolved pump shape factors against the per call expressions of the original JSA functions
+def test_resolved_factors():
+    c = Constants()
+    r = c.resolved()
+    tau = 1.3e-12
+    dw = 2 * c.pi * c.tbwpgauss / tau
+    assert r.sigmagauss / tau == pytest.approx(dw / (2 * np.sqrt(2 * np.log(2))), rel=1e-15)
+    assert r.Bsech * tau == pytest.approx(2 * np.arccosh(np.sqrt(2)) / (2 * c.pi * c.tbwpsech / tau), rel=1e-15)
+    assert r.Bsinc * tau == pytest.approx(3.79099 / (2 * c.pi * c.tbwpsinc / tau), rel=1e-15)
+    assert (r.pi, r.c, r.taucfgauss, r.taucfsech) == (c.pi, c.c, c.taucfgauss, c.taucfsech)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        r.c = 3e8
+
+
+# a JSI resolves the constants once
+def test_jsi_constants():
+    assert JSI().const == Constants().resolved()
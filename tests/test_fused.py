@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from conftest import PUMPWL, PP, TEMP, LENGTH
+from JSI import JSI
+
+
+@pytest.fixture
+def fusedjsi(ktp):
+    j = JSI()
+    j.nx, j.ny, j.nz = ktp
+    j.m = 1
+    j.useabs = False
+    j.fusedblocksize = 500
+    return j
+
+
+# the fused kernels (in blocks of rows) against the separate pump envelope and phase matching functions
+@pytest.mark.parametrize('shape,width', [('cwgauss', 0.2e-9), ('gauss', 1e-12), ('sech', 1e-12)])
+@pytest.mark.parametrize('intensity', [False, True])
+def test_fused_matches_unfused(fusedjsi, axes, shape, width, intensity):
+    X, Y = np.meshgrid(*axes, sparse=True)
+    calc = getattr(fusedjsi, 'PEAnPMAnJSA' + shape)
+    for ls, li in [(X, Y), (Y.T, X.T)]:
+        fusedjsi.fused = True
+        fused = calc(PUMPWL, ls, li, width, TEMP, PP, LENGTH, intensity=intensity)
+        fusedjsi.fused = False
+        unfused = calc(PUMPWL, ls, li, width, TEMP, PP, LENGTH, intensity=intensity)
+        for f, u in zip(fused, unfused):
+            assert np.shape(f) == np.broadcast(ls, li).shape
+            np.testing.assert_allclose(f, u, rtol=1e-9, atol=1e-12 * np.max(np.abs(u)))
+
+
+# the joint spectral amplitude of the fused path against the original JSAgauss
+def test_fused_matches_jsagauss(fusedjsi, axes):
+    X, Y = np.meshgrid(*axes, sparse=True)
+    jsa = fusedjsi.PEAnPMAnJSAgauss(PUMPWL, X, Y, 1e-12, TEMP, PP, LENGTH)[2]
+    expected = fusedjsi.JSAgauss(PUMPWL, X, Y, 1e-12, TEMP, PP, LENGTH)
+    np.testing.assert_allclose(jsa, expected, rtol=1e-9, atol=1e-12 * np.max(np.abs(expected)))
@@ -0,0 +1,38 @@
+import numpy as np
+
+from conftest import PUMPWL, PP, TEMP
+from JSI import JSI
+
+
+# index function that records the number of wavelengths it was evaluated at
+class CountingIndex:
+    def __init__(self, idxfunc):
+        self.idxfunc = idxfunc
+        self.points = 0
+
+    def __call__(self, wl, T):
+        self.points += np.size(wl)
+        return self.idxfunc(wl, T)
+
+
+# grids that only vary along one axis are evaluated on that axis, everything else point by point
+def test_gridIDX_matches_direct(ktp, axes):
+    j = JSI()
+    X, Y = np.meshgrid(*axes)
+    full = np.linspace(807e-9, 813e-9, 49 * 49).reshape(49, 49)
+    for wl, points in [(X, 49), (Y, 49), (np.broadcast_to(axes[0], (30, 49)), 49), (full, 49 * 49)]:
+        n = CountingIndex(ktp[1])
+        np.testing.assert_array_equal(j.gridIDX(n, wl, TEMP), ktp[1](np.array(wl), TEMP))
+        assert n.points == points
+
+
+# the phase mismatch on a full meshgrid against the pointwise evaluation
+def test_pconv_on_meshgrid(ktp, axes):
+    j = JSI()
+    j.nx, j.ny, j.nz = ktp
+    j.m = 1
+    X, Y = np.meshgrid(*axes)
+    lp = 1 / (1 / X + 1 / Y)
+    expected = ktp[1](lp, TEMP) / lp - ktp[1](X, TEMP) / X - ktp[2](Y, TEMP) / Y - 1 / PP
+    np.testing.assert_allclose(j.pconv(lp, X, Y, TEMP, PP), expected, rtol=1e-12, atol=1e-6)
+    np.testing.assert_array_equal(j.pconv(PUMPWL, X, Y, TEMP, PP), j.pconv(PUMPWL, X.copy(), Y.copy(), TEMP, PP))
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from conftest import PUMPWL, PP, TEMP, LENGTH
+
+
+def homargs(ktp, axes, delays):
+    s, i = axes
+    return (PUMPWL, TEMP, PP, 1, 1e-12, LENGTH, s, s, len(s), 'gaussian', delays, 0, ktp,
+            [None, None], 0.1e-9, False, False, 0.1, 0.1, 0.1, 1e-3, 1e-3, 1e-3)
+
+
+# the non-uniform FFT against the sum over the grid for every delay, for equally spaced and scattered delays
+@pytest.mark.parametrize('delays', [np.linspace(-5e-12, 5e-12, 41),
+                                    np.sort(np.random.default_rng(0).uniform(-5e-12, 5e-12, 41))])
+def test_hom_fft_matches_direct(ktp, axes, jsi, delays):
+    jsi.homengine = 'direct'
+    direct = jsi.getHOMinterference(*homargs(ktp, axes, delays))
+    jsi.homengine = 'fft'
+    fft = jsi.getHOMinterference(*homargs(ktp, axes, delays))
+    np.testing.assert_allclose(fft[0], direct[0], rtol=0, atol=1e-10)
+    assert fft[1] == pytest.approx(direct[1], rel=1e-8)
+
+
+# the trace of arbitrary complex arrays on a non-square grid
+def test_homtrace_fft(jsi):
+    rng = np.random.default_rng(1)
+    li, ls = np.linspace(800e-9, 820e-9, 33), np.linspace(805e-9, 815e-9, 27)
+    jsa1 = rng.standard_normal((33, 27)) + 1j * rng.standard_normal((33, 27))
+    jsa2 = rng.standard_normal((33, 27)) + 1j * rng.standard_normal((33, 27))
+    delays = np.linspace(-2e-12, 3e-12, 64)
+    w = np.outer(jsi.simpsonweights(33), jsi.simpsonweights(27))
+    nu = jsi.const.c / ls[None, :] - jsi.const.c / li[:, None]
+    expected = [np.sum(w * jsa1 * np.conj(jsa2) * np.exp(-2j * np.pi * nu * tau)) for tau in delays]
+    trace = jsi.homtrace_fft(jsa1, jsa2, li, ls, delays)
+    np.testing.assert_allclose(trace, expected, rtol=0, atol=1e-10 * np.sum(np.abs(w * jsa1 * jsa2)))
+
+
+def homtargs(ktp, axes, temps):
+    s, i = axes
+    return (PUMPWL, PP, 1, 1e-12, LENGTH, s, s, len(s), 'gaussian', temps, 0, ktp,
+            [None, None], 0.1e-9, False, False, 0.1, 0.1, 0.1, 1e-3, 1e-3, 1e-3)
+
+
+# the per-delay and per-temperature loops give the same traces with every executor
+def test_hom_executors(ktp, axes, jsi):
+    jsi.homengine = 'direct'
+    jsi.homworkers = 2
+    delays = np.linspace(-5e-12, 5e-12, 21)
+    temps = np.linspace(TEMP - 2, TEMP + 2, 6)
+    traces = {}
+    for executor in ['serial', 'threads', 'numba', 'processes']:
+        jsi.homexecutor = executor
+        traces[executor] = (jsi.getHOMinterference(*homargs(ktp, axes, delays))[0],
+                            jsi.getHOMinterferenceT(*homtargs(ktp, axes, temps))[0])
+    for executor in ['threads', 'processes']:
+        np.testing.assert_array_equal(traces[executor][0], traces['serial'][0])
+        np.testing.assert_array_equal(traces[executor][1], traces['serial'][1])
+    np.testing.assert_allclose(traces['numba'][0], traces['serial'][0], rtol=0, atol=1e-10)
+    np.testing.assert_allclose(traces['numba'][1], traces['serial'][1], rtol=0, atol=1e-10)
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+# modules loaded by an import statement, in a fresh interpreter
+def loadedmodules(statement):
+    code = statement + '; import sys; print(" ".join(sys.modules))'
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True, capture_output=True, text=True).stdout.split()
+
+
+def test_import_jsi_is_lazy():
+    loaded = {name.split('.')[0] for name in loadedmodules('import JSI')}
+    for name in ['numba', 'multiprocessing', 'concurrent', 'ruamel', 'SharedBuffers', 'JSAStore', 'matplotlib', 'PyQt5']:
+        assert name not in loaded
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from conftest import PUMPWL, PP, TEMP
+from JSI import JSI
+from PMC import PMC
+from RefractiveIndex import RefractiveIndex
+
+
+# central differences of the phase-matching system
+def numericaljacobian(epconv, x, h=1e-15):
+    cols = []
+    for i in range(0, 2):
+        dx = np.zeros(2)
+        dx[i] = h
+        cols.append((np.array(epconv(x + dx)) - np.array(epconv(x - dx))) / (2 * h))
+    return np.array(cols).T
+
+
+# every KTP model has an analytic wavelength derivative
+def test_model_derivatives():
+    R = RefractiveIndex()
+    l = np.linspace(700e-9, 1600e-9, 11)
+    h = 1e-12
+    for pol, papers in zip(['X', 'Y', 'Z'], R.getAvailableRefractiveIndices('PPKTP')):
+        for paper in papers:
+            idx = R.getSingleIDX('PPKTP', pol, paper)
+            numerical = (idx(l + h, TEMP) - idx(l - h, TEMP)) / (2 * h)
+            np.testing.assert_allclose(R.getDerivative(idx)(l, TEMP), numerical, rtol=1e-5, err_msg=paper)
+
+
+@pytest.mark.parametrize('T', [TEMP, np.array([TEMP])])
+def test_pmc_jacobian(ktp, T):
+    p = PMC()
+    p.nx, p.ny, p.nz = ktp
+    p.lp, p.m = PUMPWL, 1
+    epconv, epjac = p.epconvandjaconlywl(T, PP)
+    x = np.array([811e-9, 808.5e-9])
+    np.testing.assert_allclose(epjac(x), numericaljacobian(epconv, x), rtol=1e-5)
+
+
+def test_jsi_jacobian(ktp):
+    j = JSI()
+    j.nx, j.ny, j.nz = ktp
+    j.m = 1
+    epconv, epjac = j.epconvandjaconlywl(PUMPWL, TEMP, PP)
+    x = np.array([811e-9, 808.5e-9])
+    np.testing.assert_allclose(epjac(x), numericaljacobian(epconv, x), rtol=1e-5)
+
+
+# index functions without a known derivative are solved without a jacobian, to the same point
+def test_solve_without_derivative(ktp):
+    p = PMC()
+    p.nx, p.ny, p.nz = ktp
+    p.lp, p.m = PUMPWL, 1
+    withjac = p.SIwls([PUMPWL, TEMP, PP])
+    p.ny, p.nz = (lambda l, T: ktp[1](l, T)), (lambda l, T: ktp[2](l, T))
+    assert p.epconvandjaconlywl(TEMP, PP)[1] is None
+    np.testing.assert_allclose(p.SIwls([PUMPWL, TEMP, PP]), withjac, rtol=1e-8)
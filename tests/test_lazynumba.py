@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+import LazyNumba
+from RefractiveIndex import RefractiveIndex, SellmeierIndex, TabulatedIndex
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+@LazyNumba.njit
+def square(x):
+    return x * x
+
+
+@LazyNumba.njit(signatures=['f8[::1], f8'])
+def sumsquares(x, scale):
+    s = 0.0
+    for i in numba.prange(x.size):
+        s += square(scale * x[i])
+    return s
+
+
+# kernels are compiled on warmup (declared signatures) or on the first call (everything else)
+def test_lazy_dispatcher():
+    lazysquare = square
+    assert sumsquares.dispatcher is None and lazysquare.dispatcher is None
+    dispatcher = sumsquares.warmup()
+    assert len(dispatcher.signatures) == 1
+    # the kernel calls the compiled dispatcher of square
+    assert square is lazysquare.dispatcher
+    assert sumsquares(np.arange(4.0), 1.0) == 14.0
+    assert len(dispatcher.signatures) == 1
+    assert sumsquares(np.arange(4.0)[::2], 1.0) == 4.0
+    assert len(dispatcher.signatures) == 2
+    assert sumsquares.py_func(np.arange(4.0), 1.0) == 14.0
+
+
+# warmup compiles the signatures the index models declare, for the direct, derivative and scalar kernels
+def test_index_warmup():
+    R = RefractiveIndex()
+    ny = R.getSingleIDX('PPKTP', 'Y', 'koenig')
+    RefractiveIndex.warmup([ny, R.getTabulatedIDX('PPKTP', 'Z', 'fradkin', 700e-9, 1700e-9)])
+    kernels = [SellmeierIndex.sellmeier_numba, SellmeierIndex.sellmeier_dl_numba, SellmeierIndex.sellmeier_scalar_numba,
+               SellmeierIndex.sellmeier_dl_scalar_numba, TabulatedIndex.chebval_numba]
+    for kernel in kernels:
+        assert kernel.dispatcher is not None
+        assert len(kernel.dispatcher.signatures) >= len(kernel.signatures)
+
+
+# a second session loads the index kernels from numba's disk cache instead of compiling them
+def test_kernels_cached_on_disk():
+    script = "from RefractiveIndex import RefractiveIndex, SellmeierIndex;" \
+             "RefractiveIndex.warmup(RefractiveIndex().getIDX('PPKTP', ['kato', 'koenig', 'fradkin']));" \
+             "print(sum(len(k.dispatcher.stats.cache_hits) for k in [SellmeierIndex.sellmeier_numba, SellmeierIndex.sellmeier_dl_numba]))"
+    for run in range(0, 2):
+        proc = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, timeout=300)
+        assert proc.returncode == 0, proc.stderr
+    assert int(proc.stdout.split()[-1]) > 0
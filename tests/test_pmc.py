@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+import scipy.optimize
+
+from conftest import PUMPWL, PP, TEMP
+from JSI import JSI
+from PMC import PMC
+import ResultCache
+
+
+@pytest.fixture
+def pmc(ktp):
+    p = PMC()
+    p.usecache = False
+    p.nx, p.ny, p.nz = ktp
+    p.lp, p.PP, p.m = PUMPWL, PP, 1
+    return p
+
+
+# the original fsolve on both conservation laws, without a jacobian
+def referenceSIwls(p, lp, T, PP):
+    def epconv(x):
+        pc = p.ny(lp, T) / lp - p.ny(x[0], T) / x[0] - p.nz(x[1], T) / x[1] - p.m / PP
+        return [1 / lp - 1 / x[0] - 1 / x[1], float(np.ravel(pc)[0])]
+    return scipy.optimize.fsolve(epconv, [2 * lp, 2 * lp], xtol=1e-12)
+
+
+# batched newton against the signal/idler solve point by point
+def test_siwls_batch_matches_fsolve(pmc):
+    Trange = np.linspace(20, 40, 7)
+    PPrange = np.linspace(9.9e-6, 10.1e-6, 3)
+    T, P = np.meshgrid(Trange, PPrange)
+    ls, li = pmc.SIwls_batch(PUMPWL, T, P)
+    assert ls.shape == li.shape == T.shape
+    for idx in np.ndindex(T.shape):
+        np.testing.assert_allclose([ls[idx], li[idx]], referenceSIwls(pmc, PUMPWL, T[idx], P[idx]), rtol=1e-8)
+
+
+# the tuning curve against the original fsolve of the wavelength gap
+def test_varT_matches_fsolve(pmc, ktp):
+    Trange = np.linspace(20, 40, 5)
+    sigwl, idwl, Tcp = pmc.getSI_wl_varT(PUMPWL, PP, Trange, ktp, 1)
+    txf = pmc.thermexpfactor(Trange)
+    for i, T in enumerate(Trange):
+        np.testing.assert_allclose([sigwl[i], idwl[i]], referenceSIwls(pmc, PUMPWL, T, PP * txf[i]), rtol=1e-8)
+    sigwl, idwl = pmc.getSI_wl(PUMPWL, PP, Trange, ktp, 1)
+    np.testing.assert_allclose(sigwl, pmc.getSI_wl_varT(PUMPWL, PP, Trange, ktp, 1)[0], rtol=1e-12)
+
+
+
+# the closed form crossing point poling period puts signal and idler on top of each other
+def test_ppcp_is_degenerate(pmc):
+    PPcp = pmc.getPPcp(PUMPWL, TEMP)
+    ls, li = referenceSIwls(pmc, PUMPWL, TEMP, PPcp)
+    assert ls == pytest.approx(li, rel=1e-6)
+    assert pmc.getTcp(PUMPWL, PPcp, Tguess=TEMP + 5) == pytest.approx(TEMP, abs=1e-6)
+
+
+# the bracketed root of the degenerate mismatch against the original fsolve of the wavelength gap
+def test_tcp_matches_nested(pmc, ktp):
+    gap = lambda T: np.subtract(*referenceSIwls(pmc, PUMPWL, float(np.ravel(T)[0]), PP))
+    assert pmc.getSI_wl_varT(PUMPWL, PP, [TEMP], ktp, 1)[2] == pytest.approx(scipy.optimize.fsolve(gap, 50, xtol=1e-12)[0], abs=1e-4)
+    j = JSI()
+    j.nx, j.ny, j.nz = ktp
+    j.m = 1
+    for PPi in [9.9e-6, 10e-6, 10.1e-6]:
+        assert j.getTcp(PUMPWL, PPi, TEMP) == pytest.approx(j.getTcpNested(PUMPWL, PPi, TEMP), abs=1e-4)
+    assert j.getTcp(PUMPWL, PP, TEMP) == pytest.approx(pmc.getTcp(PUMPWL, PP, TEMP), abs=1e-9)
+
+
+# the wavelength window of the GUI comes from a cached solve at the temperature only, without the crossing point
+def test_si_wl_cached(ktp, monkeypatch):
+    ResultCache.defaultcache().clear()
+    monkeypatch.setattr(PMC, 'getTcp', lambda *args, **kwargs: pytest.fail('crossing point search'))
+    hits = ResultCache.defaultcache().hits
+    first = PMC().getSI_wl(PUMPWL, PP, TEMP, ktp, 1)
+    second = PMC().getSI_wl(PUMPWL, PP, TEMP, ktp, 1)
+    assert ResultCache.defaultcache().hits == hits + 1
+    np.testing.assert_array_equal(first, second)
+    p = PMC()
+    p.nx, p.ny, p.nz = ktp
+    p.m = 1
+    np.testing.assert_array_equal(first, p.SIwls_batch(PUMPWL, TEMP, PP * p.thermexpfactor(TEMP)))
+    PMC().getSI_wl(PUMPWL, PP, TEMP + 1, ktp, 1)
+    assert ResultCache.defaultcache().hits == hits + 1
+    ResultCache.defaultcache().clear()
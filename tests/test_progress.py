@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from conftest import PUMPWL, PP, TEMP, LENGTH
+
+
+class Cancelled(Exception):
+    pass
+
+
+# progress callback that records the reports and cancels (like QTjobs) at report number cancelat
+def canceller(reports, cancelat=None):
+    def progress(done, total):
+        reports.append((done, total))
+        if len(reports) == cancelat:
+            raise Cancelled()
+    return progress
+
+
+def plotargs(ktp, axes):
+    s, i = axes
+    return (PUMPWL, s, i, 1e12, TEMP, PP, LENGTH, ktp, 1, [None, None], False, 'gaussian', 0.1e-9,
+            False, False, 0.1, 0.1, 0.1, 1e-3, 1e-3, 1e-3)
+
+
+def homargs(ktp, axes):
+    s, i = axes
+    return (PUMPWL, TEMP, PP, 1, 1e12, LENGTH, s, s, len(s), 'gaussian', np.linspace(-5e-12, 5e-12, 21), 0, ktp,
+            [None, None], 0.1e-9, False, False, 0.1, 0.1, 0.1, 1e-3, 1e-3, 1e-3)
+
+
+def test_getplots_reports_progress(ktp, axes, jsi):
+    reports = []
+    jsi.progress = canceller(reports)
+    jsi.getplots(*plotargs(ktp, axes))
+    assert reports == [(0, 1), (1, 1)]
+    jsi.progress = canceller([], cancelat=1)
+    with pytest.raises(Cancelled):
+        jsi.getplots(*plotargs(ktp, axes))
+
+
+def test_hom_fft_reports_progress(ktp, axes, jsi):
+    reports = []
+    jsi.progress = canceller(reports)
+    jsi.getHOMinterference(*homargs(ktp, axes))
+    assert reports == [(0, 3), (1, 3), (2, 3), (3, 3)]
+    jsi.progress = canceller([], cancelat=2)
+    with pytest.raises(Cancelled):
+        jsi.getHOMinterference(*homargs(ktp, axes))
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from conftest import PUMPWL, PP, TEMP, LENGTH
+from Filters import Filters
+from JSI import JSI
+
+
+# getpurity_vsTau passes the values of taurange to the pump envelope as they are (spectral widths)
+TAUS = np.linspace(0.5e12, 3e12, 8)
+
+
+def filters():
+    F = Filters()
+    return [F.getFilterFunction('Gaussian', 809.5e-9, 1e-9), F.getFilterFunction('Rectangular', 810e-9, 2e-9)]
+
+
+# purities from the JSAs built point by point as in the original implementation, filtered like getplots
+# (rows: idler filter at the idler wavelengths, columns: signal filter at the signal wavelengths)
+def referencepurities(ktp, axes, filterfuncs):
+    s, i = axes
+    j = JSI()
+    j.nx, j.ny, j.nz = ktp
+    j.pwl, j.T, j.m = PUMPWL, TEMP, 1
+    PPT, L = PP * j.thermexpfactor(TEMP), LENGTH * j.thermexpfactor(TEMP)
+    filtermatrix = np.array([[filterfuncs[1](i[a]) * filterfuncs[0](s[b]) for b in range(len(s))] for a in range(len(i))])
+    X, Y = np.meshgrid(s, i)
+    pma = j.PMAgauss(j.deltak(j.lambdap(X, Y), X, Y, TEMP, PPT), L, PUMPWL, X, Y, temp=TEMP)
+    return [j.purity_svd(pma * j.PEAgauss(PUMPWL, X, Y, tau) * filtermatrix) for tau in TAUS]
+
+
+def test_purity_vstau_filters(ktp, axes, jsi):
+    args = (PUMPWL, axes[0], axes[1], TAUS, TEMP, PP, LENGTH, ktp, 1, filters(), 'gaussian')
+    reference = referencepurities(ktp, axes, filters())
+    np.testing.assert_allclose(jsi.getpurity_vsTau(*args)[0], reference, rtol=1e-9)
+    np.testing.assert_allclose(jsi.getpurity_vsTau(*args, batched=False)[0], reference, rtol=1e-9)
+    jsi.lowrank = True
+    np.testing.assert_allclose(jsi.getpurity_vsTau(*args)[0], reference, rtol=1e-6)
+
+
+# different signal and idler axes, also as the (N, 1) columns the GUI and Batch pass
+def test_purity_vstau_filter_axes(ktp, jsi):
+    axes = np.linspace(808e-9, 813e-9, 41), np.linspace(806.5e-9, 812.5e-9, 37)
+    reference = referencepurities(ktp, axes, filters())
+    for s, i in [axes, (axes[0][:, None], axes[1][:, None])]:
+        args = (PUMPWL, s, i, TAUS, TEMP, PP, LENGTH, ktp, 1, filters(), 'gaussian')
+        np.testing.assert_allclose(jsi.getpurity_vsTau(*args)[0], reference, rtol=1e-9)
+
+
+# stacks of one, a few and all JSAs, serial and in threads, give the purities of the loop over tau
+def test_purity_vstau_batches(ktp, axes, jsi):
+    args = (PUMPWL, axes[0], axes[1], TAUS, TEMP, PP, LENGTH, ktp, 1, [None, None], 'gaussian')
+    unbatched = jsi.getpurity_vsTau(*args, batched=False)[0]
+    jsabytes = len(axes[0]) * len(axes[1]) * 16
+    for chunkbytes, threads in [(jsabytes, 1), (3 * jsabytes, 1), (2 ** 28, 1), (2 * jsabytes, 2), (jsabytes, 3)]:
+        batched = jsi.getpurity_vsTau(*args, chunkbytes=chunkbytes * threads, threads=threads)[0]
+        np.testing.assert_allclose(batched, unbatched, rtol=1e-12, err_msg=str((chunkbytes, threads)))
+
+
+# the gram identity and the randomized schmidt decomposition against the full SVD, for single JSAs and stacks
+def test_purity_methods(ktp, jsi):
+    jsi.nx, jsi.ny, jsi.nz = ktp
+    jsi.m = 1
+    X, Y = np.meshgrid(np.linspace(806e-9, 813e-9, 600), np.linspace(806e-9, 813.5e-9, 640), sparse=True)
+    jsas = np.array([jsi.PEAnPMAnJSAgauss(PUMPWL, X, Y, tau, TEMP, PP, LENGTH)[2] for tau in [0.3e-12, 1e-12, 3e-12]])
+    svd = jsi.purity(jsas, method='svd')
+    assert np.all((svd > 0.01) & (svd < 1))
+    np.testing.assert_allclose(jsi.purity(jsas, method='gram'), svd, rtol=1e-10)
+    np.testing.assert_allclose(jsi.purity(jsas, method='randomized'), svd, atol=jsi.puritytol)
+    np.testing.assert_allclose(jsi.purity(jsas, method='auto'), svd, atol=jsi.puritytol)
+    assert jsi.purity(jsas[1], method='gram') == pytest.approx(svd[1], rel=1e-10)
+    # no low rank approximation for a random matrix: randomized falls back to gram
+    noise = np.random.default_rng(1).standard_normal((64, 80))
+    assert jsi.purity(noise, method='randomized') == pytest.approx(jsi.purity(noise, method='svd'), rel=1e-10)
+    with pytest.raises(ValueError):
+        jsi.purity(noise, method='qr')
@@ -0,0 +1,99 @@
+import numpy as np
+
+from RefractiveIndex import RefractiveIndex
+
+
+# PPLN and BBO are registered, but not offered for the (KTP type-II) calculations
+def test_materials():
+    R = RefractiveIndex()
+    assert R.getMaterialList() == ['PPKTP', 'KTP']
+    assert R.getAvailableRefractiveIndices('PPKTP') == [['kato'], ['koenig', 'kato'], ['fradkin', 'kato', 'kato2']]
+    assert R.getSingleIDX('PPLN', 'Z', 'gayer').name == 'PPLN:e:gayer'
+
+
+def test_derivative():
+    R = RefractiveIndex()
+    ny = R.getSingleIDX('PPKTP', 'Y', 'koenig')
+    l = np.linspace(700e-9, 1600e-9, 11)
+    h = 1e-12
+    np.testing.assert_allclose(R.getDerivative(ny)(l, 30.0), (ny(l + h, 30.0) - ny(l - h, 30.0)) / (2 * h), rtol=1e-5)
+    assert R.getDerivative(lambda l, t: 1.5) is None
+
+
+# the scalar fast path of the solvers uses serial copies of the kernels with their own cache entries
+def test_scalar_kernels():
+    R = RefractiveIndex()
+    for pol, paper in [('X', 'kato'), ('Y', 'koenig'), ('Z', 'fradkin'), ('Z', 'kato2')]:
+        idx = R.getSingleIDX('PPKTP', pol, paper)
+        n, dn = RefractiveIndex.getScalar(idx), RefractiveIndex.getScalar(R.getDerivative(idx))
+        for l, t in [(810e-9, 28.66), (1550e-9, 40), (405e-9, 25.0)]:
+            assert n(l, t) == idx(np.array([l]), float(t))[0]
+            assert dn(l, t) == idx.dl(np.array([l]), float(t))[0]
+    scalarkernel = type(idx).sellmeier_scalar_numba
+    assert scalarkernel.__qualname__ == 'SellmeierIndex.sellmeier_scalar_numba'
+    assert not scalarkernel.compile().targetoptions.get('parallel', False)
+
+
+# the per paper formulas of the original implementation (λ in meter, equations for µm)
+def emanueli(lin, t, a1, a2, f3):
+    linv = 1 / (lin * 10 ** 6)
+    f1 = a1[0] + linv * (a1[1] + linv * (a1[2] + (a1[3] * linv)))
+    f2 = a2[0] + linv * (a2[1] + linv * (a2[2] + (a2[3] * linv)))
+    return (t - 25) * (f1 + (t - 25) * f2) + f3
+
+
+def kato(lin, t, f, dndT):
+    ll = (lin * 10 ** 6) ** 2
+    return np.sqrt(f[0] + f[1] / (ll + f[2]) + f[3] / (ll + f[4])) + (t - 20) * dndT * 10 ** (-5)
+
+
+def katolinv(lin, a):
+    linv = 1 / (lin * 10 ** 6)
+    return a[0] + linv * (a[1] + linv * (a[2] + linv * a[3]))
+
+
+def referenceindex(paper, pol, lin, t):
+    l = lin * 10 ** 6
+    ll = l ** 2
+    fnz = [4.59423, 0.06206, -0.04763, 110.80672, -86.12171]
+    if (pol, paper) == ('X', 'kato'):
+        return kato(lin, t, [3.2910, 0.04140, -0.03978, 9.35522, -31.45571], katolinv(lin, [0.1627, 0.8416, -0.5353, 0.1717]))
+    if (pol, paper) == ('Y', 'kato'):
+        return kato(lin, t, [3.45018, 0.04341, -0.04597, 16.98825, -39.43799], katolinv(lin, [0.5425, 0.5154, -0.4063, 0.1997]))
+    if (pol, paper) == ('Z', 'kato'):
+        return kato(lin, t, fnz, katolinv(lin, [-0.1897, 3.6677, -2.9220, 0.9221]))
+    if (pol, paper) == ('Z', 'kato2'):
+        a = [-0.5523, 3.3920, -1.7101, 0.3424]
+        return kato(lin, t, fnz, a[0] / l + a[1] + a[2] * l + a[3] * ll)
+    if (pol, paper) == ('Y', 'koenig'):
+        return emanueli(lin, t, np.array([6.2897, 6.3061, -6.0629, 2.6486]) * 10 ** (-6),
+                        np.array([-0.14445, 2.2244, -3.5770, 1.3470]) * 10 ** (-8),
+                        np.sqrt(np.abs(-0.0138408 * ll + 0.922683 / (1 - 0.0467695 / ll) + 2.0993)))
+    if (pol, paper) == ('Z', 'fradkin'):
+        return emanueli(lin, t, np.array([9.9587, 9.9228, -8.9603, 4.1010]) * 10 ** (-6),
+                        np.array([-1.1882, 10.459, -9.8136, 3.1481]) * 10 ** (-8),
+                        np.sqrt(np.abs(-0.00968956 * ll + 1.18431 / (1 - 0.0514852 / ll) + 0.6603 / (1 - 100.005 / ll) + 2.12725)))
+
+
+# every KTP model of the registry against its original formula, for scalar and array temperatures
+def test_ktp_models_match_original():
+    R = RefractiveIndex()
+    l = np.linspace(400e-9, 1700e-9, 131)
+    for pol, papers in zip(['X', 'Y', 'Z'], R.getAvailableRefractiveIndices('PPKTP')):
+        for paper in papers:
+            idx = R.getSingleIDX('PPKTP', pol, paper)
+            for t in [10.0, 28.66, 80.0, np.linspace(10, 80, 131)]:
+                np.testing.assert_allclose(idx(l, t), referenceindex(paper, pol, l, t), rtol=1e-13, err_msg=paper)
+
+
+# the temperature dependent sellmeier fit of gayer et al. 2008 with T polynomials as coefficients
+def test_gayer_model():
+    idx = RefractiveIndex().getSingleIDX('PPLN', 'Z', 'gayer')
+    a = [5.756, 0.0983, 0.2020, 189.32, 12.52, 1.32e-2]
+    b = [2.860e-6, 4.700e-8, 6.113e-8, 1.516e-4]
+    l = np.linspace(500e-9, 4000e-9, 71)
+    ll = (l * 10 ** 6) ** 2
+    for t in [20.0, 100.0, 200.0]:
+        f = (t - 24.5) * (t + 570.82)
+        nn = a[0] + b[0] * f + (a[1] + b[1] * f) / (ll - (a[2] + b[2] * f) ** 2) + (a[3] + b[3] * f) / (ll - a[4] ** 2) - a[5] * ll
+        np.testing.assert_allclose(idx(l, t), np.sqrt(nn), rtol=1e-13)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from conftest import PUMPWL, PP, TEMP, LENGTH
+from Filters import Filters
+from JSAStore import JSAStore, describefunction
+
+
+def storeargs(ktp, axes):
+    s, i = axes
+    return (PUMPWL, s, i, 1e12, TEMP, PP, LENGTH, ktp, 1, [None, None], False, 'gaussian', 0.1e-9,
+            False, False, 0.1, 0.1, 0.1, 1e-3, 1e-3, 1e-3)
+
+
+# the metadata records the sellmeier coefficients of the index models
+def test_store_metadata_indexmodels(ktp, axes, jsi, tmp_path):
+    jsi.storeplots(str(tmp_path / 'jsa'), *storeargs(ktp, axes))
+    models = JSAStore(str(tmp_path / 'jsa')).metadata['indexmodels']
+    for pol, func in zip(['X', 'Y', 'Z'], ktp):
+        assert models[pol] == describefunction(func)
+        assert models[pol]['function'] == 'SellmeierIndex'
+        assert models[pol]['name'] == func.name
+        np.testing.assert_array_equal(models[pol]['sellmeier'], func.sellmeier)
+        np.testing.assert_array_equal(models[pol]['thermal'], func.thermal)
+        assert models[pol]['tref'] == func.tref
+
+
+# the grids written tile by tile against getplots, and the quantities computed block by block from them
+def test_store_matches_getplots(ktp, axes, jsi, tmp_path):
+    args = list(storeargs(ktp, axes))
+    args[3] = 1e-12
+    jsi.useabs = False
+    jsi.tilebytes = 10 * jsi.tilebytesperpoint * len(axes[0])
+    store = jsi.storeplots(str(tmp_path / 'jsa'), *args)
+    grids = jsi.getplots(*args)
+    for name, grid in zip(JSAStore.quantities, grids):
+        np.testing.assert_array_equal(store[name], np.broadcast_to(grid, store.gridshape))
+    np.testing.assert_array_equal(store.signal, axes[0])
+    np.testing.assert_array_equal(store.idler, axes[1])
+
+    store = JSAStore(str(tmp_path / 'jsa'), blockbytes=7 * len(axes[0]) * 16)
+    jsi2 = np.abs(grids[2]) ** 2
+    norm, signal, idler = store.marginals()
+    assert norm == pytest.approx(np.sum(jsi2), rel=1e-12)
+    np.testing.assert_allclose(signal, np.sum(jsi2, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(idler, np.sum(jsi2, axis=1), rtol=1e-12)
+    assert store.purity() == pytest.approx(jsi.purity_svd(grids[2]), rel=1e-10)
+
+    F = Filters()
+    filterfuncs = [F.getFilterFunction('Gaussian', 809.5e-9, 1e-9), F.getFilterFunction('Rectangular', 810e-9, 2e-9)]
+    fs = np.array([filterfuncs[0](l) for l in axes[0]])
+    fi = np.array([filterfuncs[1](l) for l in axes[1]])
+    assert store.filterloss(filterfuncs) == pytest.approx(1 - np.sum(jsi2 * np.outer(fi, fs)) / np.sum(jsi2), rel=1e-12)
+    assert store.filterloss([None, None]) == pytest.approx(0, abs=1e-15)
+
+    delays = np.linspace(-5e-12, 5e-12, 21)
+    HOMI, vis = jsi.getHOMfromstore(store, delays)
+    homargs = (PUMPWL, TEMP, PP, 1, 1e-12, LENGTH, axes[0], axes[0], len(axes[0]), 'gaussian', delays, 0, ktp,
+               [None, None], 0.1e-9, False, False, 0.1, 0.1, 0.1, 1e-3, 1e-3, 1e-3)
+    np.testing.assert_allclose(HOMI, jsi.getHOMinterference(*homargs)[0], rtol=0, atol=1e-10)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from conftest import PUMPWL, PP, TEMP, LENGTH
+from Filters import Filters
+
+
+# getpurity_vsTau passes the values of taurange to the pump envelope as they are (spectral widths)
+def purityargs(ktp, axes, filterfuncs):
+    s, i = axes
+    return (PUMPWL, s, i, np.linspace(0.5e12, 3e12, 8), TEMP, PP, LENGTH, ktp, 1, filterfuncs, 'gaussian')
+
+
+# the process executor pickles the JSI including the filter functions
+def test_purity_vstau_processes_with_filters(ktp, axes, jsi):
+    F = Filters()
+    filterfuncs = [F.getFilterFunction('Gaussian', 809.74e-9, 1e-9), F.getFilterFunction('Gaussian', 809.74e-9, 1e-9)]
+    jsi.sweepworkers = 2
+    threads = jsi.getpurity_vsTau(*purityargs(ktp, axes, filterfuncs), chunkbytes=2**16)[0]
+    jsi.sweepexecutor = 'processes'
+    processes = jsi.getpurity_vsTau(*purityargs(ktp, axes, filterfuncs), chunkbytes=2**16)[0]
+    unfiltered = jsi.getpurity_vsTau(*purityargs(ktp, axes, [None, None]), chunkbytes=2**16)[0]
+    np.testing.assert_allclose(processes, threads, rtol=1e-12)
+    assert np.all(np.asarray(threads) > np.asarray(unfiltered))
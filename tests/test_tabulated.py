@@ -0,0 +1,27 @@
+import numpy as np
+
+from conftest import TEMP
+from RefractiveIndex import RefractiveIndex, TabulatedIndex
+
+
+# the chebyshev tables against the direct sellmeier evaluation, inside and outside the tabulated range
+def test_tabulated_matches_direct():
+    R = RefractiveIndex()
+    for pol, paper in [('X', 'kato'), ('Y', 'koenig'), ('Z', 'fradkin')]:
+        direct = R.getSingleIDX('PPKTP', pol, paper)
+        tab = R.getTabulatedIDX('PPKTP', pol, paper, 700e-9, 1700e-9)
+        l = np.linspace(650e-9, 1750e-9, 301).reshape(7, 43)
+        np.testing.assert_allclose(tab(l, TEMP), direct(l, TEMP), rtol=0, atol=1e-10)
+        np.testing.assert_allclose(tab.dl(l, TEMP), direct.dl(l, TEMP), rtol=1e-6)
+        assert np.ndim(tab(810e-9, TEMP)) == 0
+        # temperature arrays that are not uniform are evaluated directly
+        T = np.linspace(20, 40, 43)
+        np.testing.assert_array_equal(tab(l, T), direct(l, T))
+
+
+# tables are kept per temperature, the oldest is dropped
+def test_table_lru():
+    tab = TabulatedIndex(RefractiveIndex().getSingleIDX('PPKTP', 'Y', 'koenig'), 700e-9, 1700e-9, maxtables=2)
+    for T in [20, 30, 20, 40]:
+        tab(810e-9, T)
+    assert list(tab.tables) == [20.0, 40.0]
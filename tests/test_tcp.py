@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from conftest import PUMPWL, PP, TEMP
+from JSI import JSI
+
+
+@pytest.fixture
+def tcpjsi(ktp):
+    j = JSI()
+    j.nx, j.ny, j.nz = ktp
+    j.m = 1
+    return j
+
+
+# batched newton against the nested signal/idler solve of the original implementation
+def test_tcp_batch_matches_nested(tcpjsi):
+    pwl = np.linspace(404e-9, 406e-9, 5)
+    batch = tcpjsi.getTcp_batch(pwl, PP, TEMP)
+    nested = [tcpjsi.getTcpNested(lp, PP, TEMP) for lp in pwl]
+    np.testing.assert_allclose(batch, nested, rtol=1e-8)
+
+
+# points newton does not converge for are solved one by one, also for a single point and in processes
+def test_tcp_batch_fallback(tcpjsi):
+    expected = tcpjsi.getTcp(PUMPWL, PP, TEMP)
+    assert tcpjsi.getTcp_batch(PUMPWL, PP, TEMP, maxiter=0) == pytest.approx(expected, rel=1e-10)
+    assert tcpjsi.getTcp_batch(PUMPWL, PP, TEMP, maxiter=1) == pytest.approx(expected, rel=1e-10)
+    pwl = np.linspace(404e-9, 406e-9, 3)
+    serial = tcpjsi.getTcp_batch(pwl, PP, TEMP, maxiter=0)
+    processes = tcpjsi.getTcp_batch(pwl, PP, TEMP, maxiter=0, processes=2)
+    np.testing.assert_allclose(serial, [tcpjsi.getTcp(lp, PP, TEMP) for lp in pwl], rtol=1e-10)
+    np.testing.assert_array_equal(processes, serial)
+
+
+# the continued map against the rows solved one by one
+def test_tcp_map_matches_rows(tcpjsi, ktp):
+    PPrange = np.linspace(9.9e-6, 10.1e-6, 9)
+    pwlrange = np.linspace(404e-9, 406e-9, 5)
+    Tmap = tcpjsi.getTcpMap(PPrange, pwlrange, TEMP, ktp, 1, chunksize=2)
+    rows = [JSI().getTcpVsPP(PPrange, TEMP, pwl, ktp, 1) for pwl in pwlrange]
+    np.testing.assert_allclose(Tmap, rows, rtol=1e-8)
+    np.testing.assert_array_equal(tcpjsi.getTcpMap(PPrange, pwlrange, TEMP, ktp, 1, chunksize=2, processes=2), Tmap)
+
+
+# the finite difference derivative is accurate enough for newton to converge by itself in a few steps
+def test_tcp_batch_newton_converges(tcpjsi, monkeypatch):
+    def nofallback(*args, **kwargs):
+        raise AssertionError('newton did not converge')
+    monkeypatch.setattr(tcpjsi, 'mapTcp', nofallback)
+    pwl = np.linspace(404e-9, 406e-9, 5)
+    batch = tcpjsi.getTcp_batch(pwl, PP, TEMP, maxiter=6)
+    np.testing.assert_allclose(batch, [tcpjsi.getTcp(lp, PP, TEMP) for lp in pwl], rtol=1e-10)
@@ -0,0 +1,29 @@
+import numpy as np
+
+from conftest import PUMPWL, PP, TEMP, LENGTH
+from Filters import Filters
+from JSI import TileArray, TileGram, TileMarginals
+
+
+def plotargs(ktp, s, i, filterfuncs):
+    return (PUMPWL, s, i, 1e12, TEMP, PP, LENGTH, ktp, 1, filterfuncs, False, 'gaussian', 0.1e-9,
+            False, False, 0.1, 0.1, 0.1, 1e-3, 1e-3, 1e-3)
+
+
+# signal and idler filters with different centres on a non-square grid: the filters act on the
+# columns (signal) and rows (idler) of the grids, in the tiles as in the full grid
+def test_tiles_match_full_grid_with_filters(ktp, jsi, tmp_path):
+    F = Filters()
+    filterfuncs = [F.getFilterFunction('Gaussian', 809.2e-9, 1e-9), F.getFilterFunction('Rectangular', 810.5e-9, 2e-9)]
+    s, i = np.linspace(807.24e-9, 812.24e-9, 37), np.linspace(807.74e-9, 811.74e-9, 29)
+    PE, PM, JS = jsi.getplots(*plotargs(ktp, s, i, [None, None]))
+    filtered = jsi.getplots(*plotargs(ktp, s, i, filterfuncs))[2]
+    reference = JS * np.array([[filterfuncs[1](li) * filterfuncs[0](ls) for ls in s] for li in i])
+    np.testing.assert_array_equal(filtered, reference)
+
+    jsi.tilebytes = 4 * jsi.tilebytesperpoint * len(s)
+    tiled, gram, marginals = jsi.getplots(*plotargs(ktp, s, i, filterfuncs),
+                                          consumers=[TileArray(str(tmp_path / 'JS.npy'), (len(i), len(s))), TileGram(), TileMarginals()])
+    np.testing.assert_allclose(tiled, filtered, rtol=1e-14)
+    np.testing.assert_allclose(gram[0], jsi.purity_gram(filtered), rtol=1e-10)
+    np.testing.assert_allclose(marginals[1], np.sum(np.abs(filtered) ** 2, axis=0), rtol=1e-10)